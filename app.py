@@ -1,133 +1,451 @@
-from flask import Flask, render_template, request
-import psycopg2
+from flask import (Flask, Response, abort, g, jsonify, make_response, redirect, render_template, request, send_file,
+                   stream_template, url_for)
+import base64
+import bisect
+import calendar
+import hashlib
+import json
 import os
-from datetime import datetime, timedelta
+import time
+from datetime import date, datetime, timedelta, timezone
 import re
 from dotenv import load_dotenv
+from psycopg2.errors import UndefinedColumn, UndefinedTable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from archive import ARCHIVE_PAGE_SIZE, archive_navigation, archive_page
+from assets import assets_version, init_static_assets
+from badges import add_date_badges
+from cache import TTLCache, start_invalidation_listener
+from dateparse import LOCAL_TZ, cache_info as dateparse_cache_info, format_event_date, local_today
+from db import get_connection, pool_metrics
+from followers import INTERVALS as FOLLOWER_INTERVALS, follower_series, latest_follower_counts
+from images import init_images
+from instrument import Profiler, record_request, render_prometheus, span
+from thumbnails import (THUMB_WIDTHS, ThumbnailError, find_thumbnail_url, thumbnail_cache, thumbnail_path,
+                        thumbnails_enabled)
+from venues import VENUE_FIELDS, VENUES_SQL, venue_by_alias
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
+init_static_assets(app)
+init_images(app)
+app.jinja_env.globals['thumbnail_url'] = thumbnail_path
+
+EVENTS_CACHE_ENABLED = os.getenv('EVENTS_CACHE_ENABLED', '1') == '1'
+EVENTS_CACHE_TTL = float(os.getenv('EVENTS_CACHE_TTL', '300'))  # seconds
+EVENTS_CACHE_MAX_ENTRIES = int(os.getenv('EVENTS_CACHE_MAX_ENTRIES', '16'))
+
+# Upcoming event list (stale-while-revalidate) and the HTML rendered from it.
+# Rendered pages are keyed by the event list version, so they only need the
+# midnight rollover and LRU bound, not their own TTL.
+events_cache = TTLCache(ttl=EVENTS_CACHE_TTL, max_entries=EVENTS_CACHE_MAX_ENTRIES)
+page_cache = TTLCache(ttl=None, max_entries=EVENTS_CACHE_MAX_ENTRIES, stale_while_revalidate=False)
+
+# Serialised /api/events bodies, keyed by event list version and the normalised
+# query (api_query_key), in their own cache so API clients cannot evict pages
+API_CACHE_MAX_ENTRIES = int(os.getenv('API_CACHE_MAX_ENTRIES', '256'))
+api_cache = TTLCache(ttl=None, max_entries=API_CACHE_MAX_ENTRIES, stale_while_revalidate=False)
+
+# Serialised /api/venues body for the current fingerprint. Its counts include
+# past events and venues.py edits, which the fingerprint does not see, so it
+# also expires after EVENTS_CACHE_TTL.
+venues_cache = TTLCache(ttl=EVENTS_CACHE_TTL, max_entries=1)
+
+# The beard_events fingerprint behind ETag/Last-Modified is re-read at most
+# once per VALIDATOR_TTL seconds, so a 304 normally costs no database work.
+VALIDATOR_TTL = float(os.getenv('VALIDATOR_TTL', '5'))
+validator_cache = TTLCache(ttl=VALIDATOR_TTL, max_entries=1, stale_while_revalidate=False)
+TEMPLATE_MTIME = int(os.path.getmtime(os.path.join(app.root_path, 'templates', 'index.html')))
+ASSETS_VERSION = assets_version(app)  # hashed asset URLs in the page change with a new build
+
+# Streaming mode renders / while events are read from a server-side cursor:
+# the head and hero go out before the query runs and memory stays flat for
+# long listings, at the cost of the events and page caches for that page.
+STREAM_INDEX = os.getenv('STREAM_INDEX', '0') == '1'
+STREAM_FETCH_SIZE = int(os.getenv('STREAM_FETCH_SIZE', '100'))  # rows per cursor round trip
+STREAM_CHUNK_BYTES = int(os.getenv('STREAM_CHUNK_BYTES', '1024'))
+
+# Shared with the async server (asgi.py), which runs the same queries through asyncpg
+UPCOMING_EVENTS_SQL = """
+    SELECT id, url, timestamp, name, responded, location, venueurl, duration, imageurl, updated, venue_id
+    FROM beard_events
+    WHERE timestamp > NOW()
+    ORDER BY timestamp ASC, id ASC
+"""
+# Precomputed copy of the above with formatted dates, kept by the writers
+# (upcoming.py) and only read while beard_upcoming_state says it is current
+UPCOMING_STATE_SQL = "SELECT stale FROM beard_upcoming_state"
+UPCOMING_TABLE_SQL = """
+    SELECT id, url, timestamp, name, responded, location, venueurl, duration, imageurl, updated, venue_id, date_text
+    FROM beard_upcoming_events
+    WHERE timestamp > NOW()
+    ORDER BY timestamp ASC, id ASC
+"""
+EVENTS_FINGERPRINT_SQL = """
+    SELECT COUNT(*), MAX(updated), MAX(id)
+    FROM beard_events
+    WHERE timestamp > NOW()
+"""
 
-DATABASE_URL = os.getenv('DATABASE_URL')
+# Read the upcoming list from beard_upcoming_events; cleared for this process
+# the first time the table turns out not to exist (or to predate venue_id), and
+# beard_events is read instead
+UPCOMING_TABLE_ENABLED = os.getenv('UPCOMING_TABLE_ENABLED', '1') == '1'
+upcoming_table_available = UPCOMING_TABLE_ENABLED
 
-def get_db_connection():
-    """Get a database connection"""
-    return psycopg2.connect(DATABASE_URL)
+def load_upcoming_events():
+    """Load upcoming events, from beard_upcoming_events when it exists and is current"""
+    global upcoming_table_available
+    if upcoming_table_available:
+        try:
+            with get_connection() as conn:
+                c = conn.cursor()
+                c.execute(UPCOMING_STATE_SQL)
+                state = c.fetchone()
+                rows = None
+                if state is not None and not state[0]:
+                    c.execute(UPCOMING_TABLE_SQL)
+                    rows = c.fetchall()
+            if rows is not None:
+                return events_from_table_rows(rows)
+        except (UndefinedTable, UndefinedColumn):
+            print("beard_upcoming_events is missing or out of date (run python upcoming.py); reading beard_events")
+            upcoming_table_available = False
+    return load_events_from_beard_events()
 
 def load_events_from_beard_events():
     """Load upcoming events from beard_events table"""
-    conn = get_db_connection()
-    c = conn.cursor()
-    
-    # Get future events only, ordered by timestamp
-    c.execute("""
-        SELECT id, url, timestamp, name, responded, location, venueurl, duration, imageurl, updated
-        FROM beard_events 
-        WHERE timestamp > NOW()
-        ORDER BY timestamp ASC
-    """)
-    
-    rows = c.fetchall()
-    conn.close()
-
-    events = []
-    for row in rows:
-        event_id, url, timestamp, name, responded, location, venueurl, duration, imageurl, updated = row
-        
-        # Format the event data
-        events.append({
-            'id': event_id,
-            'title': name or 'BEARD Event',
-            'date': format_event_date(timestamp),
-            'location': location or 'TBA',
-            'facebook_url': url,
-            'venue_url': venueurl,
-            'venue_image': imageurl,
-            'going_count': responded or 0,
-            'interested_count': 0,  # Not available in beard_events
-            'friends_going': '',
-            'is_upcoming': True,
-            'datetime_obj': timestamp
-        })
-
-    return events
-
-def format_event_date(timestamp):
-    """Format timestamp to readable date string"""
-    if not timestamp:
-        return "Date TBA"
-    
-    try:
-        # Format like "Friday 28 November 2025 from 21:00"
-        day_name = timestamp.strftime("%A")
-        day = timestamp.strftime("%-d" if os.name != 'nt' else "%#d")  # Remove leading zero
-        month = timestamp.strftime("%B")
-        year = timestamp.strftime("%Y")
-        time = timestamp.strftime("%H:%M")
-        
-        return f"{day_name} {day} {month} {year} from {time}"
-    except:
-        return str(timestamp)
+    with get_connection() as conn:
+        c = conn.cursor()
+
+        # Get future events only, ordered by timestamp
+        c.execute(UPCOMING_EVENTS_SQL)
+
+        rows = c.fetchall()
+
+    return events_from_rows(rows)
+
+def event_from_row(row, date_text):
+    """Map one beard_events row (UPCOMING_EVENTS_SQL columns) to an event dict"""
+    event_id, url, timestamp, name, responded, location, venueurl, duration, imageurl, updated, venue_id = row
+
+    return {
+        'id': event_id,
+        'title': name or 'BEARD Event',
+        'date': date_text,
+        'location': location or 'TBA',
+        'venue_id': venue_id,
+        'facebook_url': url,
+        'venue_url': venueurl,
+        'venue_image': imageurl,
+        'going_count': responded or 0,
+        'interested_count': 0,  # Not available in beard_events
+        'friends_going': '',
+        'is_upcoming': True,
+        'datetime_obj': timestamp
+    }
 
-def parse_event_date(date_str):
-    """Parse various date formats - simplified version for beard_events timestamp"""
+def events_from_rows(rows):
+    """Map beard_events rows (UPCOMING_EVENTS_SQL columns) to event dicts"""
+    with span('format_event_date'):
+        dates = [format_event_date(row[2]) for row in rows]
+
+    with span('events.map'):
+        return [event_from_row(row, date_text) for row, date_text in zip(rows, dates)]
+
+def events_from_table_rows(rows):
+    """Map beard_upcoming_events rows (UPCOMING_TABLE_SQL columns) to event dicts"""
+    with span('events.map'):
+        return [event_from_row(row[:11], row[11]) for row in rows]
+
+def stream_events_from_beard_events():
+    """Yield upcoming events, with badges, as they are fetched from a server-side cursor
+
+    Rows arrive STREAM_FETCH_SIZE at a time, so memory does not grow with the
+    number of events. A database error ends the list early instead of
+    breaking the response, which has already started by then.
+    """
+    today = local_today()
     try:
-        # If it's already a datetime object, return it
-        if isinstance(date_str, datetime):
-            return date_str
-        
-        # Try parsing as ISO format
-        return datetime.fromisoformat(str(date_str).replace('Z', '+00:00'))
-    except:
-        # Fallback to current time if parsing fails
-        return datetime.now()
-
-def add_date_badges(events):
-    """Add formatted date information to events"""
-    current_time = datetime.now()
-    
-    for event in events:
-        event_date = event['datetime_obj']
-        
-        # Determine if it's today, tomorrow, this week, etc.
-        days_until = (event_date.date() - current_time.date()).days
-        
-        if days_until == 0:
-            event['date_badge'] = "TODAY"
-            event['date_class'] = "today"
-        elif days_until == 1:
-            event['date_badge'] = "TOMORROW"
-            event['date_class'] = "tomorrow"
-        elif days_until <= 7:
-            event['date_badge'] = f"{days_until} DAYS"
-            event['date_class'] = "this-week"
-        elif days_until <= 30:
-            event['date_badge'] = f"{days_until} DAYS"
-            event['date_class'] = "this-month"
-        elif days_until <= 365:
-            weeks_until = days_until // 7
-            if weeks_until == 1:
-                event['date_badge'] = "1 WEEK"
-            else:
-                event['date_badge'] = f"{weeks_until} WEEKS"
-            event['date_class'] = "upcoming"
+        with get_connection() as conn:
+            c = conn.cursor(name='upcoming_events_stream')
+            c.itersize = STREAM_FETCH_SIZE
+            try:
+                c.execute(UPCOMING_EVENTS_SQL)
+                for row in c:
+                    event = event_from_row(row, format_event_date(row[2]))
+                    yield add_date_badges([event], today)[0]
+            finally:
+                c.close()
+    except Exception as e:
+        print(f"Error streaming events: {e}")
+
+def load_events_fingerprint():
+    """Cheap summary of the upcoming rows in beard_events, used for validators"""
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute(EVENTS_FINGERPRINT_SQL)
+        count, max_updated, max_id = c.fetchone()
+    return count, max_updated, max_id
+
+def events_fingerprint():
+    """Return the (possibly cached) upcoming events fingerprint"""
+    return validator_cache.get('fingerprint', load_events_fingerprint)
+
+def make_validators(fingerprint, kind):
+    """Build a strong ETag and Last-Modified for a response derived from beard_events"""
+    count, max_updated, max_id = fingerprint
+    today = local_today()
+    raw = f"{kind}|{count}|{max_updated}|{max_id}|{today}|{TEMPLATE_MTIME}|{ASSETS_VERSION}"
+    etag = hashlib.sha1(raw.encode('utf-8')).hexdigest()[:24]
+
+    # Badges change at local midnight even when no row does
+    last_modified = datetime.combine(today, datetime.min.time(), LOCAL_TZ)
+    if max_updated:
+        if max_updated.tzinfo is None:
+            max_updated = max_updated.replace(tzinfo=timezone.utc)
+        last_modified = max(last_modified, max_updated)
+    return etag, last_modified.astimezone(timezone.utc).replace(microsecond=0)
+
+def conditional_response(kind, build):
+    """Answer with 304 if the client's validators still match, else build() the response"""
+    try:
+        etag, last_modified = make_validators(events_fingerprint(), kind)
+    except Exception as e:
+        print(f"Could not compute validators for {kind}: {e}")
+        return build()
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    elif request.if_modified_since:
+        not_modified = last_modified <= request.if_modified_since
+    else:
+        not_modified = False
+
+    response = Response(status=304) if not_modified else make_response(build())
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response
+
+def get_upcoming_events():
+    """Return the cached upcoming events entry for the current fingerprint"""
+    try:
+        fingerprint = events_fingerprint()
+    except Exception:
+        fingerprint = None
+    return events_cache.get_entry(('upcoming', fingerprint), load_upcoming_events)
+
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 200
+API_FIELDS = ('id', 'title', 'date', 'start', 'location', 'venue_id', 'facebook_url', 'venue_url',
+              'venue_image', 'venue_image_thumb', 'going_count', 'interested_count', 'friends_going',
+              'is_upcoming')
+
+class ApiError(Exception):
+    """Invalid API request parameters"""
+
+def event_to_json(event, fields=API_FIELDS):
+    """JSON-safe view of an event dict restricted to fields"""
+    data = {}
+    for field in fields:
+        if field == 'start':
+            data['start'] = event['datetime_obj'].isoformat() if event['datetime_obj'] else None
+        elif field == 'venue_image_thumb':
+            data['venue_image_thumb'] = thumbnail_path(event.get('venue_image'))
         else:
-            event['date_badge'] = "UPCOMING"
-            event['date_class'] = "upcoming"
-    
-    return events
+            data[field] = event.get(field)
+    return data
+
+def dumps_json(payload):
+    """Serialise to JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+
+def encode_cursor(event):
+    """Opaque keyset cursor for the (timestamp, id) position of an event"""
+    raw = f"{event['datetime_obj'].isoformat()}|{event['id']}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, event_id = base64.urlsafe_b64decode(padded).decode('utf-8').rsplit('|', 1)
+        position = datetime.fromisoformat(timestamp), int(event_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError('Invalid cursor')
+    if position[0].tzinfo is None:
+        raise ApiError('Invalid cursor')
+    return position
+
+def parse_api_bound(value, name, end=False):
+    """Parse a from/to filter: an ISO date (local day) or an ISO datetime"""
+    if not value:
+        return None
+    try:
+        if len(value) == 10:
+            day = date.fromisoformat(value)
+            if end:
+                day += timedelta(days=1)
+            return datetime.combine(day, datetime.min.time(), LOCAL_TZ)
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ApiError(f"Invalid '{name}' value, expected ISO date or datetime")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=LOCAL_TZ)
+
+def event_sort_key(event):
+    return (event['datetime_obj'], event['id'])
+
+def parse_api_query(args):
+    """Validate /api/events parameters into (limit, cursor, start, end, venue, fields)
+
+    cursor is the decoded (timestamp, id) position; raises ApiError for bad values.
+    Parameters the API does not know are ignored.
+    """
+    try:
+        limit = int(args.get('limit', API_DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    limit = max(1, min(limit, API_MAX_LIMIT))
+
+    venue = None
+    if args.get('venue'):
+        try:
+            venue = int(args['venue'])
+        except ValueError:
+            raise ApiError('venue must be a venue id')
+
+    fields = API_FIELDS
+    if args.get('fields'):
+        fields = tuple(field.strip() for field in args['fields'].split(',') if field.strip())
+        unknown = [field for field in fields if field not in API_FIELDS]
+        if unknown:
+            raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+
+    cursor = decode_cursor(args['cursor']) if args.get('cursor') else None
+    start = parse_api_bound(args.get('from'), 'from')
+    end = parse_api_bound(args.get('to'), 'to', end=True)
+    return limit, cursor, start, end, venue, fields
+
+def api_query_key(query):
+    """Canonical text of a parse_api_query() result: the same for requests that mean the same"""
+    limit, cursor, start, end, venue, fields = query
+
+    def utc(value):
+        return value.astimezone(timezone.utc).isoformat() if value else ''
+
+    position = f'{utc(cursor[0])}|{cursor[1]}' if cursor else ''
+    return (f"limit={limit}&cursor={position}&from={utc(start)}&to={utc(end)}"
+            f"&venue={'' if venue is None else venue}&fields={','.join(fields)}")
+
+def paginate_events(events, query):
+    """Apply a parse_api_query() result (venue and from/to filters, keyset cursor, limit
+    and projection) to a sorted event list"""
+    limit, cursor, start, end, venue, fields = query
+    if venue is not None:
+        # The upcoming list is short; the filtered copy keeps its (timestamp, id) order
+        events = [event for event in events if (event['venue_id'] or 0) == venue]
+
+    # events are ordered by (timestamp, id), so every bound is a bisection
+    position = 0
+    if cursor:
+        position = bisect.bisect_right(events, cursor, key=event_sort_key)
+    if start:
+        position = max(position, bisect.bisect_left(events, start, key=lambda event: event['datetime_obj']))
+    stop = len(events)
+    if end:
+        stop = bisect.bisect_left(events, end, key=lambda event: event['datetime_obj'])
+
+    page = events[position:min(position + limit, stop)]
+    has_more = position + limit < stop
+    return {
+        'events': [event_to_json(event, fields) for event in page],
+        'next_cursor': encode_cursor(page[-1]) if page and has_more else None,
+    }
+
+def render_index(events):
+    """Render the events page for a list of upcoming events"""
+    # Badges are added to copies so cached event dicts are never mutated
+    with span('badges'):
+        events_with_badges = add_date_badges([dict(event) for event in events])
+
+    with span('render'):
+        return render_template('index.html',
+                               upcoming_events=events_with_badges,
+                               total_events=len(events_with_badges))
+
+def coalesce_chunks(chunks, size=STREAM_CHUNK_BYTES):
+    """Join the small strings a template stream yields into chunks of about size bytes"""
+    buffer, buffered = [], 0
+    try:
+        for chunk in chunks:
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= size:
+                yield ''.join(buffer)
+                buffer, buffered = [], 0
+        if buffer:
+            yield ''.join(buffer)
+    finally:
+        # Closing early (client went away) must release the cursor's connection now
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+def stream_index():
+    """Stream the events page, fetching event rows while it is being sent"""
+    stream = stream_template('index.html', upcoming_events=stream_events_from_beard_events())
+    return Response(coalesce_chunks(stream), mimetype='text/html')
+
+# Send "X-Profile: <PROFILE_TOKEN>" to cProfile a single request into PROFILE_DIR
+profiler = Profiler()
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    if profiler.wanted(request.headers.get('X-Profile')):
+        g.profile = profiler.start()
+
+@app.after_request
+def finish_request_metrics(response):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        path = profiler.finish(profile, request.endpoint or 'unmatched')
+        response.headers['X-Profile-File'] = os.path.basename(path)
+    started = g.pop('request_started', None)
+    if started is not None:
+        record_request(request.endpoint, request.method, response.status_code,
+                       time.perf_counter() - started)
+    return response
+
+@app.before_request
+def start_cache_listener():
+    """Listen for beard_events change notifications in this worker"""
+    if EVENTS_CACHE_ENABLED:
+        start_invalidation_listener()
 
 @app.route('/')
 def index():
     try:
-        events = load_events_from_beard_events()
-        events_with_badges = add_date_badges(events)
-        
-        return render_template('index.html', 
-                             upcoming_events=events_with_badges,
-                             total_events=len(events_with_badges))
+        if STREAM_INDEX:
+            return conditional_response('index', stream_index)
+        if not EVENTS_CACHE_ENABLED:
+            return render_index(load_upcoming_events())
+
+        def build():
+            entry = get_upcoming_events()
+            return page_cache.get(('index', entry.version), lambda: render_index(entry.value))
+
+        return conditional_response('index', build)
     except Exception as e:
         print(f"Error loading events: {e}")
         return render_template('index.html', 
@@ -135,26 +453,271 @@ def index():
                              total_events=0,
                              error="Unable to load events")
 
+@app.route('/api/events')
+def api_events():
+    """Upcoming events as JSON with cursor pagination, date filters and field projection
+
+    Query parameters: limit, cursor (next_cursor from the previous page),
+    from / to (ISO date or datetime, inclusive), venue (id from /api/venues,
+    0 for none) and fields (comma separated).
+    """
+    try:
+        query = parse_api_query(request.args)
+    except ApiError as e:
+        return jsonify({'error': str(e)}), 400
+    key = api_query_key(query)
+
+    def build():
+        entry = get_upcoming_events()
+        def serialize():
+            with span('api.serialize'):
+                return dumps_json(paginate_events(entry.value, query))
+
+        body = api_cache.get((entry.version, key), serialize)
+        return Response(body, mimetype='application/json')
+
+    try:
+        return conditional_response(f'api_events?{key}', build)
+    except Exception as e:
+        print(f"Error loading events: {e}")
+        return jsonify({'error': 'Unable to load events'}), 503
+
+FOLLOWERS_DEFAULT_DAYS = 90
+FOLLOWERS_MAX_DAYS = 3 * 366
+
+def parse_follower_range(args):
+    """from / to ISO dates for /api/followers, defaulting to the last FOLLOWERS_DEFAULT_DAYS"""
+    try:
+        end = date.fromisoformat(args['to']) if args.get('to') else local_today()
+        start = date.fromisoformat(args['from']) if args.get('from') else end - timedelta(days=FOLLOWERS_DEFAULT_DAYS)
+    except ValueError:
+        raise ApiError("Invalid 'from' / 'to' value, expected ISO date")
+    if start > end:
+        raise ApiError("'from' is after 'to'")
+    if (end - start).days > FOLLOWERS_MAX_DAYS:
+        raise ApiError(f"Date range is limited to {FOLLOWERS_MAX_DAYS} days")
+    return start, end
+
+@app.route('/api/followers')
+def api_followers():
+    """Follower count series with growth per account
+
+    Query parameters: from / to (ISO dates, inclusive, default the last 90
+    days), interval (day, week or month) and optional platform / username.
+    """
+    try:
+        start, end = parse_follower_range(request.args)
+        interval = request.args.get('interval', 'day')
+        if interval not in FOLLOWER_INTERVALS:
+            raise ApiError(f"interval must be one of {', '.join(FOLLOWER_INTERVALS)}")
+        with get_connection() as conn:
+            series = follower_series(conn, start, end, interval,
+                                     request.args.get('platform'), request.args.get('username'))
+    except ApiError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error loading follower series: {e}")
+        return jsonify({'error': 'Unable to load follower counts'}), 503
+
+    body = dumps_json({'from': start.isoformat(), 'to': end.isoformat(), 'interval': interval,
+                       'accounts': series})
+    return Response(body, mimetype='application/json')
+
+@app.route('/api/venues')
+def api_venues():
+    """Venues with coordinates and event counts, busiest first (ids for /api/events?venue=)"""
+    def build():
+        try:
+            fingerprint = events_fingerprint()
+        except Exception:
+            fingerprint = None
+        return Response(venues_cache.get(('venues', fingerprint), load_venues_json), mimetype='application/json')
+
+    try:
+        return conditional_response('api_venues', build)
+    except Exception as e:
+        print(f"Error loading venues: {e}")
+        return jsonify({'error': 'Unable to load venues'}), 503
+
+def load_venues_json():
+    """Serialised /api/venues body"""
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute(VENUES_SQL)
+        rows = c.fetchall()
+    return dumps_json({'venues': [dict(zip(VENUE_FIELDS, row)) for row in rows]})
+
+@app.route('/follower_counts')
+def follower_counts():
+    """Latest follower count per platform and account"""
+    try:
+        with get_connection() as conn:
+            return jsonify(latest_follower_counts(conn))
+    except Exception as e:
+        print(f"Error loading follower counts: {e}")
+        return jsonify({'error': 'Unable to load follower counts'}), 503
+
+@app.route('/thumbs/<key>-<int:width>.webp')
+def event_thumbnail(key, width):
+    """Resized WebP of an upcoming event's image, fetched once and cached on disk"""
+    if width not in THUMB_WIDTHS or not thumbnails_enabled():
+        abort(404)
+    # Only images of events we list can be fetched, so this is not an open proxy
+    try:
+        events = get_upcoming_events().value
+    except Exception as e:
+        print(f"Error loading events for thumbnail {key}: {e}")
+        abort(503)
+    url = find_thumbnail_url(key, (event['venue_image'] for event in events))
+    if url is None:
+        abort(404)
+    try:
+        path = thumbnail_cache.get(key, width, url)
+    except ThumbnailError as e:
+        print(f"Thumbnail for {url} failed: {e}")
+        return redirect(url)
+    return send_file(path, mimetype='image/webp', max_age=7 * 24 * 3600)
+
+def archive_event(row):
+    """Map an archive row (archive.ARCHIVE_COLUMNS) to an event dict"""
+    event_id, url, timestamp, name, responded, location, venueurl, imageurl = row
+    return {
+        'id': event_id,
+        'title': name or 'BEARD Event',
+        'date': format_event_date(timestamp),
+        'location': location,
+        'facebook_url': url,
+        'venue_url': venueurl,
+        'venue_image': imageurl,
+        'going_count': responded or 0,
+        'is_upcoming': False,
+        'datetime_obj': timestamp
+    }
+
+def archive_filters(args):
+    """year / month / venue id from the query string; 404 for nonsense"""
+    try:
+        year = int(args['year']) if args.get('year') else None
+        month = int(args['month']) if args.get('month') and year else None
+        venue = int(args['venue']) if args.get('venue') else None
+    except ValueError:
+        abort(404)
+    if (year is not None and not 1 <= year <= 9999) or (month is not None and not 1 <= month <= 12):
+        abort(404)
+    if venue is not None and venue < 0:
+        abort(404)
+    return year, month, venue
+
+def legacy_venue_redirect(args):
+    """Links from before venue ids named the location: redirect them to the venue's id"""
+    venue = args.get('venue', '')
+    if not venue or venue.isdigit():
+        return None
+    try:
+        with get_connection() as conn:
+            venue_id = venue_by_alias(conn, venue)
+    except Exception as e:
+        print(f"Error resolving venue {venue!r}: {e}")
+        return None
+    if venue_id is None:
+        abort(404)
+    params = {key: value for key, value in args.items() if key not in ('venue', 'cursor')}
+    return redirect(url_for('archive', **params, venue=venue_id), code=301)
+
+@app.route('/archive')
+def archive():
+    """Past gigs, newest first, by year / month / venue with keyset pagination"""
+    redirect_response = legacy_venue_redirect(request.args)
+    if redirect_response is not None:
+        return redirect_response
+    year, month, venue = archive_filters(request.args)
+    before = None
+    if request.args.get('cursor'):
+        try:
+            before = decode_cursor(request.args['cursor'])
+        except ApiError:
+            abort(404)
+
+    try:
+        with get_connection() as conn:
+            rows, has_more = archive_page(conn, year, month, venue, before, ARCHIVE_PAGE_SIZE)
+            navigation = archive_navigation(conn, year, month, venue)
+    except Exception as e:
+        print(f"Error loading archive: {e}")
+        return render_template('archive.html', events=[],
+                               navigation={'years': [], 'months': [], 'venues': [], 'venue_name': None},
+                               year=year, month=month, venue=venue, next_cursor=None,
+                               month_names=calendar.month_name, error="Unable to load the archive")
+
+    events = [archive_event(row) for row in rows]
+    return render_template('archive.html',
+                           events=events,
+                           navigation=navigation,
+                           year=year, month=month, venue=venue,
+                           next_cursor=encode_cursor(events[-1]) if has_more else None,
+                           month_names=calendar.month_name)
+
+POOL_COUNTERS = ('checkouts', 'waits', 'timeouts', 'connects', 'connect_failures', 'reconnects', 'discarded')
+POOL_GAUGES = ('idle', 'in_use', 'max')
+
+def metrics_samples():
+    """Pool, cache and parser figures for /metrics, as (metric, type, help, samples)"""
+    samples = []
+    pool = pool_metrics()
+    if pool:
+        for name in POOL_COUNTERS:
+            samples.append((f'beard_db_pool_{name}_total', 'counter', f'Connection pool {name}',
+                            {(): pool.get(name, 0)}))
+        samples.append(('beard_db_pool_wait_seconds_total', 'counter',
+                        'Time spent waiting for a pooled connection', {(): pool.get('wait_time_total', 0)}))
+        for name in POOL_GAUGES:
+            samples.append((f'beard_db_pool_{name}', 'gauge', f'Connection pool {name} connections',
+                            {(): pool.get(name, 0)}))
+
+    cache_samples = {}
+    for cache_name, cache in (('events', events_cache), ('page', page_cache), ('api', api_cache),
+                                ('venues', venues_cache), ('validator', validator_cache)):
+        for result, value in cache.stats.items():
+            cache_samples[(('cache', cache_name), ('result', result))] = value
+    samples.append(('beard_cache_lookups_total', 'counter', 'Cache lookups by result', cache_samples))
+
+    parse_cache = dateparse_cache_info()
+    samples.append(('beard_dateparse_cache_lookups_total', 'counter', 'Date parser cache lookups',
+                    {(('result', 'hit'),): parse_cache.hits, (('result', 'miss'),): parse_cache.misses}))
+    return samples
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for this worker (spans and request histograms need INSTRUMENT=1)"""
+    return Response(render_prometheus(metrics_samples()), mimetype='text/plain; version=0.0.4')
+
 @app.route('/debug_status')
 def debug_status():
     """Debug endpoint showing system status and database contents"""
+    # Live pool and cache figures, so never cached and sent without validators
+    response = make_response(build_debug_status())
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def build_debug_status():
+    """Collect system status and database contents for /debug_status"""
     try:
         from datetime import datetime
         
         # Check database
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Get event counts
-        c.execute("SELECT COUNT(*) FROM beard_events")
-        total_events = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM beard_events WHERE timestamp > NOW()")
-        future_events = c.fetchone()[0]
-        
-        # Get recent events
-        c.execute("SELECT name, timestamp, location, responded FROM beard_events WHERE timestamp > NOW() ORDER BY timestamp ASC LIMIT 5")
-        events_rows = c.fetchall()
+        with get_connection() as conn:
+            c = conn.cursor()
+
+            # Get event counts
+            c.execute("SELECT COUNT(*) FROM beard_events")
+            total_events = c.fetchone()[0]
+
+            c.execute("SELECT COUNT(*) FROM beard_events WHERE timestamp > NOW()")
+            future_events = c.fetchone()[0]
+
+            # Get recent events
+            c.execute("SELECT name, timestamp, location, responded FROM beard_events WHERE timestamp > NOW() ORDER BY timestamp ASC LIMIT 5")
+            events_rows = c.fetchall()
         recent_events = [
             {
                 'name': row[0],
@@ -163,9 +726,7 @@ def debug_status():
                 'responded': row[3]
             } for row in events_rows
         ]
-        
-        conn.close()
-        
+
         # System info
         status_data = {
             'timestamp': datetime.now().isoformat(),
@@ -173,7 +734,13 @@ def debug_status():
                 'total_events': total_events,
                 'future_events': future_events,
                 'database_connected': True,
-                'recent_events': recent_events
+                'recent_events': recent_events,
+                'pool': pool_metrics()
+            },
+            'cache': {
+                'enabled': EVENTS_CACHE_ENABLED,
+                'events': events_cache.stats,
+                'page': page_cache.stats
             },
             'system': {
                 'environment': os.environ.get('FLASK_ENV', 'not_set'),
@@ -7,21 +7,21 @@ import json
 import os
 from datetime import datetime, timedelta
 import re
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
 from dotenv import load_dotenv
 
+from dateparse import parse_event_date
+from event_store import save_events_to_db
+from scraper import FACEBOOK_URL, scrape_facebook_events
+
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 
 DATABASE_URL = os.getenv('DATABASE_URL')
-FACEBOOK_URL = 'https://www.facebook.com/bearduk/events'
 
-# Initialize background scheduler
-scheduler = BackgroundScheduler()
-scheduler.start()
+# Scraping runs in the ingest worker (python ingest.py worker), never in web
+# processes: starting a scheduler here ran one scrape per gunicorn worker.
 
 def get_db_connection():
     """Get a database connection"""
@@ -63,495 +63,6 @@ def init_db():
     conn.commit()
     conn.close()
 
-def setup_background_tasks():
-    """Set up background tasks for event and follower checking"""
-    # Run initial checks on startup
-    print("Running startup checks...")
-    check_events_background()
-    check_followers_background()
-
-    # Schedule event checking - run daily at 2 AM
-    scheduler.add_job(
-        func=check_events_background,
-        trigger=CronTrigger(hour=2),  # Daily at 2 AM
-        id='daily_event_check',
-        name='Daily Event Check',
-        replace_existing=True
-    )
-
-    # Schedule follower checking - run daily at 3 AM
-    scheduler.add_job(
-        func=check_followers_background,
-        trigger=CronTrigger(hour=3),  # Daily at 3 AM
-        id='daily_follower_check',
-        name='Daily Follower Check',
-        replace_existing=True
-    )
-
-    print("Background tasks scheduled")
-
-def check_events_background():
-    """Background task to check for new events"""
-    try:
-        print("Running background event check...")
-        events = scrape_facebook_events()
-        if events:
-            save_events_to_db(events)
-            print(f"Background event check completed: {len(events)} events updated")
-        else:
-            print("Background event check: No events found")
-    except Exception as e:
-        print(f"Background event check failed: {e}")
-
-def check_followers_background():
-    """Background task to update follower counts"""
-    try:
-        print("Running background follower check...")
-        from update_followers import update_all_followers
-        update_all_followers()
-        print("Background follower check completed")
-    except Exception as e:
-        print(f"Background follower check failed: {e}")
-
-def scrape_facebook_events():
-    """Scrape events from Facebook using Selenium as primary method, requests as fallback"""
-    try:
-        # Try Selenium first (more reliable for Facebook)
-        return scrape_facebook_events_selenium()
-    except Exception as e:
-        print(f"Selenium scraping failed: {e}")
-        try:
-            # Fallback to requests if Selenium fails
-            return scrape_facebook_events_requests()
-        except Exception as e2:
-            print(f"Requests scraping also failed: {e2}")
-            return []
-
-def scrape_facebook_events_requests():
-    """Scrape Facebook events using requests with proper headers"""
-    try:
-        import requests
-        from bs4 import BeautifulSoup
-        import re
-        from datetime import datetime
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0',
-        }
-        
-        response = requests.get(FACEBOOK_URL, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Look for event data in various formats
-        events = []
-        
-        # Try to find events in the page content
-        page_text = soup.get_text()
-        
-        # Look for event patterns in the text
-        lines = page_text.split('\n')
-        current_event = {}
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Look for event titles (usually contain "BEARD @")
-            if 'BEARD @' in line and len(line) < 100:
-                if current_event:
-                    events.append(current_event)
-                current_event = {'title': line, 'facebook_url': FACEBOOK_URL}
-            
-            # Look for dates
-            elif current_event and not current_event.get('date'):
-                # Multiple date patterns
-                date_patterns = [
-                    r'\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+at\s+\d{1,2}:\d{2}',
-                    r'\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)',
-                    r'Tomorrow at \d{1,2}:\d{2}',
-                    r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}',
-                    r'\b\d{4}-\d{2}-\d{2}',
-                ]
-                
-                for pattern in date_patterns:
-                    match = re.search(pattern, line, re.IGNORECASE)
-                    if match:
-                        current_event['date'] = match.group()
-                        break
-            
-            # Look for locations
-            elif current_event and not current_event.get('location'):
-                # Common location patterns
-                if any(loc in line.lower() for loc in ['southsea', 'eastleigh', 'portsmouth', 'brew', 'pub', 'bar', 'venue']):
-                    if len(line) < 100:  # Reasonable location length
-                        current_event['location'] = line
-        
-        # Add the last event if it exists
-        if current_event:
-            events.append(current_event)
-        
-        # Filter out incomplete events
-        complete_events = []
-        for event in events:
-            if event.get('title') and event.get('date'):
-                complete_events.append(event)
-        
-        return complete_events
-        
-    except Exception as e:
-        print(f"Requests scraping error: {e}")
-        raise
-
-def scrape_facebook_events_selenium():
-    try:
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-        import time
-        import re
-        from datetime import datetime
-
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-software-rasterizer")
-        chrome_options.add_argument("--disable-background-timer-throttling")
-        chrome_options.add_argument("--disable-renderer-backgrounding")
-        chrome_options.add_argument("--disable-backgrounding-occluded-windows")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-plugins")
-        chrome_options.add_argument("--disable-images")
-        chrome_options.add_argument("--disable-javascript")
-        chrome_options.add_argument("--disable-web-security")
-        chrome_options.add_argument("--allow-running-insecure-content")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-        chrome_options.add_argument("--disable-logging")
-        chrome_options.add_argument("--log-level=3")
-        chrome_options.add_argument("--remote-debugging-port=9222")
-        chrome_options.add_argument("--memory-pressure-off")
-        chrome_options.add_argument("--max_old_space_size=4096")
-        
-        # Additional Docker-specific options
-        chrome_options.add_argument("--single-process")
-        chrome_options.add_argument("--no-zygote")
-        chrome_options.add_argument("--disable-setuid-sandbox")
-
-        # Set Chrome binary location based on environment
-        import platform
-        if platform.system() == "Windows":
-            chrome_options.binary_location = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-        else:
-            chrome_options.binary_location = "/usr/bin/google-chrome"
-
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.set_page_load_timeout(30)
-
-        driver.get("https://www.facebook.com/bearduk/events")
-        time.sleep(15)  # Increased wait time
-
-        # Wait for events to load and try to load more content
-        try:
-            # Wait for page to be ready
-            WebDriverWait(driver, 20).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
-            )
-
-            # Additional wait for dynamic content
-            time.sleep(10)
-
-            # Try to scroll down multiple times to load more events
-            for i in range(5):  # Increased from 3 to 5
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)  # Increased wait time
-
-                # Try to click "See more" buttons if they exist
-                try:
-                    see_more_buttons = driver.find_elements(By.XPATH, "//span[contains(text(), 'See more')]/parent::*")
-                    for button in see_more_buttons:
-                        try:
-                            button.click()
-                            time.sleep(2)
-                        except:
-                            pass
-                except:
-                    pass
-
-                # Also try other load more patterns
-                try:
-                    load_more_buttons = driver.find_elements(By.XPATH, "//span[contains(text(), 'Load more')]/parent::*")
-                    for button in load_more_buttons:
-                        try:
-                            button.click()
-                            time.sleep(2)
-                        except:
-                            pass
-                except:
-                    pass
-
-            with open('/app/debug.log', 'a') as f:
-                f.write("Finished extended scrolling and loading more content\n")
-
-        except Exception as e:
-            with open('/app/debug.log', 'a') as f:
-                f.write(f"Error during extended page loading: {e}\n")
-
-        events = []
-
-        # Method 1: Try to find event containers using CSS selectors
-        try:
-            print("Starting Method 1: Individual page scraping")
-            with open('/app/debug.log', 'a') as f:
-                f.write("Starting Method 1: Individual page scraping\n")
-
-            # First, collect all event URLs from the page
-            event_urls = []
-            event_containers = driver.find_elements(By.CSS_SELECTOR, "[role='link'][href*='/events/']")
-
-            with open('/app/debug.log', 'a') as f:
-                f.write(f"Found {len(event_containers)} event containers\n")
-
-            for container in event_containers[:20]:  # Check more containers
-                try:
-                    href = container.get_attribute('href')
-                    if href and '/events/' in href and 'bearduk' not in href:
-                        event_id_match = re.search(r'/events/(\d+)', href)
-                        if event_id_match and href not in event_urls:
-                            event_urls.append(href)
-                except Exception as e:
-                    continue
-
-            with open('/app/debug.log', 'a') as f:
-                f.write(f"Found {len(event_urls)} unique event URLs: {event_urls[:5]}...\n")
-
-            # Now visit each event URL to get complete details
-            for url in event_urls[:10]:  # Limit to 10 events to avoid timeout
-                try:
-                    with open('/app/debug.log', 'a') as f:
-                        f.write(f"Visiting event URL: {url}\n")
-
-                    # Open event in new tab
-                    driver.execute_script("window.open('');")
-                    driver.switch_to.window(driver.window_handles[-1])
-                    driver.get(url)
-                    time.sleep(3)  # Wait for event page to load
-
-                    # Extract event details from the individual event page
-                    try:
-                        # Wait for the event page to load
-                        time.sleep(3)
-
-                        # Try multiple selectors for event title
-                        title_selectors = [
-                            "h1[data-testid='event-permalink-event-name']",
-                            "h1",
-                            "[role='main'] h1",
-                            "[data-testid='event-title']",
-                            ".event-title",
-                            "[role='main'] [dir='auto']",
-                            "span[dir='auto']",
-                            "title"
-                        ]
-
-                        event_title = ""
-                        for selector in title_selectors:
-                            try:
-                                title_element = driver.find_element(By.CSS_SELECTOR, selector)
-                                title_text = title_element.text.strip()
-                                if title_text and len(title_text) > 3 and title_text != "Events":
-                                    event_title = title_text
-                                    break
-                            except:
-                                continue
-
-                        # Try multiple selectors for event date/time
-                        date_selectors = [
-                            "[data-testid='event-permalink-event-time']",
-                            "[role='main'] time",
-                            "time",
-                            ".event-time",
-                            "[data-testid*='time']"
-                        ]
-
-                        event_date = ""
-                        for selector in date_selectors:
-                            try:
-                                date_element = driver.find_element(By.CSS_SELECTOR, selector)
-                                date_text = date_element.text.strip()
-                                if date_text and len(date_text) > 3:
-                                    event_date = date_text
-                                    break
-                            except:
-                                continue
-
-                        # Try multiple selectors for event location
-                        location_selectors = [
-                            "[data-testid='event-permalink-event-location']",
-                            "[role='main'] [data-testid*='location']",
-                            ".event-location",
-                            "[data-testid*='location']"
-                        ]
-
-                        event_location = ""
-                        for selector in location_selectors:
-                            try:
-                                location_element = driver.find_element(By.CSS_SELECTOR, selector)
-                                location_text = location_element.text.strip()
-                                if location_text and len(location_text) > 3:
-                                    event_location = location_text
-                                    break
-                            except:
-                                continue
-
-                        # If we still don't have good data, try parsing the page title
-                        if not event_title or event_title == "Events":
-                            try:
-                                page_title = driver.title
-                                if page_title and "Events" not in page_title:
-                                    event_title = page_title.split(" | ")[0].strip()
-                            except:
-                                pass
-
-                        with open('/app/debug.log', 'a') as f:
-                            f.write(f"Extracted from {url}: title='{event_title}', date='{event_date}', location='{event_location}'\n")
-
-                        # Only add if we have at least a title
-                        if event_title and ('beard' in event_title.lower() or '@' in event_title or 'BEARD' in event_title):
-                            event_id_match = re.search(r'/events/(\d+)', url)
-                            event_id = event_id_match.group(1) if event_id_match else ""
-
-                            # Check for duplicates
-                            is_duplicate = False
-                            for existing_event in events:
-                                if existing_event['title'] == event_title:
-                                    is_duplicate = True
-                                    break
-
-                            if not is_duplicate:
-                                events.append({
-                                    'date': event_date or "Date TBD",
-                                    'title': event_title,
-                                    'location': event_location or "Location TBD",
-                                    'is_upcoming': True,
-                                    'facebook_url': url,
-                                    'event_id': event_id,
-                                    'source': 'individual_page'
-                                })
-                                with open('/app/debug.log', 'a') as f:
-                                    f.write(f"Added event from individual page: {event_title}\n")
-
-                    except Exception as e:
-                        with open('/app/debug.log', 'a') as f:
-                            f.write(f"Error extracting from {url}: {e}\n")
-
-                    # Close the tab and switch back
-                    driver.close()
-                    driver.switch_to.window(driver.window_handles[0])
-
-                except Exception as e:
-                    with open('/app/debug.log', 'a') as f:
-                        f.write(f"Error visiting {url}: {e}\n")
-                    # Make sure we're back on the main tab
-                    if len(driver.window_handles) > 1:
-                        driver.close()
-                        driver.switch_to.window(driver.window_handles[0])
-
-        except Exception as e:
-            with open('/app/debug.log', 'a') as f:
-                f.write(f"Individual page method failed: {e}\n")
-
-        # Method 2: Fallback to the original line-by-line parsing if needed
-        if len(events) < 3:
-            try:
-                page_text = driver.find_element(By.TAG_NAME, "body").text
-                lines = [line.strip() for line in page_text.split('\n') if line.strip()]
-
-                i = 0
-                while i < len(lines) and len(events) < 6:
-                    line = lines[i]
-
-                    # Look for date patterns - Updated to match Facebook's actual format
-                    date_pattern1 = r'(Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+(\d{1,2})\s+at\s+(\d{1,2}:\d{2})\s+(AM|PM)\s+(GMT|BST)'
-                    date_pattern2 = r'(Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+(\d{1,2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+at\s+(\d{1,2}:\d{2})\s+(GMT|BST)'
-                    date_pattern3 = r'(Today|Tomorrow)\s+at\s+(\d{1,2}:\d{2})'
-                    date_pattern4 = r'Sun,\s+(\d{1,2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+at\s+(\d{1,2}:\d{2})'
-
-                    date_match = (re.match(date_pattern1, line) or re.match(date_pattern2, line) or
-                                re.match(date_pattern3, line) or re.match(date_pattern4, line))
-
-                    if date_match and i + 2 < len(lines):
-                        event_date = line
-                        event_title = lines[i + 1] if i + 1 < len(lines) else ""
-                        event_location = lines[i + 2] if i + 2 < len(lines) else ""
-
-                        # Check if this looks like a BEARD event
-                        if ('beard' in event_title.lower() or '@' in event_title or 'BEARD' in event_title):
-                            # Check if we already have this event
-                            is_duplicate = False
-                            for existing_event in events:
-                                if (existing_event['title'] == event_title and
-                                    existing_event['date'] == event_date):
-                                    is_duplicate = True
-                                    break
-
-                            if not is_duplicate:
-                                events.append({
-                                    'date': event_date,
-                                    'title': event_title,
-                                    'location': event_location,
-                                    'is_upcoming': True,
-                                    'facebook_url': 'https://www.facebook.com/bearduk/events'
-                                })
-
-                        i += 3
-                    else:
-                        i += 1
-
-            except Exception as e:
-                print(f"Fallback parsing failed: {e}")
-
-        driver.quit()
-
-        # Remove duplicates based on title and date
-        seen = set()
-        unique_events = []
-        for event in events:
-            event_key = (event['date'], event['title'])
-            if event_key not in seen:
-                seen.add(event_key)
-                unique_events.append(event)
-
-        return unique_events
-
-    except ImportError:
-        return []
-    except Exception as e:
-        print(f"Scraping error: {e}")
-        if 'driver' in locals():
-            try:
-                driver.quit()
-            except:
-                pass
-        return []
-
 def add_date_badges(events):
     """Add date badges to events based on how soon they are"""
     from datetime import datetime, timedelta
@@ -718,211 +229,44 @@ def add_manual_events():
     save_events_to_db(manual_events)
     return manual_events
 
-def save_events_to_db(events):
-    conn = get_db_connection()
-    c = conn.cursor()
-
-    # Clear old events (PostgreSQL syntax)
-    c.execute("DELETE FROM events WHERE scraped_at < NOW() - INTERVAL '30 days'")
-
-    for event in events:
-        # Normalize the date for duplicate checking
-        normalized_date = normalize_date_for_comparison(event['date'])
-
-        # Find existing events with similar normalized dates, titles, and locations
-        c.execute('''SELECT id, date FROM events WHERE title = ? AND location = ?''',
-                  (event['title'], event['location']))
-        existing_events = c.fetchall()
-
-        found_duplicate = False
-        for existing_id, existing_date in existing_events:
-            existing_normalized = normalize_date_for_comparison(existing_date)
-            if existing_normalized == normalized_date:
-                # Update existing event with latest data (keep the better formatted date)
-                c.execute('''UPDATE events SET date = %s, is_upcoming = %s, scraped_at = CURRENT_TIMESTAMP WHERE id = %s''',
-                          (event['date'], event.get('is_upcoming', True), existing_id))
-                found_duplicate = True
-                break
-
-        if not found_duplicate:
-            # Insert new event
-            c.execute('''INSERT INTO events (title, date, location, facebook_url, is_upcoming) VALUES (%s, %s, %s, %s, %s)''',
-                      (event['title'], event['date'], event['location'], event.get('facebook_url', ''), event.get('is_upcoming', True)))
-
-    conn.commit()
-    conn.close()
-
-def normalize_date_for_comparison(date_str):
-    """Normalize date strings for duplicate comparison by extracting day, month, year, hour, minute"""
-    try:
-        # Handle "Fri, 28 Nov at 21:00" format
-        date_match = re.search(r'(\d{1,2})\s*(\w{3})\s*at\s*(\d{1,2}):(\d{2})', date_str)
-        if date_match:
-            day = int(date_match.group(1))
-            month_str = date_match.group(2)
-            hour = int(date_match.group(3))
-            minute = int(date_match.group(4))
-
-            # Map month abbreviations
-            months = {
-                'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
-                'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
-            }
-
-            month = months.get(month_str, 1)
-            year = datetime.now().year
-
-            # If the date seems to be in the past, assume it's next year
-            event_date = datetime(year, month, day, hour, minute)
-            if event_date < datetime.now() - timedelta(days=90):  # More than 3 months ago
-                year += 1
-
-            return f"{year}-{month:02d}-{day:02d}-{hour:02d}-{minute:02d}"
-
-        # Handle "Friday 28 November 2025 from 21:00-23:00" format
-        date_match = re.search(r'(\d{1,2})\s+(\w+)\s+(\d{4})', date_str)
-        if date_match:
-            day = int(date_match.group(1))
-            month_str = date_match.group(2)
-            year = int(date_match.group(3))
-
-            months = {
-                'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
-                'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12
-            }
-
-            month = months.get(month_str, 1)
-            return f"{year}-{month:02d}-{day:02d}"
-
-        # Handle "Tomorrow at X:XX" format
-        if "Tomorrow" in date_str:
-            tomorrow = datetime.now() + timedelta(days=1)
-            time_match = re.search(r'at (\d{1,2}):(\d{2})', date_str)
-            if time_match:
-                hour = int(time_match.group(1))
-                minute = int(time_match.group(2))
-                return f"{tomorrow.year}-{tomorrow.month:02d}-{tomorrow.day:02d}-{hour:02d}-{minute:02d}"
-            return f"{tomorrow.year}-{tomorrow.month:02d}-{tomorrow.day:02d}-19-00"
-
-        return date_str  # Fallback to original string
-
-    except Exception:
-        return date_str
-
-def parse_event_date(date_str):
-    """Parse Facebook date format and return a datetime object"""
-    try:
-        # Handle "Tomorrow at X:XX" format
-        if "Tomorrow" in date_str:
-            tomorrow = datetime.now() + timedelta(days=1)
-            time_match = re.search(r'at (\d{1,2}):(\d{2})', date_str)
-            if time_match:
-                hour = int(time_match.group(1))
-                minute = int(time_match.group(2))
-                return tomorrow.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            return tomorrow.replace(hour=19, minute=0, second=0, microsecond=0)
-
-        # Handle "Fri, 28 Nov at 21:00" format (no year)
-        date_match = re.search(r'(\w{3}),?\s*(\d{1,2})\s*(\w{3})\s*at\s*(\d{1,2}):(\d{2})', date_str)
-        if date_match:
-            day = int(date_match.group(2))
-            month_str = date_match.group(3)
-            hour = int(date_match.group(4))
-            minute = int(date_match.group(5))
-
-            # Map month abbreviations
-            months = {
-                'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
-                'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
-            }
-
-            month = months.get(month_str, 1)
-            year = datetime.now().year
-
-            # Create the event date for this year
-            event_date = datetime(year, month, day, hour, minute)
-
-            # If the date is more than 3 months in the past, assume it's next year
-            # If it's within 3 months (past or future), keep it as this year
-            three_months_ago = datetime.now() - timedelta(days=90)
-            if event_date < three_months_ago:
-                event_date = datetime(year + 1, month, day, hour, minute)
-
-            return event_date
-
-        # Handle "September 10, 2025" format (with year)
-        date_with_year_match = re.search(r'(\w+)\s+(\d{1,2}),?\s+(\d{4})', date_str)
-        if date_with_year_match:
-            month_str = date_with_year_match.group(1)
-            day = int(date_with_year_match.group(2))
-            year = int(date_with_year_match.group(3))
-
-            months = {
-                'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
-                'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12,
-                'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
-                'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
-            }
-
-            month = months.get(month_str, 1)
-            return datetime(year, month, day, 19, 0)  # Default to 19:00 if no time
-
-        # Handle other date formats
-        try:
-            return datetime.strptime(date_str, "%B %d, %Y")
-        except:
-            pass
-
-        # Default fallback
-        return datetime.now() + timedelta(days=30)
-    except Exception:
-        return datetime.now() + timedelta(days=30)
-
 def load_events_from_db():
+    """Load upcoming legacy events using the backfilled starts_at column
+
+    Run migrate_event_timestamps.py first; "upcoming" is then an index range
+    scan instead of parsing every stored date string in Python.
+    """
     conn = get_db_connection()
     c = conn.cursor()
     # Select the event with the highest going_count for each unique title+date+location combination
     c.execute("""
-        SELECT title, date, location, facebook_url, going_count, interested_count, is_upcoming
-        FROM events
-        WHERE id IN (
-            SELECT id
-            FROM (
-                SELECT id, ROW_NUMBER() OVER (PARTITION BY title, date, location ORDER BY going_count DESC, id ASC) as rn
-                FROM events
-            )
-            WHERE rn = 1
-        )
+        SELECT title, date, location, facebook_url, going_count, interested_count, is_upcoming, starts_at
+        FROM (
+            SELECT title, date, location, facebook_url, going_count, interested_count, is_upcoming, starts_at,
+                   ROW_NUMBER() OVER (PARTITION BY title, date, location ORDER BY going_count DESC, id ASC) AS rn
+            FROM events
+            WHERE starts_at > NOW()
+        ) ranked
+        WHERE rn = 1
+        ORDER BY starts_at ASC
     """)
     rows = c.fetchall()
     conn.close()
 
     events = []
-    current_time = datetime.now()
-
     for row in rows:
-        event_date = parse_event_date(row[1])
-        is_future = event_date > current_time
-        is_recent_past = event_date > current_time - timedelta(days=30)  # Include events from last 30 days
-
-        # Include only future events
-        if is_future:
-            events.append({
-                'title': row[0],
-                'date': row[1],
-                'location': row[2],
-                'facebook_url': row[3] or 'https://www.facebook.com/bearduk/events',
-                'venue_url': None,  # Not in database
-                'venue_image': None,  # Not in database
-                'going_count': row[4] or 0,
-                'interested_count': row[5] or 0,
-                'friends_going': '',  # Not in database
-                'is_upcoming': bool(row[6]),
-                'datetime_obj': event_date
-            })
-
-    # Sort by date (earliest first)
-    events.sort(key=lambda x: x['datetime_obj'])
+        events.append({
+            'title': row[0],
+            'date': row[1],
+            'location': row[2],
+            'facebook_url': row[3] or 'https://www.facebook.com/bearduk/events',
+            'venue_url': None,  # Not in database
+            'venue_image': None,  # Not in database
+            'going_count': row[4] or 0,
+            'interested_count': row[5] or 0,
+            'friends_going': '',  # Not in database
+            'is_upcoming': bool(row[6]),
+            'datetime_obj': row[7]
+        })
 
     return events
 
@@ -957,26 +301,7 @@ def combine_scraped_and_manual_events(scraped_events):
 def get_events():
     try:
         init_db()
-        
-        # Check if we need to scrape (every 6 hours)
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM events WHERE scraped_at > NOW() - INTERVAL '6 hours'")
-        result = c.fetchone()
-        recent_count = result[0] if result else 0
-        conn.close()
-        
-        if recent_count == 0:
-            try:
-                scraped_events = scrape_facebook_events()
-                if scraped_events:
-                    # Save only scraped events (no manual fallbacks)
-                    save_events_to_db(scraped_events)
-                # If no events scraped, don't add anything
-            except Exception as scrape_error:
-                # If scraping fails, don't add manual events
-                pass
-        
+        # Freshness is the ingest worker's job; requests only read
         return load_events_from_db()
     except Exception as e:
         # If database operations fail, return empty list
@@ -1001,16 +326,14 @@ def home():
 
 @app.route('/update_events')
 def update_events():
-    """Manual endpoint to trigger event scraping"""
+    """Manual endpoint to trigger event scraping in the background"""
     try:
-        events = scrape_facebook_events()
-        if not events:
-            # If scraping fails, add the manual events that aren't on Facebook
-            add_manual_events()
-            events = load_events_from_db()  # Reload to get all events
-        else:
-            save_events_to_db(events)
-        return f"Updated {len(events)} events successfully!"
+        import threading
+        from ingest import run_job
+
+        # run_job takes the ingest advisory lock, so this never overlaps a scheduled run
+        threading.Thread(target=run_job, args=('events',), daemon=True).start()
+        return "Event update started"
     except Exception as e:
         return f"Error updating events: {e}"
 
@@ -1040,12 +363,12 @@ def update_followers():
 def test_scraping():
     """Test endpoint to show live Facebook scraping output with debugging info"""
     try:
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
         from selenium.webdriver.common.by import By
-        import time
         import re
         from datetime import datetime
+
+        from browser_pool import get_pool
+        from scraper import wait_for_events_list
         
         # Initialize response data
         response_data = {
@@ -1060,52 +383,18 @@ def test_scraping():
         }
         
         try:
-            # Setup Chrome with debugging info
-            chrome_options = Options()
-            chrome_options.add_argument("--headless=new")  # Use new headless mode
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1200")  # Increased height for more content
-            chrome_options.add_argument("--start-maximized")
-            chrome_options.add_argument("--disable-web-security")
-            chrome_options.add_argument("--disable-features=VizDisplayCompositor")
-            chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            chrome_options.add_argument("--accept-lang=en-US,en")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option("useAutomationExtension", False)
-            chrome_options.add_argument("--disable-extensions")
-            chrome_options.add_argument("--disable-plugins")
-            chrome_options.add_argument("--disable-images")  # Speed up loading
-            chrome_options.add_argument("--disable-dev-tools")
-            chrome_options.add_argument("--no-first-run")
-            chrome_options.add_argument("--disable-default-apps")
-            chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-            chrome_options.add_argument("--disable-logging")
-            chrome_options.add_argument("--log-level=3")
-            chrome_options.add_argument("--remote-debugging-port=9222")
-            
-            # Set Chrome binary location based on environment
-            import platform
-            if platform.system() == "Windows":
-                chrome_options.binary_location = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-            else:
-                chrome_options.binary_location = "/usr/bin/google-chrome"
-            
-            driver = webdriver.Chrome(options=chrome_options)
+            # Borrow a warm browser from the scraper's pool (unique debugging port per instance)
+            pool = get_pool()
+            browser = pool.acquire()
+            driver = browser.driver
             response_data['chrome_setup'] = 'success'
-            
-            # Make the browser look more like a real user
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"})
-            
-            # Load Facebook page
+            response_data['browser_pool'] = pool.status()
+
+            # Load Facebook page and wait for the events list rather than a fixed delay
             driver.get("https://www.facebook.com/bearduk/events")
+            wait_for_events_list(driver)
             response_data['page_load'] = 'loaded'
             
-            time.sleep(10)
-            
             # Get page text
             page_text = driver.find_element(By.TAG_NAME, "body").text
             lines = [line.strip() for line in page_text.split('\n') if line.strip()]
@@ -1304,7 +593,7 @@ def test_scraping():
             with open('/app/debug.log', 'a') as f:
                 f.write(f"Total events found: {len(events)}\n")
 
-            driver.quit()
+            pool.release(browser)
 
             response_data['detected_events'] = events
             response_data['status'] = 'completed'
@@ -1313,11 +602,8 @@ def test_scraping():
         except Exception as selenium_error:
             response_data['errors'].append(f"Selenium error: {str(selenium_error)}")
             response_data['status'] = 'selenium_failed'
-            if 'driver' in locals():
-                try:
-                    driver.quit()
-                except:
-                    pass
+            if 'browser' in locals():
+                pool.release(browser)
         
         return response_data
         
@@ -1407,9 +693,6 @@ def health_check():
         'message': 'BEARD website is running'
     }
 
-# Set up background tasks when the module is imported
-setup_background_tasks()
-
 if __name__ == '__main__':
     # Production-ready configuration
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,191 @@
+"""
+Past-events archive: browse beard_events by year, month and venue.
+
+Pages are newest first and keyset-paginated on (timestamp, id), read through
+a named server-side cursor. idx_beard_events_archive (and the per-venue
+idx_beard_events_archive_venue_id) include every column a page shows, so each
+page is a single index scan however deep into the history it is.
+
+Venues are the integer ids of venues.py; venue 0 selects events with no venue.
+The year / month / venue navigation is read from beard_event_months, a count
+of events per local calendar month and venue id. event_store.py refreshes the
+months it writes to; other writers can run `python archive.py` to rebuild it.
+Counts are per whole month, so the current month also counts its remaining
+upcoming events.
+"""
+import sys
+from datetime import date, datetime
+
+from dateparse import LOCAL_TZ, local_today
+from venues import init_venues, venue_name
+
+ARCHIVE_PAGE_SIZE = 30
+NAV_VENUES = 40  # venues listed in the navigation, busiest first
+
+# Calendar month of an event in the site's timezone
+MONTH_SQL = f"date_trunc('month', timestamp AT TIME ZONE '{LOCAL_TZ.key}')::date"
+
+ARCHIVE_COLUMNS = 'id, url, timestamp, name, responded, location, venueurl, imageurl'
+
+
+def init_archive(conn):
+    """Create the per-month count table (needs beard_events.venue_id, see venues.init_venues)"""
+    c = conn.cursor()
+    # Counts used to be per location text; the table is derived, so it is rebuilt
+    c.execute('''SELECT 1 FROM information_schema.columns
+                 WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s''',
+              ('beard_event_months', 'location'))
+    rebuild = c.fetchone() is not None
+    if rebuild:
+        c.execute('DROP TABLE beard_event_months')
+    c.execute('''CREATE TABLE IF NOT EXISTS beard_event_months (
+        month DATE NOT NULL,
+        venue_id INTEGER NOT NULL,
+        events INTEGER NOT NULL,
+        PRIMARY KEY (month, venue_id)
+    )''')
+    if rebuild:
+        refresh_month_counts(conn)
+
+
+def month_of(timestamp):
+    """First day of the local calendar month of a timestamp"""
+    return timestamp.astimezone(LOCAL_TZ).date().replace(day=1)
+
+
+def month_range(year, month=None):
+    """[start, end) of a local calendar year, or of one month of it, as aware datetimes"""
+    if month is None:
+        first, last = date(year, 1, 1), date(year + 1, 1, 1)
+    else:
+        first = date(year, month, 1)
+        last = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return (datetime.combine(first, datetime.min.time(), LOCAL_TZ),
+            datetime.combine(last, datetime.min.time(), LOCAL_TZ))
+
+
+def refresh_month_counts(conn, months=None):
+    """Recount beard_event_months for the given month start dates (all months if None)"""
+    c = conn.cursor()
+    if months is None:
+        c.execute('DELETE FROM beard_event_months')
+        c.execute(f'''INSERT INTO beard_event_months (month, venue_id, events)
+                      SELECT {MONTH_SQL}, COALESCE(venue_id, 0), COUNT(*)
+                      FROM beard_events
+                      WHERE timestamp IS NOT NULL
+                      GROUP BY 1, 2''')
+        return
+
+    months = sorted(set(months))
+    if not months:
+        return
+    start = month_range(months[0].year, months[0].month)[0]
+    end = month_range(months[-1].year, months[-1].month)[1]
+    c.execute('DELETE FROM beard_event_months WHERE month = ANY(%s)', (months,))
+    # The timestamp range keeps this an index scan; concurrent writers may
+    # recount the same month, so the last one wins instead of conflicting
+    c.execute(f'''INSERT INTO beard_event_months (month, venue_id, events)
+                  SELECT {MONTH_SQL}, COALESCE(venue_id, 0), COUNT(*)
+                  FROM beard_events
+                  WHERE timestamp >= %s AND timestamp < %s AND {MONTH_SQL} = ANY(%s)
+                  GROUP BY 1, 2
+                  ON CONFLICT (month, venue_id) DO UPDATE SET events = EXCLUDED.events''',
+              (start, end, months))
+
+
+def archive_page(conn, year=None, month=None, venue=None, before=None, limit=ARCHIVE_PAGE_SIZE):
+    """One page of past events, newest first, and whether there are more
+
+    venue is a venue id, 0 for events with no venue. before is the
+    (timestamp, id) of the last event on the previous page. Rows have
+    ARCHIVE_COLUMNS.
+    """
+    conditions = ['timestamp <= NOW()']
+    params = []
+    if year is not None:
+        start, end = month_range(year, month)
+        conditions.append('timestamp >= %s AND timestamp < %s')
+        params += [start, end]
+    if venue is not None:
+        conditions.append('venue_id = %s' if venue else 'venue_id IS NULL')
+        if venue:
+            params.append(venue)
+    if before is not None:
+        conditions.append('(timestamp, id) < (%s, %s)')
+        params += list(before)
+    params.append(limit + 1)
+
+    c = conn.cursor(name='archive_page')
+    c.itersize = limit + 1
+    try:
+        c.execute(f'''SELECT {ARCHIVE_COLUMNS}
+                      FROM beard_events
+                      WHERE {' AND '.join(conditions)}
+                      ORDER BY timestamp DESC, id DESC
+                      LIMIT %s''', params)
+        rows = c.fetchall()
+    finally:
+        c.close()
+    return rows[:limit], len(rows) > limit
+
+
+def archive_navigation(conn, year=None, month=None, venue=None):
+    """Counts for the navigation: years, months of the selected year and venues
+
+    Venues are (venue id, name, count) within the selected year / month,
+    busiest first, with name None for venue 0. venue_name is the name of the
+    selected venue.
+    """
+    this_month = local_today().replace(day=1)
+    c = conn.cursor()
+    c.execute('''SELECT EXTRACT(YEAR FROM month)::int, SUM(events)::int
+                 FROM beard_event_months
+                 WHERE month <= %s
+                 GROUP BY 1 ORDER BY 1 DESC''', (this_month,))
+    years = c.fetchall()
+
+    months = []
+    if year is not None:
+        c.execute('''SELECT EXTRACT(MONTH FROM month)::int, SUM(events)::int
+                     FROM beard_event_months
+                     WHERE month >= %s AND month < %s AND month <= %s
+                     GROUP BY 1 ORDER BY 1 DESC''',
+                  (date(year, 1, 1), date(year + 1, 1, 1), this_month))
+        months = c.fetchall()
+
+    if year is None:
+        start, end = date.min, date.max
+    else:
+        start, end = (dt.date() for dt in month_range(year, month))
+    c.execute('''SELECT m.venue_id, v.name, m.events
+                 FROM (SELECT venue_id, SUM(events)::int AS events
+                       FROM beard_event_months
+                       WHERE month >= %s AND month < %s AND month <= %s
+                       GROUP BY 1) m
+                 LEFT JOIN venues v ON v.id = m.venue_id
+                 ORDER BY 3 DESC, 2 LIMIT %s''', (start, end, this_month, NAV_VENUES))
+    venues = c.fetchall()
+    return {'years': years, 'months': months, 'venues': venues,
+            'venue_name': venue_name(conn, venue) if venue else None}
+
+
+def main():
+    """Rebuild beard_event_months from beard_events"""
+    from db import close_pool, get_connection
+
+    try:
+        with get_connection() as conn:
+            init_venues(conn)
+            init_archive(conn)
+            refresh_month_counts(conn)
+            c = conn.cursor()
+            c.execute('SELECT COUNT(*), COALESCE(SUM(events), 0) FROM beard_event_months')
+            rows, events = c.fetchone()
+    finally:
+        close_pool()
+    print(f"Rebuilt beard_event_months: {rows} month/venue rows, {events} events")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
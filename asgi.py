@@ -0,0 +1,274 @@
+"""
+Async serving mode: an ASGI application for the events site.
+
+    python -m uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+GET / and GET /api/events are served on the event loop, with beard_events read
+through an asyncpg pool, so a slow query only holds up the requests that need
+its result. They share app.py's caches, validators, pagination and templates,
+so responses are identical to the Flask views. Template renders and cache
+lookups that may build a body run in a worker thread (asyncio.to_thread),
+since they take TTLCache's locks. Every other route (static files,
+/debug_status, /metrics, ...) runs the Flask app in a thread pool.
+
+STREAM_INDEX and X-Profile are Flask-only: here / is always rendered whole,
+and requests to / and /api/events are not profiled.
+
+Environment:
+    ASYNC_DB_POOL_MIN / ASYNC_DB_POOL_MAX    asyncpg pool size (default 1 / 10)
+    ASYNC_DB_STATEMENT_CACHE_SIZE            set to 0 behind a transaction-mode pooler
+    ASYNC_WSGI_THREADS                       threads for the Flask fallback (default 10)
+"""
+import asyncio
+import os
+import time
+from urllib.parse import parse_qsl
+
+import asyncpg
+from a2wsgi import WSGIMiddleware
+from flask import render_template
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import http_date, parse_date, parse_etags, quote_etag
+
+from app import (EVENTS_CACHE_ENABLED, EVENTS_FINGERPRINT_SQL, UPCOMING_EVENTS_SQL, UPCOMING_STATE_SQL,
+                 UPCOMING_TABLE_ENABLED, UPCOMING_TABLE_SQL, ApiError, api_cache, api_query_key, app, dumps_json,
+                 events_cache, events_from_rows, events_from_table_rows, make_validators, page_cache,
+                 paginate_events, parse_api_query, render_index, validator_cache)
+from cache import start_invalidation_listener
+from db import STATEMENT_TIMEOUT_MS
+from instrument import record_request
+
+ASYNC_POOL_MIN = int(os.getenv('ASYNC_DB_POOL_MIN', '1'))
+ASYNC_POOL_MAX = int(os.getenv('ASYNC_DB_POOL_MAX', '10'))
+ASYNC_STATEMENT_CACHE_SIZE = int(os.getenv('ASYNC_DB_STATEMENT_CACHE_SIZE', '100'))
+WSGI_THREADS = int(os.getenv('ASYNC_WSGI_THREADS', '10'))
+
+
+class AsyncEvents:
+    """asyncpg pool plus single-flight loading into app.py's caches"""
+
+    def __init__(self):
+        self.pool = None
+        self._pool_lock = asyncio.Lock()
+        self._inflight = {}  # (cache id, key) -> Task
+        self.upcoming_table_available = UPCOMING_TABLE_ENABLED
+
+    async def get_pool(self):
+        if self.pool is None:
+            async with self._pool_lock:
+                if self.pool is None:
+                    settings = {'statement_timeout': str(STATEMENT_TIMEOUT_MS)} if STATEMENT_TIMEOUT_MS else {}
+                    self.pool = await asyncpg.create_pool(
+                        os.getenv('DATABASE_URL'), min_size=ASYNC_POOL_MIN, max_size=ASYNC_POOL_MAX,
+                        statement_cache_size=ASYNC_STATEMENT_CACHE_SIZE, server_settings=settings)
+        return self.pool
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    def _load(self, cache, key, load):
+        """Start (or join) the one load of key; returns its task"""
+        flight = (id(cache), key)
+        task = self._inflight.get(flight)
+        if task is None:
+            token = cache.load_token()
+
+            async def run():
+                try:
+                    return cache.put(key, await load(), token)
+                finally:
+                    self._inflight.pop(flight, None)
+
+            task = self._inflight[flight] = asyncio.ensure_future(run())
+        return task
+
+    def _refresh_in_background(self, cache, key, load):
+        def done(task):
+            if not task.cancelled() and task.exception() is not None:
+                cache.stats['load_errors'] += 1
+                print(f"Background cache refresh of {key!r} failed: {task.exception()}")
+
+        if (id(cache), key) not in self._inflight:
+            cache.stats['refreshes'] += 1
+            self._load(cache, key, load).add_done_callback(done)
+
+    async def cached(self, cache, key, load):
+        """Async counterpart of TTLCache.get_entry() for a coroutine loader"""
+        entry, state = cache.peek(key)
+        if state == 'fresh':
+            return entry
+        if state == 'stale':
+            self._refresh_in_background(cache, key, load)
+            return entry
+        try:
+            return await asyncio.shield(self._load(cache, key, load))
+        except Exception:
+            cache.stats['load_errors'] += 1
+            if entry is not None:
+                print(f"Cache load of {key!r} failed, serving stale value")
+                return entry
+            raise
+
+    async def load_fingerprint(self):
+        pool = await self.get_pool()
+        row = await pool.fetchrow(EVENTS_FINGERPRINT_SQL)
+        return tuple(row)
+
+    async def load_events(self):
+        pool = await self.get_pool()
+        if self.upcoming_table_available:
+            try:
+                state = await pool.fetchrow(UPCOMING_STATE_SQL)
+                if state is not None and not state[0]:
+                    return events_from_table_rows(await pool.fetch(UPCOMING_TABLE_SQL))
+            except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError):
+                print("beard_upcoming_events is missing or out of date (run python upcoming.py); reading beard_events")
+                self.upcoming_table_available = False
+        rows = await pool.fetch(UPCOMING_EVENTS_SQL)
+        return events_from_rows(rows)
+
+    async def fingerprint(self):
+        entry = await self.cached(validator_cache, 'fingerprint', self.load_fingerprint)
+        return entry.value
+
+    async def upcoming(self, fingerprint):
+        return await self.cached(events_cache, ('upcoming', fingerprint), self.load_events)
+
+
+events = AsyncEvents()
+
+
+def header(scope, name):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def base_url(scope):
+    host = header(scope, b'host') or 'localhost'
+    return f"{scope.get('scheme', 'http')}://{host}"
+
+
+def not_modified(scope, etag, last_modified):
+    if_none_match = header(scope, b'if-none-match')
+    if if_none_match:
+        return parse_etags(if_none_match).contains(etag)
+    if_modified_since = parse_date(header(scope, b'if-modified-since'))
+    return bool(if_modified_since and last_modified <= if_modified_since)
+
+
+async def send_response(send, status, body=b'', content_type=None, headers=()):
+    raw_headers = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    if content_type:
+        raw_headers.append((b'content-type', content_type.encode('latin-1')))
+    raw_headers.append((b'content-length', str(len(body)).encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': body})
+    return status
+
+
+async def conditional(scope, send, kind, build, content_type):
+    """Async counterpart of app.conditional_response(); build(fingerprint) returns the body"""
+    try:
+        fingerprint = await events.fingerprint()
+        etag, last_modified = make_validators(fingerprint, kind)
+    except Exception as e:
+        print(f"Could not compute validators for {kind}: {e}")
+        return await send_response(send, 200, await build(None), content_type)
+
+    headers = [('etag', quote_etag(etag)), ('last-modified', http_date(last_modified)),
+               ('cache-control', 'public, no-cache')]
+    if not_modified(scope, etag, last_modified):
+        return await send_response(send, 304, headers=headers)
+    return await send_response(send, 200, await build(fingerprint), content_type, headers)
+
+
+def render(scope, render_function, *args, **kwargs):
+    """Call a Flask rendering function inside a request context (url_for needs one)"""
+    with app.test_request_context(scope['path'], base_url=base_url(scope)):
+        return render_function(*args, **kwargs)
+
+
+async def index(scope, send):
+    html = 'text/html; charset=utf-8'
+    try:
+        if not EVENTS_CACHE_ENABLED:
+            body = await asyncio.to_thread(render, scope, render_index, await events.load_events())
+            return await send_response(send, 200, body.encode('utf-8'), html)
+
+        async def build(fingerprint):
+            entry = await events.upcoming(fingerprint)
+            page = await asyncio.to_thread(page_cache.get, ('index', entry.version),
+                                           lambda: render(scope, render_index, entry.value))
+            return page.encode('utf-8')
+
+        return await conditional(scope, send, 'index', build, html)
+    except Exception as e:
+        print(f"Error loading events: {e}")
+        body = await asyncio.to_thread(render, scope, render_template, 'index.html',
+                                       upcoming_events=[], total_events=0, error="Unable to load events")
+        return await send_response(send, 200, body.encode('utf-8'), html)
+
+
+async def api_events(scope, send):
+    args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('utf-8', 'replace'), keep_blank_values=True))
+    try:
+        query = parse_api_query(args)
+    except ApiError as e:
+        return await send_response(send, 400, dumps_json({'error': str(e)}), 'application/json')
+    key = api_query_key(query)
+
+    async def build(fingerprint):
+        entry = await events.upcoming(fingerprint)
+        return await asyncio.to_thread(api_cache.get, (entry.version, key),
+                                       lambda: dumps_json(paginate_events(entry.value, query)))
+
+    try:
+        return await conditional(scope, send, f'api_events?{key}', build, 'application/json')
+    except Exception as e:
+        print(f"Error loading events: {e}")
+        return await send_response(send, 503, dumps_json({'error': 'Unable to load events'}),
+                                   'application/json')
+
+
+ROUTES = {
+    '/': ('index', index),
+    '/api/events': ('api_events', api_events),
+}
+
+flask_fallback = WSGIMiddleware(app, workers=WSGI_THREADS)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                if EVENTS_CACHE_ENABLED:
+                    start_invalidation_listener()
+                await events.get_pool()
+            except Exception as e:
+                # Keep serving: the pool is retried on the first request
+                print(f"Async database pool not ready at startup: {e}")
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await events.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    route = ROUTES.get(scope.get('path')) if scope['type'] == 'http' else None
+    if route is None or scope['method'] != 'GET':
+        return await flask_fallback(scope, receive, send)
+
+    endpoint, handler = route
+    started = time.perf_counter()
+    status = await handler(scope, send)
+    record_request(endpoint, 'GET', status, time.perf_counter() - started)
@@ -0,0 +1,89 @@
+"""
+Serve the fingerprinted assets built by build_static.py.
+
+init_static_assets(app) loads static/dist/assets.json (if it exists) and:
+
+- rewrites url_for('static', filename='style.css') to the hashed
+  dist/style.<hash>.css, so templates keep using the original names
+- serves hashed files with "Cache-Control: public, max-age=31536000,
+  immutable", picking the .br or .gz variant the client accepts
+  (Content-Encoding, Vary: Accept-Encoding)
+
+Without a build (local development) url_for and the static view behave as
+before.
+"""
+import hashlib
+import json
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+from werkzeug.exceptions import NotFound
+
+DIST_PREFIX = 'dist/'
+MANIFEST_NAME = 'assets.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODING_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))  # preferred first
+
+
+def load_manifest(static_folder):
+    """Return (original -> hashed name, hashed name -> encodings), empty if not built"""
+    path = os.path.join(static_folder, 'dist', MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}, {}
+    except ValueError as e:
+        print(f"Ignoring unreadable asset manifest {path}: {e}")
+        return {}, {}
+    return manifest.get('assets', {}), manifest.get('encodings', {})
+
+
+def assets_version(app):
+    """Short hash of the asset manifest, for validators of pages that link assets"""
+    manifest = json.dumps(app.extensions.get('assets', {}), sort_keys=True)
+    return hashlib.sha1(manifest.encode('utf-8')).hexdigest()[:12]
+
+
+def init_static_assets(app):
+    """Install the url_for rewrite and the immutable static view on a Flask app"""
+    assets, encodings = load_manifest(app.static_folder)
+    app.extensions['assets'] = assets
+    if not assets:
+        return
+
+    hashed = set(assets.values())
+    dist_folder = os.path.join(app.static_folder, 'dist')
+    default_static = app.view_functions['static']
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in assets:
+            values['filename'] = DIST_PREFIX + assets[values['filename']]
+
+    def static(filename):
+        name = filename[len(DIST_PREFIX):] if filename.startswith(DIST_PREFIX) else None
+        if name not in hashed:
+            return default_static(filename=filename)
+
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        served, content_encoding = name, None
+        available = encodings.get(name, ())
+        for encoding, suffix in ENCODING_SUFFIXES:
+            if encoding in available and request.accept_encodings[encoding]:
+                served, content_encoding = name + suffix, encoding
+                break
+
+        try:
+            response = send_from_directory(dist_folder, served, mimetype=mimetype, max_age=31536000)
+        except NotFound:
+            return default_static(filename=filename)
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+        if available:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+    app.view_functions['static'] = static
@@ -0,0 +1,64 @@
+"""
+Date badges ("TODAY", "3 DAYS", "2 WEEKS", ...) for the events page.
+
+The badge for an event depends only on how many days away it is in
+Europe/London, so the labels are built once into a table indexed by
+"days until", and once per local day that table is keyed by calendar date.
+Badging an event is then a timezone conversion and a dict lookup, and every
+worker agrees on "today" regardless of the server's timezone.
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from dateparse import LOCAL_TZ, local_today
+
+HORIZON_DAYS = 365  # beyond this everything is just "UPCOMING"
+FAR_BADGE = ("UPCOMING", "upcoming")
+
+
+def badge_for_days(days_until):
+    """(badge, css class) for an event days_until days away"""
+    if days_until == 0:
+        return "TODAY", "today"
+    if days_until == 1:
+        return "TOMORROW", "tomorrow"
+    if days_until <= 7:
+        return f"{days_until} DAYS", "this-week"
+    if days_until <= 30:
+        return f"{days_until} DAYS", "this-month"
+    if days_until <= HORIZON_DAYS:
+        weeks_until = days_until // 7
+        return ("1 WEEK" if weeks_until == 1 else f"{weeks_until} WEEKS"), "upcoming"
+    return FAR_BADGE
+
+
+BADGES_BY_DAYS = tuple(badge_for_days(days) for days in range(HORIZON_DAYS + 1))
+
+
+@lru_cache(maxsize=2)
+def badges_by_date(today):
+    """Map each date from today to the horizon onto its badge"""
+    return {today + timedelta(days=days): badge for days, badge in enumerate(BADGES_BY_DAYS)}
+
+
+def event_local_date(event_date):
+    """Calendar date of an event in the site's timezone"""
+    if isinstance(event_date, datetime):
+        if event_date.tzinfo is not None:
+            event_date = event_date.astimezone(LOCAL_TZ)
+        return event_date.date()
+    return event_date
+
+
+def add_date_badges(events, today=None):
+    """Add date_badge and date_class to each event dict, in place"""
+    today = today or local_today()
+    table = badges_by_date(today)
+    for event in events:
+        event_date = event_local_date(event['datetime_obj'])
+        badge = table.get(event_date)
+        if badge is None:
+            # Past events keep the old arithmetic ("-1 DAYS"); far future is "UPCOMING"
+            badge = badge_for_days((event_date - today).days)
+        event['date_badge'], event['date_class'] = badge
+    return events
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Benchmark dateparse against the per-call regex parsers it replaced.
+
+Usage:
+    python benchmarks/bench_dateparse.py [--strings N] [--repeat R]
+
+Reports the per-string cost of the legacy parse_event_date() and
+normalize_date_for_comparison() (copied below from app_old.py as they were),
+dateparse.parse_event_date() with a cold and a warm LRU cache, and
+dateparse.parse_many() on the whole batch.
+"""
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dateparse  # noqa: E402
+
+SAMPLES = [
+    'Fri, 28 Nov at 21:00',
+    'Fri, 19 Dec at 20:00 GMT',
+    'Sun, 21 Dec at 16:00',
+    'Tomorrow at 19:00',
+    'September 10, 2025',
+    'August 25, 2025',
+    'Friday 28 November 2025 from 21:00-23:00',
+    'Sat, Nov 29 at 8:00 PM GMT',
+    'Date TBD',
+]
+
+
+# --- Legacy implementations (app_old.py before dateparse) -------------------
+
+def legacy_normalize_date_for_comparison(date_str):
+    """Normalize date strings for duplicate comparison by extracting day, month, year, hour, minute"""
+    try:
+        # Handle "Fri, 28 Nov at 21:00" format
+        date_match = re.search(r'(\d{1,2})\s*(\w{3})\s*at\s*(\d{1,2}):(\d{2})', date_str)
+        if date_match:
+            day = int(date_match.group(1))
+            month_str = date_match.group(2)
+            hour = int(date_match.group(3))
+            minute = int(date_match.group(4))
+
+            # Map month abbreviations
+            months = {
+                'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+                'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+            }
+
+            month = months.get(month_str, 1)
+            year = datetime.now().year
+
+            # If the date seems to be in the past, assume it's next year
+            event_date = datetime(year, month, day, hour, minute)
+            if event_date < datetime.now() - timedelta(days=90):  # More than 3 months ago
+                year += 1
+
+            return f"{year}-{month:02d}-{day:02d}-{hour:02d}-{minute:02d}"
+
+        # Handle "Friday 28 November 2025 from 21:00-23:00" format
+        date_match = re.search(r'(\d{1,2})\s+(\w+)\s+(\d{4})', date_str)
+        if date_match:
+            day = int(date_match.group(1))
+            month_str = date_match.group(2)
+            year = int(date_match.group(3))
+
+            months = {
+                'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
+                'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12
+            }
+
+            month = months.get(month_str, 1)
+            return f"{year}-{month:02d}-{day:02d}"
+
+        # Handle "Tomorrow at X:XX" format
+        if "Tomorrow" in date_str:
+            tomorrow = datetime.now() + timedelta(days=1)
+            time_match = re.search(r'at (\d{1,2}):(\d{2})', date_str)
+            if time_match:
+                hour = int(time_match.group(1))
+                minute = int(time_match.group(2))
+                return f"{tomorrow.year}-{tomorrow.month:02d}-{tomorrow.day:02d}-{hour:02d}-{minute:02d}"
+            return f"{tomorrow.year}-{tomorrow.month:02d}-{tomorrow.day:02d}-19-00"
+
+        return date_str  # Fallback to original string
+
+    except Exception:
+        return date_str
+
+def legacy_parse_event_date(date_str):
+    """Parse Facebook date format and return a datetime object"""
+    try:
+        # Handle "Tomorrow at X:XX" format
+        if "Tomorrow" in date_str:
+            tomorrow = datetime.now() + timedelta(days=1)
+            time_match = re.search(r'at (\d{1,2}):(\d{2})', date_str)
+            if time_match:
+                hour = int(time_match.group(1))
+                minute = int(time_match.group(2))
+                return tomorrow.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            return tomorrow.replace(hour=19, minute=0, second=0, microsecond=0)
+
+        # Handle "Fri, 28 Nov at 21:00" format (no year)
+        date_match = re.search(r'(\w{3}),?\s*(\d{1,2})\s*(\w{3})\s*at\s*(\d{1,2}):(\d{2})', date_str)
+        if date_match:
+            day = int(date_match.group(2))
+            month_str = date_match.group(3)
+            hour = int(date_match.group(4))
+            minute = int(date_match.group(5))
+
+            # Map month abbreviations
+            months = {
+                'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+                'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+            }
+
+            month = months.get(month_str, 1)
+            year = datetime.now().year
+
+            # Create the event date for this year
+            event_date = datetime(year, month, day, hour, minute)
+
+            # If the date is more than 3 months in the past, assume it's next year
+            # If it's within 3 months (past or future), keep it as this year
+            three_months_ago = datetime.now() - timedelta(days=90)
+            if event_date < three_months_ago:
+                event_date = datetime(year + 1, month, day, hour, minute)
+
+            return event_date
+
+        # Handle "September 10, 2025" format (with year)
+        date_with_year_match = re.search(r'(\w+)\s+(\d{1,2}),?\s+(\d{4})', date_str)
+        if date_with_year_match:
+            month_str = date_with_year_match.group(1)
+            day = int(date_with_year_match.group(2))
+            year = int(date_with_year_match.group(3))
+
+            months = {
+                'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
+                'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12,
+                'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+                'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+            }
+
+            month = months.get(month_str, 1)
+            return datetime(year, month, day, 19, 0)  # Default to 19:00 if no time
+
+        # Handle other date formats
+        try:
+            return datetime.strptime(date_str, "%B %d, %Y")
+        except:
+            pass
+
+        # Default fallback
+        return datetime.now() + timedelta(days=30)
+    except Exception:
+        return datetime.now() + timedelta(days=30)
+
+
+# --- Benchmark ---------------------------------------------------------------
+
+def make_corpus(count):
+    """Realistic mix: mostly repeats of a few dozen distinct strings, like a scrape"""
+    rng = random.Random(42)
+    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    distinct = list(SAMPLES)
+    for _ in range(60):
+        distinct.append(f"{rng.choice(days)}, {rng.randint(1, 28)} {rng.choice(months)} "
+                        f"at {rng.randint(18, 22)}:{rng.choice(['00', '30'])}")
+    return [rng.choice(distinct) for _ in range(count)]
+
+
+def per_string_us(func, corpus, repeat, setup=None):
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func(corpus)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(corpus) * 1e6
+
+
+def main(argv):
+    count = 10000
+    repeat = 5
+    if '--strings' in argv:
+        count = int(argv[argv.index('--strings') + 1])
+    if '--repeat' in argv:
+        repeat = int(argv[argv.index('--repeat') + 1])
+
+    corpus = make_corpus(count)
+    clear = dateparse._parse_cached.cache_clear
+
+    def cold_unique(strings):
+        # Distinct strings only, cache cleared: raw regex cost without memoisation
+        for value in strings:
+            dateparse.parse_event_date(value)
+
+    unique = list(dict.fromkeys(corpus))
+
+    results = [
+        ('legacy parse_event_date', per_string_us(lambda s: [legacy_parse_event_date(v) for v in s], corpus, repeat)),
+        ('legacy normalize_date_for_comparison', per_string_us(lambda s: [legacy_normalize_date_for_comparison(v) for v in s], corpus, repeat)),
+        ('dateparse, distinct strings, cold cache', per_string_us(cold_unique, unique, repeat, setup=clear)),
+        ('dateparse.parse_event_date, warm cache', per_string_us(lambda s: [dateparse.parse_event_date(v) for v in s], corpus, repeat)),
+        ('dateparse.parse_many (batch)', per_string_us(dateparse.parse_many, corpus, repeat)),
+    ]
+
+    print(f"{len(corpus)} strings ({len(unique)} distinct), best of {repeat}")
+    baseline = results[0][1]
+    for name, cost in results:
+        print(f"  {name:42} {cost:8.2f} us/string  {baseline / cost:6.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark the follower-count extractors on the saved page fixtures.
+
+Usage:
+    python benchmarks/bench_followers_extract.py [--size-kb 2048] [--repeat 5]
+
+Each fixture in benchmarks/fixtures/followers/ is padded to about --size-kb
+with page-like markup where its <!--PADDING--> marker is (before the count,
+as on the real pages), then every extractor for its platform is run on it
+alone, followed by the full chain. The report shows the median time, the peak
+memory allocated (tracemalloc) and whether the extractor found the expected
+count (expected.json); "-" means it does not apply to that page. It exits
+non-zero if the chain gets any fixture wrong. tracemalloc only sees Python
+allocations, so lxml's tree (built in C) is not in its peak.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from follower_extract import extract_follower_count, extractors  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'followers')
+
+FILLER = (b'<div class="x9f619 x1n2onr6 x1ja2u2z"><div class="x78zum5 xdt5ytf" data-pagelet="FeedUnit_%d">'
+          b'<span class="x193iq5w xeuugli" dir="auto">Live music this weekend, come down!</span>'
+          b'<a class="x1i10hfl xjbqb8w" href="https://www.facebook.com/photo/?fbid=%d" role="link">'
+          b'<img alt="" src="https://scontent.example.com/v/t39/%d_n.jpg" height="300" width="400"></a>'
+          b'<script type="application/json">{"__bbox":{"id":%d,"likes":17}}</script></div></div>\n')
+
+
+def padded(html, size_kb):
+    padding = []
+    total, i = 0, 0
+    while total < size_kb * 1024:
+        block = FILLER % (i, i, i, i)
+        padding.append(block)
+        total += len(block)
+        i += 1
+    return html.replace(b'<!--PADDING-->', b''.join(padding))
+
+
+def measure(func, html, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(html)
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    func(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, statistics.median(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-kb', type=int, default=2048)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES, 'expected.json')) as f:
+        expected = json.load(f)
+
+    failures = 0
+    print(f"{'fixture':40} {'extractor':10} {'ms':>9} {'peak KB':>9}  result")
+    for name, (platform, count) in sorted(expected.items()):
+        with open(os.path.join(FIXTURES, name), 'rb') as f:
+            html = padded(f.read(), args.size_kb)
+        label = f"{name} ({len(html) // 1024} KB)"
+        for extractor, func in extractors(platform):
+            result, seconds, peak = measure(func, html, args.repeat)
+            outcome = 'ok' if result == count else '-' if result is None else f'WRONG ({result})'
+            print(f"{label:40} {extractor:10} {seconds * 1000:9.2f} {peak / 1024:9.0f}  {outcome}")
+            label = ''
+        (result, used), seconds, peak = measure(lambda page: extract_follower_count(platform, page),
+                                                html, args.repeat)
+        ok = result == count
+        failures += not ok
+        print(f"{'':40} {'chain':10} {seconds * 1000:9.2f} {peak / 1024:9.0f}  "
+              f"{'ok' if ok else f'WRONG ({result})'} via {used}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark the line scanner (linescan.py) against the loops it replaced.
+
+Usage:
+    python benchmarks/bench_linescan.py [--size-kb 2048] [--repeat 5]
+
+The events fixtures in benchmarks/fixtures/events/ are padded to about
+--size-kb at their <!--PADDING--> marker with feed-like markup. The padding
+text mentions pubs, bars and dates but no gigs, so every line still goes
+through the matchers. Each stage is timed both ways and reported with its
+median time and peak Python memory (tracemalloc):
+
+    requests page   text: BeautifulSoup get_text()  vs linescan.html_text()
+                    scan: per-line pattern loops     vs scan_title_first()
+    events list     scan: re.match chain per line    vs scan_date_first()
+
+The reference implementations below are the code scraper.py used before
+linescan.py. The run exits non-zero if the two find different events.
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from capture import SoupPage  # noqa: E402
+from linescan import html_text, scan_date_first, scan_title_first  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'events')
+
+FILLER = ('<div class="x1yztbdb" data-pagelet="FeedUnit_{i}">\n<span dir="auto">Great crowd at the pub '
+          'last night, back at the bar on the 14th</span>\n<span>Posted 3 Nov 2025</span>\n'
+          '<a role="link" href="https://www.facebook.com/photo/?fbid={i}">See more</a>\n'
+          '<span>Venue news: brewery tap open Fri, 21 Nov, tickets 5 < 10 quid</span>\n'
+          '<script>{{"__bbox":{{"id":{i}}}}}</script></div>\n')
+
+
+def padded(html, size_kb):
+    blocks, total, i = [], 0, 0
+    while total < size_kb * 1024:
+        block = FILLER.format(i=i)
+        blocks.append(block)
+        total += len(block)
+        i += 1
+    return html.replace('<!--PADDING-->', ''.join(blocks))
+
+
+def reference_text(html):
+    return BeautifulSoup(html, 'html.parser').get_text()
+
+
+def reference_title_first(page_text):
+    events = []
+    current_event = {}
+    for line in page_text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if 'BEARD @' in line and len(line) < 100:
+            if current_event:
+                events.append(current_event)
+            current_event = {'title': line}
+        elif current_event and not current_event.get('date'):
+            date_patterns = [
+                r'\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+at\s+\d{1,2}:\d{2}',
+                r'\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)',
+                r'Tomorrow at \d{1,2}:\d{2}',
+                r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}',
+                r'\b\d{4}-\d{2}-\d{2}',
+            ]
+            for pattern in date_patterns:
+                match = re.search(pattern, line, re.IGNORECASE)
+                if match:
+                    current_event['date'] = match.group()
+                    break
+        elif current_event and not current_event.get('location'):
+            if any(loc in line.lower() for loc in ['southsea', 'eastleigh', 'portsmouth', 'brew', 'pub', 'bar', 'venue']):
+                if len(line) < 100:
+                    current_event['location'] = line
+    if current_event:
+        events.append(current_event)
+    return [e for e in events if e.get('title') and e.get('date')]
+
+
+def reference_date_first(page_text, limit=6):
+    lines = [line.strip() for line in page_text.split('\n') if line.strip()]
+    events = []
+    i = 0
+    while i < len(lines) and len(events) < limit:
+        line = lines[i]
+        date_pattern1 = r'(Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+(\d{1,2})\s+at\s+(\d{1,2}:\d{2})\s+(AM|PM)\s+(GMT|BST)'
+        date_pattern2 = r'(Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+(\d{1,2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+at\s+(\d{1,2}:\d{2})\s+(GMT|BST)'
+        date_pattern3 = r'(Today|Tomorrow)\s+at\s+(\d{1,2}:\d{2})'
+        date_pattern4 = r'Sun,\s+(\d{1,2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+at\s+(\d{1,2}:\d{2})'
+        date_match = (re.match(date_pattern1, line) or re.match(date_pattern2, line) or
+                      re.match(date_pattern3, line) or re.match(date_pattern4, line))
+        if date_match and i + 2 < len(lines):
+            event_date, event_title, event_location = line, lines[i + 1], lines[i + 2]
+            if ('beard' in event_title.lower() or '@' in event_title) and not any(
+                    e['title'] == event_title and e['date'] == event_date for e in events):
+                events.append({'date': event_date, 'title': event_title, 'location': event_location})
+            i += 3
+        else:
+            i += 1
+    return events
+
+
+def measure(func, arg, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(arg)
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    func(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, statistics.median(times), peak
+
+
+def keys(events):
+    return [(e['title'], e['date'], e.get('location')) for e in events]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-kb', type=int, default=2048)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES, 'requests_page.html')) as f:
+        requests_html = padded(f.read(), args.size_kb)
+    with open(os.path.join(FIXTURES, 'list_page.html')) as f:
+        list_text = SoupPage(padded(f.read(), args.size_kb)).text
+
+    stages = [
+        ('requests page text', reference_text, lambda html: html_text(html), requests_html, None),
+        ('requests page scan', reference_title_first,
+         lambda text: scan_title_first(text.split('\n')), reference_text(requests_html), keys),
+        ('events list scan', reference_date_first,
+         lambda text: scan_date_first(text.split('\n'), limit=6), list_text, keys),
+    ]
+    failures = 0
+    print(f"{'stage':20} {'KB':>6} {'implementation':15} {'ms':>9} {'peak KB':>9}  result")
+    for name, reference, new, arg, compare in stages:
+        outputs = []
+        for label, func in (('reference', reference), ('linescan', new)):
+            result, seconds, peak = measure(func, arg, args.repeat)
+            outputs.append(result)
+            summary = f'{len(result)} events' if compare else f'{len(result) // 1024} KB text'
+            print(f"{name if label == 'reference' else '':20} {len(arg) // 1024 if label == 'reference' else '':>6} "
+                  f"{label:15} {seconds * 1000:9.2f} {peak / 1024:9.0f}  {summary}")
+        if compare:
+            same = compare(outputs[0]) == compare(outputs[1])
+        else:
+            same = outputs[0].split() == outputs[1].split()
+        failures += not same
+        if not same:
+            print(f"{'':20} {'':>6} MISMATCH between reference and linescan")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline replay (capture.py) over a synthetic capture store.
+
+Usage:
+    python benchmarks/bench_replay.py [--captures 2000] [--size-kb 64] [--workers 8] [--keep DIR]
+
+Writes --captures pages built from the fixtures in benchmarks/fixtures/events/
+(a third each of requests_list, selenium_list and selenium_event, with
+distinct venues and event ids, padded to about --size-kb with page-like
+markup at <!--PADDING-->) into a temporary capture directory through
+capture.save_capture. It then replays them in one process and in --workers
+processes and prints both reports. It exits non-zero if the two runs extract
+different results or any page fails. --keep writes the store to DIR and
+keeps it, for trying `python capture.py replay --dir DIR` by hand.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capture  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'events')
+PAGES = [
+    ('requests_list', 'requests_page.html', 'https://www.facebook.com/bearduk/events'),
+    ('selenium_list', 'list_page.html', 'https://www.facebook.com/bearduk/events'),
+    ('selenium_event', 'event_page.html', 'https://www.facebook.com/events/{event_id}/'),
+]
+
+FILLER = ('<div class="x9f619 x1n2onr6" data-pagelet="FeedUnit_{i}"><div class="x78zum5 xdt5ytf">'
+          '<span dir="auto">Cracking night at the pub, thanks to everyone who came down #{i}</span>'
+          '<a role="link" href="https://www.facebook.com/photo/?fbid={i}">'
+          '<img alt="" src="https://scontent.example.com/v/t39/{i}_n.jpg"></a>'
+          '<script type="application/json">{{"__bbox":{{"id":{i},"likes":17}}}}</script></div></div>\n')
+
+
+def padding(size_kb):
+    blocks, total, i = [], 0, 0
+    while total < size_kb * 1024:
+        block = FILLER.format(i=i)
+        blocks.append(block)
+        total += len(block)
+        i += 1
+    return ''.join(blocks)
+
+
+def build_store(capture_dir, count, size_kb):
+    templates = {}
+    for kind, name, url in PAGES:
+        with open(os.path.join(FIXTURES, name)) as f:
+            templates[kind] = f.read().replace('<!--PADDING-->', padding(size_kb))
+    for n in range(count):
+        kind, _, url = PAGES[n % len(PAGES)]
+        event_id = 1012345678901234 + n
+        html = (templates[kind].replace('The Vaults', f'The Vaults {n}')
+                .replace('1012345678901234', str(event_id)))
+        text = capture.SoupPage(html).text if kind == 'selenium_list' else None
+        capture.save_capture(kind, url.format(event_id=event_id), html=html, text=text,
+                             capture_dir=capture_dir, title=f'BEARD @ The Vaults {n} | Facebook'
+                             if kind == 'selenium_event' else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--captures', type=int, default=2000)
+    parser.add_argument('--size-kb', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--keep', help='write the capture store here and keep it')
+    args = parser.parse_args()
+
+    capture_dir = args.keep or tempfile.mkdtemp(prefix='beard-captures-')
+    try:
+        started = time.perf_counter()
+        build_store(capture_dir, args.captures, args.size_kb)
+        paths = capture.capture_paths(capture_dir)
+        size = sum(os.path.getsize(path) for path in paths)
+        print(f"Wrote {len(paths)} captures ({size / 1024 / 1024:.1f} MB compressed) "
+              f"in {time.perf_counter() - started:.1f}s\n")
+
+        runs = {}
+        for workers in dict.fromkeys((1, args.workers)):
+            started = time.perf_counter()
+            runs[workers] = capture.replay(paths, workers)
+            capture.report(runs[workers], time.perf_counter() - started, workers)
+            print()
+
+        results = [{r['path']: r['result'] for r in run} for run in runs.values()]
+        errors = sum(1 for r in runs[args.workers] if r['error'])
+        if any(result != results[0] for result in results):
+            print("Sequential and parallel replay extracted different results")
+            return 1
+        return 1 if errors else 0
+    finally:
+        if not args.keep:
+            shutil.rmtree(capture_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Compare the sync gunicorn deployment with the async (ASGI) serving mode.
+
+Usage:
+    python benchmarks/compare_servers.py [--backend fake|postgres] [--latency-ms X]
+                                         [--clients C] [--requests R] [--cache]
+
+Starts each server in turn on a local port, drives it over HTTP with
+loadtest.py's client and prints latency and throughput side by side:
+
+    sync   gunicorn --workers 1 --timeout 120 (the Dockerfile's command)
+    async  uvicorn asgi:application (one process)
+
+The fake backend (default) serves benchmarks/fakedb.py rows with --latency-ms
+added to every query, standing in for a slow database round trip; postgres
+uses LOADTEST_DATABASE_URL. The page cache is disabled unless --cache is
+given, so every page view queries the database.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from loadtest import HttpClient, drive, summarize  # noqa: E402
+
+PORT = 5057
+
+
+def server_commands(backend):
+    wsgi, asgi = ('fakeserver:app', 'fakeserver:application') if backend == 'fake' else ('app:app', 'asgi:application')
+    bind = f'127.0.0.1:{PORT}'
+    return {
+        'sync': [sys.executable, '-m', 'gunicorn', '--bind', bind, '--workers', '1', '--timeout', '120', wsgi],
+        'async': [sys.executable, '-m', 'uvicorn', '--host', '127.0.0.1', '--port', str(PORT),
+                  '--no-access-log', asgi],
+    }
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def run_server(command, env, paths, args):
+    process = subprocess.Popen(command, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(PORT)
+        url = f'http://127.0.0.1:{PORT}'
+        results = {}
+        for path in paths:
+            drive(lambda: HttpClient(url), path, min(args.clients, 10), min(args.clients, 10), False)
+            results[path] = summarize(*drive(lambda: HttpClient(url), path, args.requests,
+                                             args.clients, False))
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Compare sync and async serving modes')
+    parser.add_argument('--backend', choices=('fake', 'postgres'), default='fake')
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--paths', default='/,/api/events')
+    parser.add_argument('--cache', action='store_true')
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, BENCH_DIR]),
+               EVENTS_CACHE_ENABLED='1' if args.cache else '0',
+               FAKEDB_ROWS=str(args.rows), FAKEDB_LATENCY_MS=str(args.latency_ms))
+    if args.backend == 'postgres':
+        if not os.getenv('LOADTEST_DATABASE_URL'):
+            sys.exit('--backend postgres needs LOADTEST_DATABASE_URL (a scratch database)')
+        env['DATABASE_URL'] = os.environ['LOADTEST_DATABASE_URL']
+
+    paths = [path.strip() for path in args.paths.split(',') if path.strip()]
+    results = {mode: run_server(command, env, paths, args)
+               for mode, command in server_commands(args.backend).items()}
+
+    print(f"{args.clients} clients, {args.requests} requests per path, backend {args.backend}"
+          f"{f' (+{args.latency_ms:g} ms per query)' if args.backend == 'fake' else ''}, "
+          f"cache {'on' if args.cache else 'off'}")
+    print(f"{'path':<14}{'mode':<7}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for path in paths:
+        for mode in results:
+            r = results[mode][path]
+            print(f"{path:<14}{mode:<7}{r['throughput_rps']:>9.1f}{r['p50_ms']:>10.1f}"
+                  f"{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}  {r['statuses']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,222 @@
+"""
+In-memory stand-in for the beard_events database, for benchmarks only.
+
+install(rows) replaces db.py's pool with a FakePool whose connections answer
+the simple single-table SELECTs the web app issues against beard_events and
+beard_upcoming_events (the same rows, plus date_text):
+
+    SELECT <columns | COUNT(*) | MAX(col) | MIN(col)> FROM beard_events
+    [WHERE timestamp > NOW()] [ORDER BY timestamp ASC, id ASC] [LIMIT n]
+
+beard_upcoming_state always reports the precomputed table as current.
+
+Anything else raises NotImplementedError naming the query, so a new query on
+the request path shows up instead of silently returning nothing. latency adds
+a fixed delay per execute() to stand in for a network round trip.
+AsyncFakePool serves the same rows to asgi.py in place of an asyncpg pool.
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import instrument
+from dateparse import format_event_date
+
+COLUMNS = ('id', 'created_at', 'url', 'timestamp', 'name', 'responded', 'location',
+           'venueurl', 'duration', 'imageurl', 'updated', 'venue_id')
+
+VENUES = ['The Fleece, Bristol', 'The Half Moon, Putney', 'The Bedford, Balham',
+          'Boileroom, Guildford', 'The Blues Kitchen, Camden', 'The Brook, Southampton']
+
+SELECT_RE = re.compile(r'^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<table>beard_events|beard_upcoming_events)\s*'
+                       r'(?P<upcoming>WHERE\s+timestamp\s*>\s*NOW\(\)\s*)?'
+                       r'(?:ORDER\s+BY\s+timestamp\s+ASC(?:\s*,\s*id\s+ASC)?\s*)?'
+                       r'(?:LIMIT\s+(?P<limit>\d+)\s*)?;?\s*$', re.IGNORECASE | re.DOTALL)
+AGGREGATE_RE = re.compile(r'^(COUNT|MAX|MIN)\((\*|\w+)\)$', re.IGNORECASE)
+
+
+def make_rows(count, past_fraction=0.2, now=None):
+    """Synthetic beard_events rows spread over the past few months and the next year"""
+    now = now or datetime.now(timezone.utc)
+    rows = []
+    past = int(count * past_fraction)
+    for i in range(count):
+        if i < past:
+            start = now - timedelta(days=1 + (i * 97) % 120, hours=i % 5)
+        else:
+            start = now + timedelta(days=(i * 37) % 365, hours=1 + i % 5)
+        start = start.replace(minute=0, second=0, microsecond=0)
+        venue = VENUES[i % len(VENUES)]
+        rows.append({
+            'id': i + 1,
+            'created_at': now,
+            'url': f'https://www.facebook.com/events/{1000000 + i}/',
+            'timestamp': start,
+            'name': f'BEARD live #{i + 1}',
+            'responded': (i * 7) % 120,
+            'location': venue,
+            'venueurl': f'https://example.com/venues/{i % len(VENUES)}',
+            'duration': None,
+            'imageurl': f'https://example.com/images/{i % 40}.jpg',
+            'updated': now - timedelta(minutes=i),
+            'venue_id': i % len(VENUES) + 1,
+        })
+    rows.sort(key=lambda row: (row['timestamp'], row['id']))
+    return rows
+
+
+class FakeCursor:
+    itersize = 2000
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            self.connection.pool.stats['queries'] += 1
+            if self.connection.pool.latency:
+                time.sleep(self.connection.pool.latency)
+            self._result = self.connection.pool.answer(query)
+        finally:
+            if instrument.enabled():
+                instrument.record('db.query', time.perf_counter() - started)
+
+    def fetchall(self):
+        result, self._result = self._result, []
+        return result
+
+    def __iter__(self):
+        # Named (server-side) cursors are iterated; here they are just lists
+        while self._result:
+            yield self._result.pop(0)
+
+    def fetchone(self):
+        return self._result.pop(0) if self._result else None
+
+    def close(self):
+        self._result = []
+
+
+class FakeConnection:
+    closed = False
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.autocommit = False
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    """Drop-in for db.ConnectionPool backed by a list of row dicts"""
+
+    def __init__(self, rows, latency=0.0):
+        self.rows = rows
+        # beard_upcoming_events is written ahead of time, so its dates are too
+        self.table_rows = [dict(row, date_text=format_event_date(row['timestamp'])) for row in rows]
+        self.latency = latency
+        self.pid = os.getpid()
+        self.stats = {'checkouts': 0, 'queries': 0}
+        self._lock = threading.Lock()
+
+    def getconn(self):
+        with self._lock:
+            self.stats['checkouts'] += 1
+        return FakeConnection(self)
+
+    def putconn(self, conn, close=False):
+        pass
+
+    def closeall(self):
+        pass
+
+    def metrics(self):
+        return dict(self.stats, fake=True)
+
+    def answer(self, query):
+        if re.match(r'^\s*(SELECT\s+1|SET\s|LISTEN\s|NOTIFY\s)', query, re.IGNORECASE):
+            return [(1,)]
+        if re.match(r'^\s*SELECT\s+stale\s+FROM\s+beard_upcoming_state\s*$', query, re.IGNORECASE):
+            return [(False,)]
+        match = SELECT_RE.match(query)
+        if not match:
+            raise NotImplementedError(f"fakedb cannot answer: {' '.join(query.split())}")
+
+        rows = self.table_rows if match.group('table') == 'beard_upcoming_events' else self.rows
+        if match.group('upcoming'):
+            now = datetime.now(timezone.utc)
+            rows = [row for row in rows if row['timestamp'] > now]
+        columns = [column.strip() for column in match.group('columns').split(',')]
+
+        aggregates = [AGGREGATE_RE.match(column) for column in columns]
+        if all(aggregates):
+            result = []
+            for aggregate in aggregates:
+                function, column = aggregate.group(1).upper(), aggregate.group(2)
+                if function == 'COUNT':
+                    result.append(len(rows))
+                else:
+                    values = [row[column] for row in rows if row[column] is not None]
+                    result.append((max if function == 'MAX' else min)(values) if values else None)
+            return [tuple(result)]
+
+        for column in columns:
+            if column not in COLUMNS and not (column == 'date_text' and match.group('table') != 'beard_events'):
+                raise NotImplementedError(f"fakedb has no column {column!r}")
+        if match.group('limit'):
+            rows = rows[:int(match.group('limit'))]
+        return [tuple(row[column] for column in columns) for row in rows]
+
+
+def install(rows, latency=0.0):
+    """Point db.get_connection() at an in-memory FakePool; returns the pool"""
+    import db
+
+    pool = FakePool(rows, latency=latency)
+    with db._pool_lock:
+        db._pool = pool
+    return pool
+
+
+class AsyncFakePool:
+    """asyncpg-style pool (fetch/fetchrow) over a FakePool, for asgi.py"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def _answer(self, query):
+        self.pool.stats['queries'] += 1
+        if self.pool.latency:
+            await asyncio.sleep(self.pool.latency)
+        return self.pool.answer(query)
+
+    async def fetch(self, query):
+        return await self._answer(query)
+
+    async def fetchrow(self, query):
+        rows = await self._answer(query)
+        return rows[0] if rows else None
+
+    async def close(self):
+        pass
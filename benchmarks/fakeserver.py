@@ -0,0 +1,20 @@
+"""
+WSGI and ASGI entry points backed by fakedb, for compare_servers.py.
+
+    gunicorn fakeserver:app            uvicorn fakeserver:application
+
+FAKEDB_ROWS and FAKEDB_LATENCY_MS set the table size and per-query delay.
+"""
+import os
+
+import fakedb
+
+os.environ['DATABASE_URL'] = ''
+_pool = fakedb.install(fakedb.make_rows(int(os.getenv('FAKEDB_ROWS', '200'))),
+                       latency=float(os.getenv('FAKEDB_LATENCY_MS', '0')) / 1000)
+
+from app import app  # noqa: E402
+import asgi  # noqa: E402
+
+asgi.events.pool = fakedb.AsyncFakePool(_pool)
+application = asgi.application
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Load test the web app with concurrent clients and report latency percentiles.
+
+Usage:
+    python benchmarks/loadtest.py [options]
+
+    --backend fake|postgres   in-memory beard_events (default) or the database at
+                              LOADTEST_DATABASE_URL
+    --rows N                  rows to generate (fake) or seed (postgres, with --seed)
+    --seed                    postgres only: TRUNCATE beard_events and insert N rows
+    --latency-ms X            fake only: delay added to every query
+    --clients C               concurrent clients (default 8)
+    --requests R              measured requests per path (default 500)
+    --warmup W                unmeasured requests per path first (default 20)
+    --paths P1,P2             default: /,/debug_status,/api/events
+    --no-cache                run with EVENTS_CACHE_ENABLED=0
+    --revalidate              send If-None-Match with the ETag of the previous response
+    --url http://host:port    drive a running server over HTTP instead of in-process
+    --save NAME               write results to benchmarks/baselines/NAME.json
+    --compare NAME            compare with a saved baseline; exit 1 if a p95 regressed
+    --tolerance F             allowed p95 regression for --compare (default 0.25)
+
+In-process runs use Flask's test client with instrumentation enabled, so the
+report also shows queries per request and time per stage (db.query,
+events.map, badges, render, api.serialize). Over HTTP only latency and
+throughput are measured. The postgres backend never reads DATABASE_URL, so a
+load test cannot seed the production database by accident.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_PATHS = '/,/debug_status,/api/events'
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Load test the BEARD web app')
+    parser.add_argument('--backend', choices=('fake', 'postgres'), default='fake')
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--seed', action='store_true')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--paths', default=DEFAULT_PATHS)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--revalidate', action='store_true')
+    parser.add_argument('--url')
+    parser.add_argument('--save')
+    parser.add_argument('--compare')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    return parser.parse_args(argv)
+
+
+def seed_postgres(dsn, rows):
+    """Replace beard_events in a scratch database with generated rows"""
+    import psycopg2
+    from psycopg2.extras import execute_values
+
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn, conn.cursor() as c:
+            with open(os.path.join(ROOT, 'supabase_schema.sql')) as f:
+                c.execute(f.read())
+            c.execute('TRUNCATE beard_events RESTART IDENTITY')
+            execute_values(c, '''INSERT INTO beard_events
+                                 (url, timestamp, name, responded, location, venueurl, imageurl, updated)
+                                 VALUES %s''',
+                           [(r['url'], r['timestamp'], r['name'], r['responded'], r['location'],
+                             r['venueurl'], r['imageurl'], r['updated']) for r in rows],
+                           page_size=500)
+            c.execute('ANALYZE beard_events')
+    finally:
+        conn.close()
+
+
+def setup_backend(args):
+    """Configure the environment before app is imported; returns the FakePool or None"""
+    import fakedb
+    import instrument
+
+    instrument.enable()
+    os.environ['EVENTS_CACHE_ENABLED'] = '0' if args.no_cache else '1'
+    if args.backend == 'fake':
+        # An empty DATABASE_URL keeps .env from supplying one and disables the LISTEN thread
+        os.environ['DATABASE_URL'] = ''
+        return fakedb.install(fakedb.make_rows(args.rows), latency=args.latency_ms / 1000)
+
+    dsn = os.getenv('LOADTEST_DATABASE_URL')
+    if not dsn:
+        sys.exit('--backend postgres needs LOADTEST_DATABASE_URL (a scratch database)')
+    os.environ['DATABASE_URL'] = dsn
+    if args.seed:
+        seed_postgres(dsn, fakedb.make_rows(args.rows))
+    return None
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        response = self.client.get(path, headers=headers)
+        response.get_data()
+        return response.status_code, response.headers.get('ETag')
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def get(self, path, etag=None):
+        request = urllib.request.Request(self.base_url + path)
+        if etag:
+            request.add_header('If-None-Match', etag)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status, response.headers.get('ETag')
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('ETag')
+
+
+def drive(make_client, path, total, clients, revalidate):
+    """Send total GETs to path from clients threads; returns (latencies, statuses, seconds)"""
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    remaining = [total]
+
+    def worker():
+        client = make_client()
+        etag = None
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            status, new_etag = client.get(path, etag if revalidate else None)
+            elapsed = time.perf_counter() - started
+            etag = new_etag or etag
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, time.perf_counter() - started
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies, statuses, seconds, queries=None, stages=None):
+    ordered = sorted(latencies)
+    ms = 1000
+    result = {
+        'requests': len(ordered),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput_rps': round(len(ordered) / seconds, 1) if seconds else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * ms, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * ms, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * ms, 3),
+        'max_ms': round(ordered[-1] * ms, 3) if ordered else 0.0,
+    }
+    if queries is not None:
+        result['queries_per_request'] = round(queries / max(len(ordered), 1), 3)
+    if stages is not None:
+        result['stages'] = {
+            name: {
+                'per_request': round(stat['count'] / max(len(ordered), 1), 3),
+                'mean_ms': round(stat['total'] / stat['count'] * ms, 3),
+                'max_ms': round(stat['max'] * ms, 3),
+            }
+            for name, stat in sorted(stages.items())
+        }
+    return result
+
+
+def run(args):
+    paths = [path.strip() for path in args.paths.split(',') if path.strip()]
+    results = {}
+
+    if args.url:
+        def make_client():
+            return HttpClient(args.url)
+        instrument = None
+    else:
+        setup_backend(args)
+        import instrument
+        from app import app
+
+        def make_client():
+            return InProcessClient(app)
+
+    for path in paths:
+        if args.warmup:
+            drive(make_client, path, args.warmup, min(args.clients, args.warmup), args.revalidate)
+        queries = None
+        if instrument is not None:
+            instrument.reset()
+        latencies, statuses, seconds = drive(make_client, path, args.requests, args.clients,
+                                             args.revalidate)
+        stages = None
+        if instrument is not None:
+            stages = instrument.snapshot()
+            queries = stages.get('db.query', {}).get('count', 0)
+        results[path] = summarize(latencies, statuses, seconds, queries, stages)
+    return results
+
+
+def print_report(results):
+    print(f"{'path':<16}{'reqs':>7}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'max ms':>9}{'q/req':>7}  statuses")
+    for path, r in results.items():
+        queries = r.get('queries_per_request')
+        print(f"{path:<16}{r['requests']:>7}{r['throughput_rps']:>9.1f}{r['p50_ms']:>9.2f}"
+              f"{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['max_ms']:>9.2f}"
+              f"{'-' if queries is None else f'{queries:.2f}':>7}  {r['statuses']}")
+    for path, r in results.items():
+        if not r.get('stages'):
+            continue
+        print(f"\nstages for {path}")
+        for name, stage in r['stages'].items():
+            print(f"  {name:<18}{stage['per_request']:>8.2f}/req  mean {stage['mean_ms']:>8.3f} ms"
+                  f"  max {stage['max_ms']:>8.3f} ms")
+
+
+def config_of(args):
+    return {
+        'backend': 'http' if args.url else args.backend,
+        'rows': args.rows,
+        'latency_ms': args.latency_ms,
+        'clients': args.clients,
+        'requests': args.requests,
+        'cache': not args.no_cache,
+        'revalidate': args.revalidate,
+    }
+
+
+def save_baseline(name, args, results):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, f'{name}.json')
+    baseline = {
+        'config': config_of(args),
+        'python': platform.python_version(),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"\nSaved baseline to {os.path.relpath(path, ROOT)}")
+
+
+def compare_baseline(name, args, results):
+    """Print p50/p95 against a saved baseline; returns False if a p95 regressed"""
+    with open(os.path.join(BASELINE_DIR, f'{name}.json')) as f:
+        baseline = json.load(f)
+    if baseline['config'] != config_of(args):
+        print(f"\nWarning: baseline {name} was recorded with {baseline['config']}")
+
+    ok = True
+    print(f"\ncompared with baseline {name}")
+    for path, r in results.items():
+        old = baseline['results'].get(path)
+        if old is None:
+            print(f"  {path:<16}not in baseline")
+            continue
+        change = (r['p95_ms'] - old['p95_ms']) / old['p95_ms'] if old['p95_ms'] else 0.0
+        regressed = change > args.tolerance
+        ok = ok and not regressed
+        print(f"  {path:<16}p50 {old['p50_ms']:.2f} -> {r['p50_ms']:.2f} ms   "
+              f"p95 {old['p95_ms']:.2f} -> {r['p95_ms']:.2f} ms ({change:+.0%})"
+              f"{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main(argv):
+    args = parse_args(argv)
+    results = run(args)
+    print_report(results)
+    if args.save:
+        save_baseline(args.save, args, results)
+    if args.compare:
+        return 0 if compare_baseline(args.compare, args, results) else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Facebook Graph API and the Facebook / Instagram pages
+that update_followers.py fetches, plus a benchmark of the follower fetcher.
+
+Usage:
+    python benchmarks/stub_social.py --serve [--port 8765] [--latency-ms 200] [--fail-rate 0.1]
+    python benchmarks/stub_social.py [--accounts 30] [--latency-ms 200] [--workers 8]
+
+--serve only runs the stub; point the fetcher at it with
+
+    FACEBOOK_GRAPH_URL=http://127.0.0.1:8765/graph/v18.0
+    FACEBOOK_WEB_URL=http://127.0.0.1:8765/facebook
+    INSTAGRAM_WEB_URL=http://127.0.0.1:8765/instagram
+
+Without --serve it starts the stub in-process and times fetching --accounts
+accounts one at a time and then concurrently, reporting how many TCP
+connections each run opened (keep-alive sessions reuse them). Follower
+counts are derived from the account name, so every run returns the same
+numbers. --fail-rate answers that fraction of requests with a 503 to
+exercise the retries.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def follower_count(name):
+    return int(hashlib.sha1(name.encode('utf-8')).hexdigest()[:6], 16) % 50000
+
+
+FACEBOOK_PAGE = '''<html><body><div>
+<a href="https://www.facebook.com/{name}/followers/"><strong>{count:,}</strong> followers</a>
+</div></body></html>'''
+INSTAGRAM_PAGE = '''<html><body><ul>
+<li><span class="html-span" title="{count}">{count:,}</span> followers</li>
+</ul></body></html>'''
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.stats['connections'] += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        with self.server.stats_lock:
+            self.server.stats['requests'] += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.fail_rate and random.random() < self.server.fail_rate:
+            with self.server.stats_lock:
+                self.server.stats['failures'] += 1
+            self.send_body(503, 'try again', 'text/plain')
+            return
+
+        parts = [part for part in urlsplit(self.path).path.split('/') if part]
+        if len(parts) == 3 and parts[0] == 'graph':
+            body = json.dumps({'id': parts[2], 'followers_count': follower_count(parts[2])})
+            self.send_body(200, body, 'application/json')
+        elif len(parts) == 2 and parts[0] == 'facebook':
+            self.send_body(200, FACEBOOK_PAGE.format(name=parts[1], count=follower_count(parts[1])), 'text/html')
+        elif len(parts) == 2 and parts[0] == 'instagram':
+            self.send_body(200, INSTAGRAM_PAGE.format(count=follower_count(parts[1])), 'text/html')
+        else:
+            self.send_body(404, 'not found', 'text/plain')
+
+
+def start_stub(port=0, latency=0.0, fail_rate=0.0):
+    """Run the stub in a background thread; returns the server (server_port, stats)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.fail_rate = fail_rate
+    server.stats = {'requests': 0, 'connections': 0, 'failures': 0}
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def point_fetcher_at(port):
+    """Set the base URL environment variables for a stub on port"""
+    base = f'http://127.0.0.1:{port}'
+    os.environ['FACEBOOK_GRAPH_URL'] = f'{base}/graph/v18.0'
+    os.environ['FACEBOOK_WEB_URL'] = f'{base}/facebook'
+    os.environ['INSTAGRAM_WEB_URL'] = f'{base}/instagram'
+
+
+def run(args):
+    server = start_stub(latency=args.latency_ms / 1000, fail_rate=args.fail_rate)
+    point_fetcher_at(server.server_port)
+    os.environ.setdefault('FOLLOWER_RETRY_BACKOFF', '0.05')
+    import update_followers  # reads the base URLs at import
+
+    update_followers.rate_limiter.interval = args.host_interval_ms / 1000
+    accounts = [('facebook' if i % 2 else 'instagram', f'venue{i}') for i in range(args.accounts)]
+
+    print(f"{args.accounts} accounts, {args.latency_ms:.0f} ms per response, "
+          f"fail rate {args.fail_rate:.0%}, host interval {args.host_interval_ms:.0f} ms")
+    print(f"{'mode':12} {'seconds':>8} {'ok':>5} {'requests':>9} {'connections':>12}")
+    for label, workers in (('sequential', 1), (f'{args.workers} workers', args.workers)):
+        # Fresh sessions per run, so connection counts are comparable
+        update_followers._local = threading.local()
+        update_followers.rate_limiter._next_slot.clear()
+        before = dict(server.stats)
+        started = time.perf_counter()
+        samples = update_followers.fetch_follower_counts(accounts, workers=workers)
+        elapsed = time.perf_counter() - started
+        ok = sum(1 for _, username, count in samples if count == follower_count(username))
+        print(f"{label:12} {elapsed:8.2f} {ok:5d} {server.stats['requests'] - before['requests']:9d} "
+              f"{server.stats['connections'] - before['connections']:12d}")
+    server.shutdown()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--serve', action='store_true', help='only run the stub server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--accounts', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--host-interval-ms', type=float, default=0,
+                        help='per-host spacing for the benchmark (FOLLOWER_HOST_INTERVAL is 1s)')
+    args = parser.parse_args()
+
+    if not args.serve:
+        return run(args)
+    server = start_stub(args.port, args.latency_ms / 1000, args.fail_rate)
+    print(f"Stub social server on http://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Warm headless Chrome instances for the Selenium scraper.
+
+Starting Chrome takes seconds and a few hundred MB, and the scraper used to
+start one per run with a fixed --remote-debugging-port=9222 and
+--single-process, so two runs in the same container collided. BrowserPool
+keeps up to SCRAPER_BROWSERS browsers alive and hands them out one caller at
+a time:
+
+- every browser gets its own free debugging port and profile directory, so
+  any number of pools and runs can share a host
+- acquire() blocks until a browser is free (or SCRAPER_BROWSER_WAIT seconds
+  pass), which caps how many pages load at once and so caps memory
+- on release the browser drops back to about:blank and closes extra tabs;
+  one that has served SCRAPER_BROWSER_MAX_USES checkouts is restarted (Chrome's
+  memory creeps up page by page) and one that failed a check is discarded
+- browsers unused for SCRAPER_BROWSER_IDLE seconds are quit in the
+  background, so the ingest worker does not hold Chrome between daily runs
+
+get_pool() returns the process-wide pool, closed at exit.
+"""
+import atexit
+import os
+import platform
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+SCRAPER_BROWSERS = int(os.getenv('SCRAPER_BROWSERS', '2'))
+SCRAPER_BROWSER_WAIT = float(os.getenv('SCRAPER_BROWSER_WAIT', '120'))  # seconds to wait for a free browser
+SCRAPER_BROWSER_MAX_USES = int(os.getenv('SCRAPER_BROWSER_MAX_USES', '50'))
+SCRAPER_BROWSER_IDLE = float(os.getenv('SCRAPER_BROWSER_IDLE', '300'))  # seconds before an unused browser is quit
+SCRAPER_PAGE_TIMEOUT = float(os.getenv('SCRAPER_PAGE_TIMEOUT', '30'))  # seconds per page load
+SCRAPER_JS_HEAP_MB = int(os.getenv('SCRAPER_JS_HEAP_MB', '256'))  # V8 heap cap per renderer
+
+if platform.system() == 'Windows':
+    CHROME_BINARY = os.getenv('CHROME_BINARY', r'C:\Program Files\Google\Chrome\Application\chrome.exe')
+else:
+    CHROME_BINARY = os.getenv('CHROME_BINARY', '/usr/bin/google-chrome')
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+CHROME_ARGUMENTS = [
+    '--headless=new',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-software-rasterizer',
+    '--disable-background-timer-throttling',
+    '--disable-renderer-backgrounding',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-extensions',
+    '--disable-plugins',
+    '--blink-settings=imagesEnabled=false',
+    '--window-size=1920,1080',
+    f'--user-agent={USER_AGENT}',
+    '--disable-logging',
+    '--log-level=3',
+    '--no-first-run',
+    '--no-zygote',
+    '--disable-setuid-sandbox',
+    '--renderer-process-limit=2',
+    '--disable-blink-features=AutomationControlled',
+]
+
+
+def free_port():
+    """A TCP port nothing on this host is listening on right now"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def chrome_options(port, profile_dir):
+    options = Options()
+    for argument in CHROME_ARGUMENTS:
+        options.add_argument(argument)
+    options.add_argument(f'--js-flags=--max-old-space-size={SCRAPER_JS_HEAP_MB}')
+    options.add_argument(f'--remote-debugging-port={port}')
+    options.add_argument(f'--user-data-dir={profile_dir}')
+    options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    options.binary_location = CHROME_BINARY
+    return options
+
+
+class Browser:
+    """One pooled Chrome: its driver, debugging port and profile directory"""
+
+    def __init__(self, driver, port, profile_dir):
+        self.driver = driver
+        self.port = port
+        self.profile_dir = profile_dir
+        self.uses = 0
+        self.last_used = time.monotonic()
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"Error quitting browser on port {self.port}: {e}")
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+def start_browser():
+    """Launch a headless Chrome on a free debugging port with a throwaway profile"""
+    port = free_port()
+    profile_dir = tempfile.mkdtemp(prefix='beard-chrome-')
+    try:
+        driver = webdriver.Chrome(options=chrome_options(port, profile_dir))
+        driver.set_page_load_timeout(SCRAPER_PAGE_TIMEOUT)
+    except Exception:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        raise
+    return Browser(driver, port, profile_dir)
+
+
+class BrowserPool:
+    """At most size browsers, reused across checkouts"""
+
+    def __init__(self, size=SCRAPER_BROWSERS, max_uses=SCRAPER_BROWSER_MAX_USES,
+                 idle_timeout=SCRAPER_BROWSER_IDLE, factory=start_browser):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.idle_timeout = idle_timeout
+        self._factory = factory
+        self._cond = threading.Condition()
+        self._idle = []  # most recently released last
+        self._open = 0
+        self._closed = False
+        self._reaper = None
+        self.stats = {'started': 0, 'reused': 0, 'recycled': 0, 'discarded': 0, 'reaped': 0, 'waits': 0}
+
+    def acquire(self, timeout=SCRAPER_BROWSER_WAIT):
+        """Check out a browser, starting one if under size; raises TimeoutError when none frees up"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError('Browser pool is closed')
+                if self._idle:
+                    browser = self._idle.pop()
+                    self.stats['reused'] += 1
+                    return browser
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f'No browser free after {timeout:g}s ({self.size} in use)')
+                self.stats['waits'] += 1
+                self._cond.wait(remaining)
+
+        # Launch outside the lock so other checkouts are not held up
+        try:
+            browser = self._factory()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.stats['started'] += 1
+            self._start_reaper()
+        return browser
+
+    def release(self, browser, broken=False):
+        """Return a browser; broken, worn-out or unresettable ones are quit instead"""
+        browser.uses += 1
+        worn_out = browser.uses >= self.max_uses
+        if not (broken or worn_out or self._closed):
+            broken = not self._reset(browser)
+        keep = not (broken or worn_out or self._closed)
+
+        with self._cond:
+            if keep:
+                browser.last_used = time.monotonic()
+                self._idle.append(browser)
+            else:
+                self._open -= 1
+                if broken:
+                    self.stats['discarded'] += 1
+                elif worn_out:
+                    self.stats['recycled'] += 1
+            self._cond.notify()
+        if not keep:
+            browser.quit()
+
+    def _reset(self, browser):
+        """Close extra tabs and unload the page; False if the browser no longer answers"""
+        driver = browser.driver
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.get('about:blank')
+            return True
+        except WebDriverException as e:
+            print(f"Discarding browser on port {browser.port}: {e.__class__.__name__}")
+            return False
+
+    @contextmanager
+    def browser(self, timeout=SCRAPER_BROWSER_WAIT):
+        """with pool.browser() as driver: ... (released, or discarded if it stopped answering)"""
+        browser = self.acquire(timeout)
+        try:
+            yield browser.driver
+        finally:
+            self.release(browser)
+
+    def reap(self, now=None):
+        """Quit browsers idle longer than idle_timeout; returns how many"""
+        now = time.monotonic() if now is None else now
+        with self._cond:
+            expired = [b for b in self._idle if now - b.last_used >= self.idle_timeout]
+            self._idle = [b for b in self._idle if b not in expired]
+            self._open -= len(expired)
+            self.stats['reaped'] += len(expired)
+            self._cond.notify_all()
+        for browser in expired:
+            browser.quit()
+        return len(expired)
+
+    def _start_reaper(self):
+        if self._reaper is None and self.idle_timeout > 0:
+            self._reaper = threading.Thread(target=self._reap_forever, name='browser-pool-reaper', daemon=True)
+            self._reaper.start()
+
+    def _reap_forever(self):
+        interval = max(1.0, min(self.idle_timeout / 2, 60.0))
+        while not self._closed:
+            time.sleep(interval)
+            self.reap()
+
+    def close(self):
+        """Quit idle browsers now; browsers still checked out are quit when released"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for browser in idle:
+            browser.quit()
+
+    def status(self):
+        with self._cond:
+            return {'size': self.size, 'open': self._open, 'idle': len(self._idle), **self.stats}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide browser pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Generate responsive variants of the site's static images into static/img/.
+
+For each image in IMAGES, writes AVIF, WebP and original-format copies at
+every width in WIDTHS below the original (plus the original width), e.g.
+static/img/hero-background-480.webp, and records them in
+static/img/images.json for images.py, which emits the srcset / image-set
+markup. Run it before build_static.py so the variants are fingerprinted too:
+
+    python build_images.py && python build_static.py
+
+Needs Pillow; AVIF is skipped when Pillow was built without it.
+"""
+import json
+import os
+import shutil
+import sys
+
+from PIL import Image, features
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+OUTPUT_DIR = os.path.join(STATIC_DIR, 'img')
+MANIFEST_NAME = 'images.json'
+
+# Icons and favicons have fixed sizes and are left alone
+IMAGES = (
+    'hero-background.jpg',
+    'BEARD_logo.png',
+    'BEARD_logo_RGB_full.png',
+    'BEARD_logo_RGB_full_large.png',
+)
+WIDTHS = (320, 480, 640, 800, 1280, 1920)
+
+FORMATS = {
+    # mime type: (extension, Pillow format, save options)
+    'image/avif': ('.avif', 'AVIF', {'quality': 55, 'speed': 6}),
+    'image/webp': ('.webp', 'WEBP', {'quality': 78, 'method': 6}),
+    'image/jpeg': ('.jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'image/png': ('.png', 'PNG', {'optimize': True}),
+}
+
+
+def target_widths(width):
+    return [w for w in WIDTHS if w < width] + [width]
+
+
+def output_formats(original_mime):
+    formats = ['image/webp', original_mime]
+    if features.check('avif'):
+        formats.insert(0, 'image/avif')
+    return formats
+
+
+def build_image(name):
+    with Image.open(os.path.join(STATIC_DIR, name)) as original:
+        original.load()
+    mime = Image.MIME[original.format]
+    stem = os.path.splitext(name)[0]
+
+    sources = {}
+    for width in target_widths(original.width):
+        height = round(original.height * width / original.width)
+        resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+        for output_mime in output_formats(mime):
+            ext, pillow_format, options = FORMATS[output_mime]
+            image = resized.convert('RGB') if pillow_format == 'JPEG' else resized
+            filename = f'img/{stem}-{width}{ext}'
+            image.save(os.path.join(STATIC_DIR, filename), pillow_format, **options)
+            sources.setdefault(output_mime, []).append([filename, width])
+
+    return {'width': original.width, 'height': original.height, 'type': mime, 'sources': sources}
+
+
+def build():
+    if os.path.isdir(OUTPUT_DIR):
+        shutil.rmtree(OUTPUT_DIR)
+    os.makedirs(OUTPUT_DIR)
+
+    manifest = {name: build_image(name) for name in IMAGES}
+    with open(os.path.join(OUTPUT_DIR, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return manifest
+
+
+def main():
+    manifest = build()
+    for name, image in manifest.items():
+        original = os.path.getsize(os.path.join(STATIC_DIR, name))
+        smallest = {mime: os.path.getsize(os.path.join(STATIC_DIR, files[0][0]))
+                    for mime, files in image['sources'].items()}
+        print(f"{name:32} {original / 1024:7.1f} KB -> smallest "
+              + ', '.join(f"{mime.split('/')[1]} {size / 1024:.1f} KB" for mime, size in smallest.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Build fingerprinted, precompressed copies of static/ into static/dist/.
+
+Every file in static/ is copied to static/dist/<name>.<hash><ext>, where hash
+is the start of the SHA-256 of its content, so a deploy only changes the URLs
+of files that changed. Relative references inside CSS (url(...)) and the web
+app manifest (icons[].src) are rewritten to the hashed names before those
+files are hashed. Text assets also get .gz and (if Brotli is installed) .br
+siblings when compression actually saves bytes.
+
+static/dist/assets.json maps each original name to its hashed name; assets.py
+loads it at startup to rewrite url_for('static', ...) and to serve the files
+with immutable caching.
+
+Usage:
+    python build_static.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:  # .br variants are optional
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'assets.json'
+HASH_LENGTH = 12
+COMPRESSIBLE = {'.css', '.js', '.json', '.svg', '.ico', '.txt', '.html', '.xml', '.webmanifest'}
+MIN_SAVING = 0.1  # keep a compressed variant only if it is at least 10% smaller
+
+CSS_URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def hashed_name(name, content):
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{digest}{ext}'
+
+
+def rewrite_css(content, assets):
+    def replace(match):
+        quote, url = match.groups()
+        return f'url({quote}{assets.get(url, url)}{quote})'
+
+    return CSS_URL_RE.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+
+def rewrite_webmanifest(content, assets):
+    manifest = json.loads(content)
+    for icon in manifest.get('icons', []):
+        icon['src'] = assets.get(icon['src'], icon['src'])
+    return (json.dumps(manifest, indent=2) + '\n').encode('utf-8')
+
+
+def is_webmanifest(name, content):
+    if not name.endswith('.json'):
+        return False
+    try:
+        return 'icons' in json.loads(content)
+    except ValueError:
+        return False
+
+
+def write_compressed(path, content):
+    """Write .gz / .br siblings that are worth serving; returns the encodings written"""
+    written = []
+    variants = [('gzip', '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('br', '.br', lambda data: brotli.compress(data, quality=11)))
+    for encoding, suffix, compress in variants:
+        compressed = compress(content)
+        if len(compressed) <= len(content) * (1 - MIN_SAVING):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            written.append(encoding)
+    return written
+
+
+def source_files():
+    for root, dirs, files in os.walk(STATIC_DIR):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != DIST_DIR]
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            yield os.path.relpath(path, STATIC_DIR).replace(os.sep, '/'), path
+
+
+def build():
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+
+    sources = {}
+    for name, path in source_files():
+        with open(path, 'rb') as f:
+            sources[name] = f.read()
+
+    # Files that reference other assets are hashed last, after rewriting
+    referencing = {name for name, content in sources.items()
+                   if name.endswith('.css') or is_webmanifest(name, content)}
+    assets = {}
+    encodings = {}
+    for name in sorted(sources, key=lambda name: (name in referencing, name)):
+        content = sources[name]
+        if name.endswith('.css'):
+            content = rewrite_css(content, assets)
+        elif name in referencing:
+            content = rewrite_webmanifest(content, assets)
+
+        target = hashed_name(name, content)
+        target_path = os.path.join(DIST_DIR, target)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        with open(target_path, 'wb') as f:
+            f.write(content)
+        assets[name] = target
+        if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+            encodings[target] = write_compressed(target_path, content)
+
+    with open(os.path.join(DIST_DIR, MANIFEST_NAME), 'w') as f:
+        json.dump({'assets': assets, 'encodings': encodings}, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return assets, encodings
+
+
+def main():
+    assets, encodings = build()
+    compressed = sum(1 for found in encodings.values() if found)
+    print(f"Built {len(assets)} assets into {os.path.relpath(DIST_DIR)} "
+          f"({compressed} with precompressed variants{'' if brotli else ', brotli not installed'})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
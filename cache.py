@@ -0,0 +1,260 @@
+"""
+In-process caches for the events page.
+
+Entries expire after a TTL and always roll over at local midnight (date badges
+depend on "today"). Expired entries are served stale while one background
+thread reloads them, and a failed reload keeps serving the last good value, so
+a cold or unavailable database never blocks a page view that has been served
+before.
+
+Writers of beard_events call notify_events_changed() after committing; web
+workers LISTEN for that notification and drop their cached pages.
+"""
+import os
+import select
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import psycopg2
+
+from dateparse import local_today
+
+EVENTS_CHANNEL = 'beard_events_changed'
+
+_caches = weakref.WeakSet()
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+class CacheEntry:
+    """A cached value with the bookkeeping needed to decide freshness"""
+
+    __slots__ = ('value', 'version', 'loaded_at', 'day', 'generation')
+
+    def __init__(self, value, version, day, generation):
+        self.value = value
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.day = day
+        self.generation = generation
+
+
+class TTLCache:
+    """Size-bounded LRU cache with TTL, midnight rollover and stale-while-revalidate"""
+
+    def __init__(self, ttl=None, max_entries=32, stale_while_revalidate=True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> [lock, callers using it], only while a load is in flight
+        self._refreshing = set()
+        self._generation = 0
+        self._version = 0
+        self.stats = {'hits': 0, 'misses': 0, 'stale_hits': 0, 'refreshes': 0, 'load_errors': 0}
+        _caches.add(self)
+
+    def _is_fresh(self, entry, today):
+        if entry.day != today or entry.generation != self._generation:
+            return False
+        return self.ttl is None or time.monotonic() - entry.loaded_at < self.ttl
+
+    def _can_serve_stale(self, entry, today):
+        # TTL expiry only; a new day or an explicit invalidation must reload
+        return (self.stale_while_revalidate and entry.day == today
+                and entry.generation == self._generation)
+
+    def _store(self, key, value, day, generation):
+        with self._lock:
+            self._version += 1
+            entry = CacheEntry(value, self._version, day, generation)
+            if generation == self._generation:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return entry
+
+    def _acquire_key_lock(self, key):
+        """The single-flight lock for key (call with self._lock held); pair with _release_key_lock"""
+        holder = self._key_locks.get(key)
+        if holder is None:
+            holder = self._key_locks[key] = [threading.Lock(), 0]
+        holder[1] += 1
+        return holder[0]
+
+    def _release_key_lock(self, key):
+        # Dropped with its last user, so keys that are never stored leave nothing behind
+        with self._lock:
+            holder = self._key_locks[key]
+            holder[1] -= 1
+            if holder[1] == 0:
+                del self._key_locks[key]
+
+    def _load(self, key, loader, today):
+        with self._lock:
+            generation = self._generation
+        value = loader()
+        return self._store(key, value, today, generation)
+
+    def _refresh_in_background(self, key, loader, today):
+        def run():
+            try:
+                self._load(key, loader, today)
+            except Exception as e:
+                self.stats['load_errors'] += 1
+                print(f"Background cache refresh of {key!r} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self.stats['refreshes'] += 1
+        threading.Thread(target=run, name=f'cache-refresh-{key}', daemon=True).start()
+
+    def get_entry(self, key, loader):
+        """Return the CacheEntry for key, loading it with loader() if needed"""
+        today = local_today()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if self._is_fresh(entry, today):
+                    self.stats['hits'] += 1
+                    return entry
+                serve_stale = self._can_serve_stale(entry, today)
+                if serve_stale:
+                    self.stats['stale_hits'] += 1
+            else:
+                serve_stale = False
+            if not serve_stale:
+                key_lock = self._acquire_key_lock(key)
+
+        if serve_stale:
+            self._refresh_in_background(key, loader, today)
+            return entry
+
+        # Single-flight: one thread loads, concurrent callers wait for it
+        try:
+            with key_lock:
+                with self._lock:
+                    current = self._entries.get(key)
+                    if current is not None and self._is_fresh(current, today):
+                        self.stats['hits'] += 1
+                        return current
+                self.stats['misses'] += 1
+                try:
+                    return self._load(key, loader, today)
+                except Exception:
+                    self.stats['load_errors'] += 1
+                    if entry is not None:
+                        print(f"Cache load of {key!r} failed, serving stale value")
+                        return entry
+                    raise
+        finally:
+            self._release_key_lock(key)
+
+    def get(self, key, loader):
+        """Return the cached value for key, loading it with loader() if needed"""
+        return self.get_entry(key, loader).value
+
+    # Non-blocking API for callers that load values themselves (the asyncio
+    # server): peek(), then load_token() + put() on a miss or stale entry.
+
+    def peek(self, key):
+        """Return (entry, state) without loading; state is 'fresh', 'stale' or None for a miss"""
+        today = local_today()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if self._is_fresh(entry, today):
+                    self.stats['hits'] += 1
+                    return entry, 'fresh'
+                if self._can_serve_stale(entry, today):
+                    self.stats['stale_hits'] += 1
+                    return entry, 'stale'
+            self.stats['misses'] += 1
+            return entry, None
+
+    def load_token(self):
+        """Capture the day and generation before an external load starts"""
+        with self._lock:
+            return local_today(), self._generation
+
+    def put(self, key, value, token):
+        """Store an externally loaded value; dropped if the cache was invalidated meanwhile"""
+        day, generation = token
+        return self._store(key, value, day, generation)
+
+    def invalidate(self):
+        """Mark every entry as needing a reload (kept only as a fallback on errors)"""
+        with self._lock:
+            self._generation += 1
+
+
+def invalidate_all():
+    """Invalidate every cache in this process"""
+    for cache in list(_caches):
+        cache.invalidate()
+
+
+def notify_events_changed(conn):
+    """Invalidate local caches and tell every web worker that beard_events changed
+
+    Call with the connection that wrote beard_events, before it commits; the
+    notification is delivered when the transaction commits.
+    """
+    invalidate_all()
+    c = conn.cursor()
+    c.execute(f'NOTIFY {EVENTS_CHANNEL}')
+
+
+def _listen_forever():
+    """Invalidate caches whenever a NOTIFY arrives; reconnects with backoff"""
+    delay = 1
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(os.getenv('DATABASE_URL'))
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            conn.cursor().execute(f'LISTEN {EVENTS_CHANNEL}')
+            # Anything may have changed while we were not listening
+            invalidate_all()
+            delay = 1
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    conn.cursor().execute('SELECT 1')  # keepalive
+                    continue
+                conn.poll()
+                if conn.notifies:
+                    conn.notifies.clear()
+                    invalidate_all()
+        except Exception as e:
+            print(f"Cache invalidation listener error: {e}")
+            if conn is not None:
+                try:
+                    conn.close()
+                except psycopg2.Error:
+                    pass
+            time.sleep(delay)
+            delay = min(delay * 2, 60)
+
+
+def start_invalidation_listener():
+    """Start the LISTEN thread once per process (safe to call on every request)"""
+    global _listener_pid
+    pid = os.getpid()
+    if _listener_pid == pid or not os.getenv('DATABASE_URL'):
+        return
+    with _listener_lock:
+        if _listener_pid == pid:
+            return
+        _listener_pid = pid
+        threading.Thread(target=_listen_forever, name='cache-listener', daemon=True).start()
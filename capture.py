@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Raw page captures, and offline replay of the scraper's extraction over them.
+
+With SCRAPER_CAPTURE_DIR set, the scraper stores every page it parses before
+parsing it, as one gzip-compressed JSON file:
+
+    <dir>/<YYYY-MM-DD>/<kind>-<content hash>.json.gz
+    {"kind", "url", "captured_at", "bytes", "html", "text", "title"}
+
+A page captured twice on the same day with the same content is stored once.
+Capturing is off by default and never fails a scrape.
+
+Kinds, and the extraction replayed for each:
+
+    requests_list    scraper.parse_events_page(html)
+    selenium_list    scraper.collect_event_listings + parse_listing_text(text)
+    selenium_event   scraper.event_from_page
+
+Selenium's extraction runs against SoupPage, which answers the WebDriver
+calls the scraper makes (find_elements by CSS selector, .text, href, title)
+from the captured HTML, so the same functions parse live and captured pages.
+
+Usage:
+    python capture.py list [--dir DIR]
+    python capture.py replay [--dir DIR] [--workers N] [--kind KIND] [--check-text]
+                             [--save results.json] [--baseline results.json]
+    python capture.py prune --days 30 [--dir DIR]
+
+replay parses every capture in parallel (one process per core by default)
+and reports per-kind counts and parse times and the slowest pages. --save
+writes what was extracted from each page. --baseline compares against such a
+file and lists the pages whose events or links changed, so a parser change is
+checked against thousands of real pages in seconds without network access.
+--check-text also compares linescan.html_text() with BeautifulSoup's
+get_text() on every requests_list page and lists the pages whose words differ.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+from urllib.parse import urljoin
+
+SCRAPER_CAPTURE_DIR = os.getenv('SCRAPER_CAPTURE_DIR', '')
+CAPTURE_COMPRESS_LEVEL = int(os.getenv('SCRAPER_CAPTURE_COMPRESS_LEVEL', '6'))
+CAPTURE_KINDS = ('requests_list', 'selenium_list', 'selenium_event')
+
+
+def capturing():
+    """True when SCRAPER_CAPTURE_DIR is set (skip building page_source otherwise)"""
+    return bool(SCRAPER_CAPTURE_DIR)
+
+
+def save_capture(kind, url, html=None, text=None, capture_dir=None, **meta):
+    """Store a fetched page when capturing is on; returns its path or None, never raises"""
+    capture_dir = capture_dir or SCRAPER_CAPTURE_DIR
+    if not capture_dir:
+        return None
+    try:
+        if isinstance(html, bytes):
+            html = html.decode('utf-8', 'replace')
+        digest = hashlib.sha1('\0'.join((url, html or '', text or '')).encode('utf-8')).hexdigest()[:16]
+        day_dir = os.path.join(capture_dir, date.today().isoformat())
+        path = os.path.join(day_dir, f'{kind}-{digest}.json.gz')
+        if os.path.exists(path):
+            return path
+        os.makedirs(day_dir, exist_ok=True)
+        record = {'kind': kind, 'url': url, 'captured_at': datetime.now(timezone.utc).isoformat(),
+                  'bytes': len(html or '') + len(text or ''), 'html': html, 'text': text, **meta}
+        # Written under a private name first, so readers never see half a file
+        partial = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with gzip.open(partial, 'wt', encoding='utf-8', compresslevel=CAPTURE_COMPRESS_LEVEL) as f:
+            json.dump(record, f)
+        os.replace(partial, path)
+        return path
+    except Exception as e:
+        print(f"Could not capture {kind} page {url}: {e}")
+        return None
+
+
+def capture_paths(capture_dir, kind=None):
+    """Every capture file under capture_dir, oldest day first"""
+    paths = []
+    for root, dirs, files in os.walk(capture_dir):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files)
+                     if name.endswith('.json.gz') and (kind is None or name.startswith(kind + '-')))
+    return paths
+
+
+def load_capture(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class SoupElement:
+    """A parsed element, with the WebElement attributes the scraper reads"""
+
+    def __init__(self, tag, base_url):
+        self._tag = tag
+        self._base_url = base_url
+
+    @property
+    def text(self):
+        # Like Selenium, only rendered text: nothing from <head>, scripts or styles
+        if self._tag.name in ('title', 'script', 'style') or self._tag.find_parent('head'):
+            return ''
+        return self._tag.get_text('\n', strip=True)
+
+    def get_attribute(self, name):
+        value = self._tag.get(name)
+        if isinstance(value, list):
+            value = ' '.join(value)
+        if name in ('href', 'src') and value:
+            return urljoin(self._base_url, value)  # Selenium returns the resolved URL
+        return value
+
+
+class SoupPage:
+    """Captured HTML answering the WebDriver calls made by the scraper's extraction"""
+
+    def __init__(self, html, url='', title=None):
+        from bs4 import BeautifulSoup
+
+        try:
+            self._soup = BeautifulSoup(html or '', 'lxml')
+        except Exception:  # lxml not installed
+            self._soup = BeautifulSoup(html or '', 'html.parser')
+        self._url = url
+        if title is None:
+            title = self._soup.title.get_text(strip=True) if self._soup.title else ''
+        self.title = title
+
+    def find_elements(self, by, selector):
+        if by != 'css selector':
+            raise ValueError(f'SoupPage only supports CSS selectors, not {by!r}')
+        return [SoupElement(tag, self._url) for tag in self._soup.select(selector)]
+
+    @property
+    def text(self):
+        body = self._soup.body or self._soup
+        return body.get_text('\n', strip=True)
+
+
+def extract(record):
+    """Run the scraper's extraction for a capture; returns {'events': [...], 'links': [...]}"""
+    import scraper
+
+    kind = record['kind']
+    if kind == 'requests_list':
+        return {'events': scraper.parse_events_page(record['html'])}
+    if kind == 'selenium_list':
+        page = SoupPage(record['html'], record['url'])
+        text = record.get('text') or page.text
+        return {'events': scraper.parse_listing_text(text, []),
+                'links': [list(link) for link in scraper.collect_event_listings(page)]}
+    if kind == 'selenium_event':
+        page = SoupPage(record['html'], record['url'], record.get('title'))
+        event = scraper.event_from_page(page, record['url'])
+        return {'events': [event] if event else []}
+    raise ValueError(f'Unknown capture kind {kind!r}')
+
+
+def _quiet_worker():
+    import scraper
+
+    scraper.SCRAPER_DEBUG_LOG = ''  # no debug.log line per replayed page
+
+
+def text_matches(html):
+    """Whether linescan.html_text() gives the same words as BeautifulSoup's get_text()"""
+    from bs4 import BeautifulSoup
+
+    from linescan import html_text
+
+    return html_text(html).split() == BeautifulSoup(html, 'html.parser').get_text().split()
+
+
+def replay_one(path, check_text=False):
+    """Load and re-parse one capture; parse time excludes reading the file
+
+    With check_text, requests_list pages also get 'text_matches' (see
+    text_matches()), checked after the timed extraction.
+    """
+    try:
+        record = load_capture(path)
+    except Exception as e:
+        return {'path': path, 'kind': None, 'result': None, 'ms': 0.0, 'error': f'unreadable: {e}'}
+    started = time.perf_counter()
+    try:
+        result, error = extract(record), None
+    except Exception as e:
+        result, error = None, f'{e.__class__.__name__}: {e}'
+    replayed = {'path': path, 'kind': record.get('kind'), 'result': result,
+                'ms': (time.perf_counter() - started) * 1000, 'error': error}
+    if check_text and record.get('kind') == 'requests_list':
+        replayed['text_matches'] = text_matches(record['html'])
+    return replayed
+
+
+def replay(paths, workers=None, check_text=False):
+    """replay_one over paths, in worker processes unless workers is 1"""
+    workers = workers or os.cpu_count() or 1
+    replay_path = partial(replay_one, check_text=check_text)
+    if workers == 1 or len(paths) < 2:
+        _quiet_worker()
+        return [replay_path(path) for path in paths]
+    chunksize = max(1, len(paths) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_quiet_worker) as executor:
+        return list(executor.map(replay_path, paths, chunksize=chunksize))
+
+
+def event_key(event):
+    return (event.get('title'), event.get('date'), event.get('location'))
+
+
+def diff_result(old, new):
+    """Lines describing how new extraction output differs from old"""
+    old_events = {event_key(e): e for e in old.get('events', [])}
+    new_events = {event_key(e): e for e in new.get('events', [])}
+    lines = [f"  - {' | '.join(str(part) for part in key)}" for key in old_events if key not in new_events]
+    lines += [f"  + {' | '.join(str(part) for part in key)}" for key in new_events if key not in old_events]
+    old_links = {tuple(link) for link in old.get('links', [])}
+    new_links = {tuple(link) for link in new.get('links', [])}
+    if old_links != new_links:
+        lines.append(f"  links: {len(old_links - new_links)} removed, {len(new_links - old_links)} added")
+    return lines
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def report(results, elapsed, workers):
+    by_kind = {}
+    for r in results:
+        by_kind.setdefault(r['kind'] or 'unreadable', []).append(r)
+    print(f"{len(results)} captures in {elapsed:.2f}s with {workers} worker(s), "
+          f"{len(results) / elapsed if elapsed else 0:.0f} pages/s")
+    print(f"{'kind':16} {'pages':>6} {'events':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for kind, rows in sorted(by_kind.items()):
+        times = [r['ms'] for r in rows]
+        events = sum(len(r['result']['events']) for r in rows if r['result'])
+        errors = sum(1 for r in rows if r['error'])
+        print(f"{kind:16} {len(rows):6d} {events:7d} {errors:7d} {statistics.median(times):8.2f} "
+              f"{percentile(times, 0.95):8.2f} {max(times):8.2f}")
+    for r in sorted(results, key=lambda r: r['ms'], reverse=True)[:5]:
+        print(f"  slowest: {r['ms']:8.2f} ms  {r['path']}")
+    for r in [r for r in results if r['error']][:10]:
+        print(f"  error: {r['path']}: {r['error']}")
+
+
+def compare(results, baseline, capture_dir, show):
+    changed, new_pages = 0, 0
+    for r in results:
+        key = os.path.relpath(r['path'], capture_dir)
+        if key not in baseline:
+            new_pages += 1
+            continue
+        lines = diff_result(baseline[key] or {}, r['result'] or {})
+        if lines:
+            changed += 1
+            if changed <= show:
+                print(key)
+                print('\n'.join(lines))
+    missing = len(set(baseline) - {os.path.relpath(r['path'], capture_dir) for r in results})
+    print(f"Against baseline: {changed} pages changed, {new_pages} not in the baseline, "
+          f"{missing} baseline pages not replayed")
+    return changed
+
+
+def prune(capture_dir, days):
+    """Delete day directories older than days; returns how many"""
+    cutoff = (date.today() - timedelta(days=days)).isoformat()
+    removed = 0
+    for name in sorted(os.listdir(capture_dir)):
+        if len(name) == 10 and name < cutoff and os.path.isdir(os.path.join(capture_dir, name)):
+            shutil.rmtree(os.path.join(capture_dir, name))
+            removed += 1
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scraper page captures and offline replay')
+    parser.add_argument('command', choices=('list', 'replay', 'prune'))
+    parser.add_argument('--dir', default=SCRAPER_CAPTURE_DIR or 'captures')
+    parser.add_argument('--kind', choices=CAPTURE_KINDS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--save', help='write the extracted results here (a baseline for later runs)')
+    parser.add_argument('--baseline', help='compare against results saved with --save')
+    parser.add_argument('--show', type=int, default=20, help='changed pages to print')
+    parser.add_argument('--fail-on-diff', action='store_true', help='exit 1 if any page changed')
+    parser.add_argument('--check-text', action='store_true',
+                        help='exit 1 if linescan.html_text() and BeautifulSoup disagree on a requests_list page')
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        print(f"No captures in {args.dir} (set SCRAPER_CAPTURE_DIR while scraping to record some)")
+        return 1
+    if args.command == 'prune':
+        print(f"Removed {prune(args.dir, args.days)} day(s) of captures older than {args.days} days")
+        return 0
+
+    paths = capture_paths(args.dir, args.kind)
+    if args.command == 'list':
+        counts = {}
+        for path in paths:
+            kind = os.path.basename(path).rsplit('-', 1)[0]
+            counts[kind] = counts.get(kind, 0) + 1
+        size = sum(os.path.getsize(path) for path in paths)
+        print(f"{len(paths)} captures, {size / 1024 / 1024:.1f} MB compressed: "
+              + ', '.join(f'{kind} {n}' for kind, n in sorted(counts.items())))
+        return 0
+
+    started = time.perf_counter()
+    results = replay(paths, args.workers, args.check_text)
+    report(results, time.perf_counter() - started, args.workers)
+
+    failed = any(r['error'] for r in results)
+    if args.check_text:
+        checked = [r for r in results if 'text_matches' in r]
+        mismatched = [r for r in checked if not r['text_matches']]
+        for r in mismatched[:args.show]:
+            print(f"  text differs from BeautifulSoup: {r['path']}")
+        print(f"Text check: {len(mismatched)} of {len(checked)} requests_list pages differ")
+        failed = failed or bool(mismatched)
+    if args.baseline:
+        with open(args.baseline) as f:
+            changed = compare(results, json.load(f), args.dir, args.show)
+        failed = failed or (args.fail_on_diff and changed > 0)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({os.path.relpath(r['path'], args.dir): r['result'] for r in results}, f, indent=1)
+        print(f"Saved results for {len(results)} captures to {args.save}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
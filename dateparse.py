@@ -0,0 +1,188 @@
+"""
+Event date parsing and formatting shared by the scraper, the ingest normaliser
+and the web renderer.
+
+Handles the formats Facebook and the legacy events table produce:
+
+    "Fri, 28 Nov at 21:00"              "Sat, Nov 29 at 8:00 PM GMT"
+    "Friday 28 November 2025 from 21:00" "September 10, 2025"
+    "Tomorrow at 19:00" / "Today at 20:30" / "Saturday at 20:00"
+    "2025-11-28" / "2025-11-28 21:00" / ISO 8601 timestamps
+
+Relative dates and missing years are resolved against an anchor time ("now"),
+which callers can inject; results are timezone-aware datetimes in Europe/London.
+Parsed strings are memoised per (text, anchor date).
+"""
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+LOCAL_TZ = ZoneInfo('Europe/London')
+DEFAULT_TIME = time(19, 0)  # used when a string has a date but no time
+PAST_YEAR_WINDOW = timedelta(days=90)  # yearless dates further back than this roll to next year
+CACHE_SIZE = 4096
+
+MONTHS = {}
+for _number, _name in enumerate(('january', 'february', 'march', 'april', 'may', 'june', 'july',
+                                 'august', 'september', 'october', 'november', 'december'), 1):
+    MONTHS[_name] = _number
+    MONTHS[_name[:3]] = _number
+MONTHS['sept'] = 9
+
+WEEKDAYS = {}
+for _number, _name in enumerate(('monday', 'tuesday', 'wednesday', 'thursday', 'friday',
+                                 'saturday', 'sunday')):
+    WEEKDAYS[_name] = _number
+    WEEKDAYS[_name[:3]] = _number
+
+_MONTH = r'(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)'
+_WEEKDAY = r'(?P<weekday>mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?|thu(?:r(?:s(?:day)?)?)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)'
+_TIME = r'(?:\s*,?\s*(?:at|from|@)?\s*(?P<hour>\d{1,2})[:.](?P<minute>\d{2})\s*(?P<ampm>[ap]\.?m\.?)?)?'
+
+ISO_RE = re.compile(r'(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})'
+                    r'(?:[ T](?P<hour>\d{2}):(?P<minute>\d{2})(?::\d{2}(?:\.\d+)?)?'
+                    r'(?P<tz>Z|[+-]\d{2}(?::?\d{2})?)?)?')
+RELATIVE_RE = re.compile(r'\b(?P<relative>today|tonight|tomorrow)\b' + _TIME, re.IGNORECASE)
+DAY_MONTH_RE = re.compile(r'\b(?P<day>\d{1,2})(?:st|nd|rd|th)?\s+' + _MONTH +
+                          r'\b\.?(?:,?\s+(?P<year>\d{4}))?' + _TIME, re.IGNORECASE)
+MONTH_DAY_RE = re.compile(r'\b' + _MONTH + r'\.?\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?\b'
+                          r'(?:,?\s+(?P<year>\d{4}))?' + _TIME, re.IGNORECASE)
+WEEKDAY_RE = re.compile(r'^\s*(?:this\s+|next\s+)?' + _WEEKDAY + r'\b' + _TIME, re.IGNORECASE)
+
+# Tried in order; day-first is Facebook's UK format, so it wins over month-first
+PATTERNS = (ISO_RE, RELATIVE_RE, DAY_MONTH_RE, MONTH_DAY_RE, WEEKDAY_RE)
+
+
+def now_local():
+    """Default clock: the current time in the site's timezone"""
+    return datetime.now(LOCAL_TZ)
+
+
+def local_today():
+    """Today's date in the site's timezone"""
+    return now_local().date()
+
+
+def _anchor(now):
+    if now is None:
+        return now_local()
+    if now.tzinfo is None:
+        return now.replace(tzinfo=LOCAL_TZ)
+    return now.astimezone(LOCAL_TZ)
+
+
+def _time_of(match, has_ampm=True):
+    """(hour, minute) from a match's time groups, or the default time"""
+    hour = match.group('hour')
+    if hour is None:
+        return DEFAULT_TIME.hour, DEFAULT_TIME.minute
+    hour = int(hour)
+    minute = int(match.group('minute'))
+    ampm = match.group('ampm') if has_ampm else None
+    if ampm:
+        ampm = ampm[0].lower()
+        if ampm == 'p' and hour < 12:
+            hour += 12
+        elif ampm == 'a' and hour == 12:
+            hour = 0
+    return hour, minute
+
+
+def _local(day, hour_minute):
+    return datetime(day.year, day.month, day.day, hour_minute[0], hour_minute[1], tzinfo=LOCAL_TZ)
+
+
+def _build(match, pattern, anchor_date):
+    """Turn a regex match into an aware local datetime (raises ValueError if out of range)"""
+    if pattern is ISO_RE:
+        if match.group('tz'):
+            parsed = datetime.fromisoformat(match.group(0).replace('Z', '+00:00'))
+            return parsed.astimezone(LOCAL_TZ)
+        day = date(int(match.group('year')), int(match.group('month')), int(match.group('day')))
+        return _local(day, _time_of(match, has_ampm=False))
+
+    if pattern is RELATIVE_RE:
+        offset = 1 if match.group('relative')[:3].lower() == 'tom' else 0
+        return _local(anchor_date + timedelta(days=offset), _time_of(match))
+
+    if pattern is WEEKDAY_RE:
+        weekday = WEEKDAYS[match.group('weekday')[:3].lower()]
+        offset = (weekday - anchor_date.weekday()) % 7
+        return _local(anchor_date + timedelta(days=offset), _time_of(match))
+
+    month = MONTHS[match.group('month')[:3].lower()]
+    day = int(match.group('day'))
+    year = match.group('year')
+    if year:
+        return _local(date(int(year), month, day), _time_of(match))
+
+    # No year: this year, unless that is well in the past
+    candidate = date(anchor_date.year, month, day)
+    if candidate < anchor_date - PAST_YEAR_WINDOW:
+        candidate = date(anchor_date.year + 1, month, day)
+    return _local(candidate, _time_of(match))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_cached(text, anchor_date):
+    for pattern in PATTERNS:
+        # ISO and weekday forms are anchored at the start, the rest can be embedded
+        match = pattern.match(text) if pattern is ISO_RE else pattern.search(text)
+        if match is None:
+            continue
+        try:
+            return _build(match, pattern, anchor_date)
+        except ValueError:
+            return None
+    return None
+
+
+def parse_event_date(value, now=None):
+    """Parse an event date string into an aware Europe/London datetime, or None
+
+    now anchors relative dates and yearless dates (defaults to the current
+    time); pass the scrape time when re-parsing stored strings.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=LOCAL_TZ)
+    text = str(value).strip()
+    if not text:
+        return None
+    return _parse_cached(text, _anchor(now).date())
+
+
+def parse_many(values, now=None):
+    """Parse a list of date strings against one anchor time"""
+    anchor_date = _anchor(now).date()
+    results = []
+    for value in values:
+        if isinstance(value, datetime) or value is None:
+            results.append(parse_event_date(value))
+            continue
+        text = str(value).strip()
+        results.append(_parse_cached(text, anchor_date) if text else None)
+    return results
+
+
+def date_key(value, now=None):
+    """Canonical "YYYY-MM-DD-HH-MM" key for duplicate detection, or None"""
+    parsed = parse_event_date(value, now)
+    return parsed.strftime('%Y-%m-%d-%H-%M') if parsed else None
+
+
+def format_event_date(timestamp):
+    """Format a timestamp like "Friday 28 November 2025 from 21:00" in local time"""
+    if not timestamp:
+        return "Date TBA"
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(LOCAL_TZ)
+    return (f"{timestamp:%A} {timestamp.day} {timestamp:%B} {timestamp:%Y} "
+            f"from {timestamp:%H:%M}")
+
+
+def cache_info():
+    """LRU statistics for the parse cache"""
+    return _parse_cached.cache_info()
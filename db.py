@@ -0,0 +1,273 @@
+"""
+Shared PostgreSQL connection pool used by the web app and maintenance scripts.
+
+Each process (and each gunicorn worker after fork) gets its own pool. Connections
+are health-checked on checkout, recycled after a maximum age and opened with a
+statement timeout so one slow query cannot hang a worker.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from dotenv import load_dotenv
+
+import instrument
+
+# Load environment variables
+load_dotenv()
+
+POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+POOL_MAX = int(os.getenv('DB_POOL_MAX', '5'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))  # seconds to wait for a free connection
+STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '5000'))
+MAX_CONNECTION_AGE = float(os.getenv('DB_MAX_CONNECTION_AGE', '1800'))  # seconds
+IDLE_CHECK_AFTER = float(os.getenv('DB_IDLE_CHECK_AFTER', '30'))  # ping connections idle longer than this
+CONNECT_RETRIES = int(os.getenv('DB_CONNECT_RETRIES', '3'))
+CONNECT_BACKOFF = float(os.getenv('DB_CONNECT_BACKOFF', '0.5'))  # seconds, doubled per attempt
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free within the pool timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of psycopg2 connections with liveness checks and metrics"""
+
+    def __init__(self, dsn, minconn=POOL_MIN, maxconn=POOL_MAX, timeout=POOL_TIMEOUT,
+                 statement_timeout_ms=STATEMENT_TIMEOUT_MS, max_age=MAX_CONNECTION_AGE):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.statement_timeout_ms = statement_timeout_ms
+        self.max_age = max_age
+        self.pid = os.getpid()
+
+        self._idle = []  # list of (conn, created_at, last_used)
+        self._in_use = {}  # id(conn) -> created_at
+        self._opening = 0  # slots reserved by threads currently connecting
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'connects': 0,
+            'connect_failures': 0,
+            'reconnects': 0,
+            'discarded': 0,
+        }
+
+        for _ in range(minconn):
+            conn = self._connect()
+            self._idle.append((conn, time.monotonic(), time.monotonic()))
+
+    def _connect(self):
+        """Open a new connection, retrying with exponential backoff"""
+        delay = CONNECT_BACKOFF
+        for attempt in range(1, CONNECT_RETRIES + 1):
+            try:
+                with instrument.span('db.connect'):
+                    conn = psycopg2.connect(self.dsn, cursor_factory=instrument.cursor_factory())
+                if self.statement_timeout_ms:
+                    with conn.cursor() as c:
+                        c.execute('SET statement_timeout = %s', (self.statement_timeout_ms,))
+                    conn.commit()
+                self.stats['connects'] += 1
+                return conn
+            except psycopg2.OperationalError as e:
+                self.stats['connect_failures'] += 1
+                if attempt == CONNECT_RETRIES:
+                    raise
+                print(f"Database connect failed (attempt {attempt}/{CONNECT_RETRIES}): {e}")
+                time.sleep(delay)
+                delay *= 2
+
+    def _is_alive(self, conn, last_used):
+        """Check a pooled connection before handing it out"""
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < IDLE_CHECK_AFTER:
+            return True
+        try:
+            with conn.cursor() as c:
+                c.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        self.stats['discarded'] += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self):
+        """Check out a live connection, waiting up to the pool timeout"""
+        started = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout('Connection pool is closed')
+                if self._idle:
+                    conn, created_at, last_used = self._idle.pop()
+                    break
+                if len(self._in_use) + self._opening < self.maxconn:
+                    conn, created_at, last_used = None, None, None
+                    break
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    raise PoolTimeout(f'No database connection available after {self.timeout}s')
+                waited = True
+                self._cond.wait(remaining)
+
+            self.stats['checkouts'] += 1
+            if waited:
+                wait_time = time.monotonic() - started
+                self.stats['waits'] += 1
+                self.stats['wait_time_total'] += wait_time
+                self.stats['wait_time_max'] = max(self.stats['wait_time_max'], wait_time)
+
+            # Reserve the slot, then health-check or connect outside the lock
+            self._opening += 1
+
+        try:
+            if conn is not None and (time.monotonic() - created_at > self.max_age
+                                     or not self._is_alive(conn, last_used)):
+                self._discard(conn)
+                self.stats['reconnects'] += 1
+                conn = None
+            if conn is None:
+                conn = self._connect()
+                created_at = time.monotonic()
+        except Exception:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._opening -= 1
+            self._in_use[id(conn)] = created_at
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Return a connection to the pool, closing it if it is broken"""
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+            if not close and not conn.closed and not self._closed:
+                status = conn.info.transaction_status
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    close = True
+                elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error:
+                        close = True
+            if close or conn.closed or self._closed or created_at is None:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            for conn, _, _ in self._idle:
+                self._discard(conn)
+            self._idle = []
+            self._cond.notify_all()
+
+    def metrics(self):
+        """Return a snapshot of pool counters and connection ages"""
+        now = time.monotonic()
+        with self._cond:
+            ages = [now - created for _, created, _ in self._idle]
+            ages += [now - created for created in self._in_use.values() if created is not None]
+            snapshot = dict(self.stats)
+            snapshot.update({
+                'pid': self.pid,
+                'min': self.minconn,
+                'max': self.maxconn,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'connection_age_max': round(max(ages), 3) if ages else 0.0,
+                'connection_age_avg': round(sum(ages) / len(ages), 3) if ages else 0.0,
+            })
+        snapshot['wait_time_total'] = round(snapshot['wait_time_total'], 6)
+        snapshot['wait_time_max'] = round(snapshot['wait_time_max'], 6)
+        return snapshot
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# Pools inherited from a parent process are kept referenced (never closed or
+# garbage collected) so their sockets are not torn down underneath the parent.
+_inherited_pools = []
+
+
+def get_pool():
+    """Return this process's pool, creating a fresh one after a fork"""
+    global _pool
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid != os.getpid():
+            _inherited_pools.append(_pool)
+            _pool = None
+        if _pool is None:
+            dsn = os.getenv('DATABASE_URL')
+            if not dsn:
+                raise RuntimeError('DATABASE_URL is not set')
+            _pool = ConnectionPool(dsn)
+        return _pool
+
+
+@contextmanager
+def get_connection():
+    """Check out a pooled connection; commits on success, rolls back on error"""
+    pool = get_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+        conn.commit()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    except Exception:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+
+def pool_metrics():
+    """Metrics for this process's pool, or None if it has not been created yet"""
+    pool = _pool
+    if pool is None or pool.pid != os.getpid():
+        return None
+    return pool.metrics()
+
+
+def close_pool():
+    """Close this process's pool (used by scripts on exit)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.closeall()
+        _pool = None
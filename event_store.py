@@ -0,0 +1,271 @@
+"""
+Bulk storage of scraped events in beard_events.
+
+Scraped events are normalised once (date string -> timestamptz), staged into a
+temporary table with execute_values and merged with a single
+INSERT ... ON CONFLICT keyed on the canonical identity
+(name, location, timestamp). Every row carries a fingerprint (md5 of its
+scraped content, FINGERPRINT_SQL); a staged row whose fingerprint matches the
+stored one is not touched, so an unchanged scrape writes nothing, fires no
+cache invalidation and leaves the derived tables alone. Each insert or update
+is recorded in beard_event_changes with the fields that moved.
+
+Each row's venue_id is resolved from its location and venueurl through the
+in-memory alias index of venues.py before staging, and rows written without
+one (by other importers) are assigned one first.
+
+The archive's per-month counts (beard_event_months) are recounted for the
+months a batch touched, and the precomputed upcoming list
+(beard_upcoming_events) is refreshed, in the same transaction.
+
+beard_event_listings remembers a fingerprint of each event's card on the
+Facebook events list, so the scraper only opens the pages of events whose
+card is new or changed (or was last checked LISTING_RECHECK_DAYS ago).
+"""
+import os
+
+from psycopg2.extras import execute_values
+
+from archive import init_archive, month_of, refresh_month_counts
+from dateparse import parse_event_date
+from db import get_connection
+from upcoming import init_upcoming, refresh_upcoming_events
+from venues import VenueIndex, assign_venues, init_venues, resolve_venues
+
+STAGE_PAGE_SIZE = 500
+LISTING_RECHECK_DAYS = int(os.getenv('LISTING_RECHECK_DAYS', '7'))  # reopen unchanged event pages this often
+CHANGE_LOG_DAYS = int(os.getenv('CHANGE_LOG_DAYS', '180'))  # beard_event_changes retention
+
+# Row text of the scraped columns; the timestamp is rendered in UTC so the
+# session time zone does not change it
+FINGERPRINT_SQL = """md5(ROW({p}name, {p}timestamp AT TIME ZONE 'UTC', {p}location, {p}responded,
+                            {p}imageurl, {p}url, {p}venueurl)::text)"""
+
+
+class MigrationRequired(RuntimeError):
+    """beard_events has not been deduplicated and indexed for the upsert yet"""
+
+
+def init_event_store(conn):
+    """Check the identity index the upsert relies on, and create the change log, the
+    listing fingerprints, the venue registry and the derived tables
+
+    Deduplicating beard_events, creating the identity index and adding and
+    backfilling the fingerprint column are a one-off migration
+    (migrate_event_identity.py), not done here on every save: ALTER TABLE
+    takes an ACCESS EXCLUSIVE lock on beard_events even when there is nothing
+    to change, which would block the web's reads until the save commits. Rows
+    written later without a fingerprint (by other importers) are rewritten
+    once by the next upsert that stages them.
+    """
+    c = conn.cursor()
+    c.execute("SELECT to_regclass('idx_beard_events_identity')")
+    if c.fetchone()[0] is None:
+        raise MigrationRequired('idx_beard_events_identity is missing: run python migrate_event_identity.py')
+    c.execute('''CREATE TABLE IF NOT EXISTS beard_event_changes (
+        id BIGSERIAL PRIMARY KEY,
+        event_id INTEGER NOT NULL,
+        changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        change TEXT NOT NULL,
+        fields JSONB,
+        fingerprint TEXT NOT NULL
+    )''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_beard_event_changes_event
+                 ON beard_event_changes (event_id, changed_at)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_beard_event_changes_changed_at
+                 ON beard_event_changes (changed_at)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS beard_event_listings (
+        url TEXT PRIMARY KEY,
+        fingerprint TEXT NOT NULL,
+        checked_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )''')
+    init_venues(conn)
+    init_archive(conn)
+    init_upcoming(conn)
+
+
+def event_rows(events):
+    """Normalise scraped event dicts into deduplicated beard_events rows"""
+    rows = {}
+    for event in events:
+        title = (event.get('title') or '').strip()
+        if not title or not event.get('date'):
+            continue
+        start = parse_event_date(event['date'])
+        if start is None:
+            print(f"Skipping event with unparseable date: {title!r} {event['date']!r}")
+            continue
+        location = (event.get('location') or '').strip() or None
+
+        # Later duplicates in one batch win, like successive single-row updates did
+        rows[(title, location or '', start)] = (
+            event.get('facebook_url') or None,
+            start,
+            title,
+            event.get('going_count'),
+            location,
+            event.get('venue_url'),
+            event.get('image_url'),
+        )
+    return list(rows.values())
+
+
+def with_venues(conn, rows, index):
+    """event_rows() rows with their venue id appended"""
+    venues = resolve_venues(conn, {(row[4], row[5]) for row in rows if row[4]}, index)
+    return [row + (venues.get((row[4], row[5])),) for row in rows]
+
+
+def upsert_event_rows(conn, rows):
+    """Merge rows from with_venues() into beard_events; returns inserted/updated/unchanged counts
+
+    venues_changed counts updated rows that moved to another venue.
+    """
+    c = conn.cursor()
+    c.execute('''CREATE TEMP TABLE beard_events_stage (
+        url TEXT,
+        timestamp TIMESTAMPTZ NOT NULL,
+        name TEXT NOT NULL,
+        responded INTEGER,
+        location TEXT,
+        venueurl TEXT,
+        imageurl TEXT,
+        venue_id INTEGER,
+        fingerprint TEXT
+    ) ON COMMIT DROP''')
+    execute_values(c, '''INSERT INTO beard_events_stage
+                         (url, timestamp, name, responded, location, venueurl, imageurl, venue_id)
+                         VALUES %s''', rows, page_size=STAGE_PAGE_SIZE)
+
+    # Missing scraped values keep what is already stored, then each staged row
+    # is fingerprinted as it would be stored
+    c.execute('''
+        UPDATE beard_events_stage s SET
+            url = COALESCE(s.url, e.url),
+            responded = COALESCE(s.responded, e.responded),
+            venueurl = COALESCE(s.venueurl, e.venueurl),
+            imageurl = COALESCE(s.imageurl, e.imageurl)
+        FROM beard_events e
+        WHERE e.name = s.name AND COALESCE(e.location, '') = COALESCE(s.location, '')
+          AND e.timestamp = s.timestamp
+    ''')
+    c.execute(f'UPDATE beard_events_stage SET fingerprint = {FINGERPRINT_SQL.format(p="")}')
+
+    # Unchanged rows are skipped; changed ones are logged with their old and new values.
+    # venue_id is not part of the fingerprint, so a row is also rewritten when
+    # its location now resolves to another venue.
+    c.execute('''
+        WITH previous AS (
+            SELECT e.id, e.url, e.responded, e.venueurl, e.imageurl, e.venue_id
+            FROM beard_events e
+            JOIN beard_events_stage s
+              ON e.name = s.name AND COALESCE(e.location, '') = COALESCE(s.location, '')
+             AND e.timestamp = s.timestamp
+        ), merged AS (
+            INSERT INTO beard_events AS e
+                (url, timestamp, name, responded, location, venueurl, imageurl, venue_id, fingerprint, updated)
+            SELECT url, timestamp, name, responded, location, venueurl, imageurl, venue_id, fingerprint, NOW()
+            FROM beard_events_stage
+            ON CONFLICT (name, (COALESCE(location, '')), timestamp) DO UPDATE SET
+                url = EXCLUDED.url,
+                responded = EXCLUDED.responded,
+                venueurl = EXCLUDED.venueurl,
+                imageurl = EXCLUDED.imageurl,
+                venue_id = EXCLUDED.venue_id,
+                fingerprint = EXCLUDED.fingerprint,
+                updated = NOW()
+            WHERE e.fingerprint IS DISTINCT FROM EXCLUDED.fingerprint
+               OR e.venue_id IS DISTINCT FROM EXCLUDED.venue_id
+            RETURNING e.id, (xmax = 0) AS inserted, e.url, e.responded, e.venueurl, e.imageurl, e.venue_id,
+                      e.fingerprint
+        )
+        INSERT INTO beard_event_changes (event_id, change, fields, fingerprint)
+        SELECT m.id,
+               CASE WHEN m.inserted THEN 'inserted' ELSE 'updated' END,
+               CASE WHEN NOT m.inserted THEN jsonb_strip_nulls(jsonb_build_object(
+                   'url', CASE WHEN p.url IS DISTINCT FROM m.url THEN jsonb_build_array(p.url, m.url) END,
+                   'responded', CASE WHEN p.responded IS DISTINCT FROM m.responded
+                                     THEN jsonb_build_array(p.responded, m.responded) END,
+                   'venueurl', CASE WHEN p.venueurl IS DISTINCT FROM m.venueurl
+                                    THEN jsonb_build_array(p.venueurl, m.venueurl) END,
+                   'imageurl', CASE WHEN p.imageurl IS DISTINCT FROM m.imageurl
+                                    THEN jsonb_build_array(p.imageurl, m.imageurl) END,
+                   'venue_id', CASE WHEN p.venue_id IS DISTINCT FROM m.venue_id
+                                    THEN jsonb_build_array(p.venue_id, m.venue_id) END)) END,
+               m.fingerprint
+        FROM merged m
+        LEFT JOIN previous p ON p.id = m.id
+        RETURNING change, fields ? 'venue_id'
+    ''')
+    results = c.fetchall()
+    inserted = sum(1 for change, _ in results if change == 'inserted')
+    updated = len(results) - inserted
+    return {
+        'staged': len(rows),
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': len(rows) - len(results),
+        'venues_changed': sum(1 for _, venue_changed in results if venue_changed),
+    }
+
+
+def known_listings(conn):
+    """{event url: listing fingerprint} for cards checked within LISTING_RECHECK_DAYS"""
+    c = conn.cursor()
+    c.execute('''SELECT url, fingerprint FROM beard_event_listings
+                 WHERE checked_at > NOW() - make_interval(days => %s)''', (LISTING_RECHECK_DAYS,))
+    return dict(c.fetchall())
+
+
+def load_known_listings():
+    """known_listings() on a pooled connection, after init_event_store() (so it raises
+    MigrationRequired until migrate_event_identity.py has run)"""
+    with get_connection() as conn:
+        init_event_store(conn)
+        return known_listings(conn)
+
+
+def save_listings(conn, events, rows):
+    """Remember the listing fingerprints of scraped events that were saved as rows
+
+    Events event_rows() dropped (no title, unparseable date) are left out, so
+    their pages are opened again on the next run instead of being skipped.
+    """
+    staged = {row[0] for row in rows}
+    listings = {event['facebook_url']: event['listing_fingerprint'] for event in events
+                if event.get('facebook_url') in staged and event.get('listing_fingerprint')}
+    if not listings:
+        return 0
+    c = conn.cursor()
+    execute_values(c, '''
+        INSERT INTO beard_event_listings (url, fingerprint, checked_at) VALUES %s
+        ON CONFLICT (url) DO UPDATE SET fingerprint = EXCLUDED.fingerprint, checked_at = EXCLUDED.checked_at
+    ''', list(listings.items()), template='(%s, %s, NOW())')
+    return len(listings)
+
+
+def save_events_to_db(events):
+    """Normalise and bulk upsert scraped events; returns the merge counts"""
+    rows = event_rows(events)
+    if not rows:
+        # Nothing staged, so no listings to remember either (see save_listings)
+        return {'staged': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'venues_changed': 0}
+
+    with get_connection() as conn:
+        init_event_store(conn)
+        index = VenueIndex.load(conn)
+        assigned = assign_venues(conn, index)
+        counts = upsert_event_rows(conn, with_venues(conn, rows, index))
+        save_listings(conn, events, rows)
+        if assigned:
+            refresh_month_counts(conn)
+        elif counts['inserted'] or counts['venues_changed']:
+            refresh_month_counts(conn, {month_of(row[1]) for row in rows})
+        if counts['inserted'] or counts['updated'] or assigned:
+            refresh_upcoming_events(conn)
+        conn.cursor().execute('''DELETE FROM beard_event_changes
+                                 WHERE changed_at < NOW() - make_interval(days => %s)''', (CHANGE_LOG_DAYS,))
+
+    print(f"Saved events: {counts['inserted']} inserted, {counts['updated']} updated, "
+          f"{counts['unchanged']} unchanged")
+    return counts
@@ -0,0 +1,134 @@
+"""
+Follower counts from Facebook page and Instagram profile HTML.
+
+Each platform has a chain of extractors, cheapest first:
+
+1. precompiled byte regexes over the raw response: embedded JSON
+   ("edge_followed_by", "followers_count"), the og:description meta tag and
+   the markup the BeautifulSoup walk looks for
+2. lxml XPath over a parsed tree, if lxml is installed
+3. the original BeautifulSoup walk
+
+The first extractor that returns a count wins, so a multi-megabyte page is
+normally answered by a regex scan without building any tree, and a layout
+change that defeats the regexes still has the slower parsers behind it.
+Extractors work on bytes (response.content), so the page is not decoded either.
+"""
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # the lxml step is skipped
+    lxml_html = None
+
+
+def _to_int(text):
+    return int(text.replace(b',', b'') if isinstance(text, bytes) else text.replace(',', ''))
+
+
+def _regex(pattern):
+    compiled = re.compile(pattern, re.IGNORECASE)
+
+    def extract(html):
+        match = compiled.search(html)
+        return _to_int(match.group(1)) if match else None
+
+    return extract
+
+
+# Facebook: <a href=".../followers/"><strong>1,234</strong> followers</a>
+facebook_followers_link = _regex(rb'<a\b[^>]*\bhref="[^"]*followers[^"]*"[^>]*>\s*<strong\b[^>]*>\s*([\d,]+)\s*</strong>')
+facebook_followers_json = _regex(rb'"followers?_count"\s*:\s*(\d+)')
+
+# Instagram: embedded profile JSON, the og:description ("1,234 Followers, ...") and <span title="1234">
+instagram_followed_by_json = _regex(rb'"edge_followed_by"\s*:\s*\{\s*"count"\s*:\s*(\d+)')
+instagram_meta_description = _regex(rb'<meta\b[^>]*\bcontent="([\d,]+) Followers\b')
+instagram_span_title = _regex(rb'<span\b[^>]*\btitle="(\d+)"')
+
+
+def facebook_lxml(html):
+    tree = lxml_html.fromstring(html)
+    for strong in tree.xpath('//a[contains(@href, "followers")]//strong'):
+        text = strong.text_content().strip()
+        return _to_int(text) if text else None
+    return None
+
+
+def instagram_lxml(html):
+    tree = lxml_html.fromstring(html)
+    for span in tree.xpath('//span[@title]'):
+        if span.get('title').isdigit():
+            return int(span.get('title'))
+    return None
+
+
+def facebook_soup(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    # Look for the followers count in the HTML
+    followers_link = soup.find('a', href=re.compile(r'followers'))
+    if followers_link:
+        strong_tag = followers_link.find('strong')
+        if strong_tag:
+            count_text = strong_tag.get_text().strip()
+            return int(count_text.replace(',', ''))
+    return None
+
+
+def instagram_soup(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    # Look for the span with title attribute containing follower count
+    count_span = soup.find('span', title=re.compile(r'^\d+$'))
+    if count_span and count_span.get('title'):
+        return int(count_span['title'].replace(',', ''))
+
+    # Alternative: look for spans containing "followers" and extract the number
+    follower_text = soup.find(string=re.compile(r'followers'))
+    if follower_text:
+        # Find the parent elements and look for the count
+        parent = follower_text.parent
+        if parent:
+            count_span = parent.find_previous('span', class_=re.compile(r'html-span'))
+            if count_span:
+                count_text = count_span.get_text().strip()
+                return int(count_text.replace(',', ''))
+    return None
+
+
+EXTRACTORS = {
+    'facebook': [
+        ('regex', facebook_followers_link),
+        ('json', facebook_followers_json),
+        ('lxml', facebook_lxml),
+        ('soup', facebook_soup),
+    ],
+    'instagram': [
+        ('json', instagram_followed_by_json),
+        ('meta', instagram_meta_description),
+        ('regex', instagram_span_title),
+        ('lxml', instagram_lxml),
+        ('soup', instagram_soup),
+    ],
+}
+
+
+def extractors(platform):
+    """(name, function) pairs for a platform, in the order they are tried"""
+    return [(name, extract) for name, extract in EXTRACTORS[platform]
+            if name != 'lxml' or lxml_html is not None]
+
+
+def extract_follower_count(platform, html):
+    """(count, extractor name) from page HTML (bytes or str), or (None, None)"""
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    for name, extract in extractors(platform):
+        try:
+            count = extract(html)
+        except Exception as e:
+            print(f"{platform} {name} extractor failed: {e}")
+            continue
+        if count is not None:
+            return count, name
+    return None, None
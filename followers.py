@@ -0,0 +1,240 @@
+"""
+Follower-count time series on the main database.
+
+social_media_followers holds one sample per (platform, username, day), where
+day is the local (Europe/London) date; writing a second sample the same day
+replaces the first with a single INSERT ... ON CONFLICT. Every write also
+maintains, in the same transaction:
+
+- social_media_followers_latest: the newest sample per account, so "current
+  followers" is a primary-key lookup
+- social_media_followers_rollup: first / last / min / max per account per
+  week (ISO, starting Monday) and per month, recounted for the periods a
+  batch touched
+
+follower_series() answers a date range at day, week or month resolution with
+one index range scan, including the change from the previous point.
+"""
+import sys
+from datetime import date, timedelta
+
+from psycopg2.extras import execute_values
+
+from dateparse import local_today
+
+INTERVALS = ('day', 'week', 'month')
+ROLLUP_PAGE_SIZE = 200
+
+
+def init_followers(conn):
+    """Create the follower tables, migrating an old social_media_followers in place"""
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS social_media_followers (
+        id SERIAL PRIMARY KEY,
+        platform TEXT NOT NULL,
+        username TEXT NOT NULL,
+        follower_count INTEGER NOT NULL,
+        scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        day DATE
+    )''')
+    c.execute("SELECT to_regclass('idx_social_followers_day')")
+    if c.fetchone()[0] is None:
+        # Tables from before the daily key: one row per day, keeping the latest sample
+        c.execute('ALTER TABLE social_media_followers ADD COLUMN IF NOT EXISTS day DATE')
+        c.execute('UPDATE social_media_followers SET day = scraped_at::date WHERE day IS NULL')
+        c.execute('''DELETE FROM social_media_followers a
+                     USING social_media_followers b
+                     WHERE a.platform = b.platform AND a.username = b.username AND a.day = b.day
+                       AND (a.scraped_at, a.id) < (b.scraped_at, b.id)''')
+        c.execute('ALTER TABLE social_media_followers ALTER COLUMN day SET NOT NULL')
+        c.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_social_followers_day
+                     ON social_media_followers (platform, username, day)''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS social_media_followers_latest (
+        platform TEXT NOT NULL,
+        username TEXT NOT NULL,
+        follower_count INTEGER NOT NULL,
+        day DATE NOT NULL,
+        scraped_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (platform, username)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS social_media_followers_rollup (
+        period TEXT NOT NULL,
+        platform TEXT NOT NULL,
+        username TEXT NOT NULL,
+        period_start DATE NOT NULL,
+        first_count INTEGER NOT NULL,
+        last_count INTEGER NOT NULL,
+        min_count INTEGER NOT NULL,
+        max_count INTEGER NOT NULL,
+        samples INTEGER NOT NULL,
+        PRIMARY KEY (period, platform, username, period_start)
+    )''')
+
+
+def period_start(day, period):
+    """First day of the week (Monday) or month containing day"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def period_end(start, period):
+    """First day after the period beginning at start"""
+    if period == 'week':
+        return start + timedelta(days=7)
+    if period == 'month':
+        return date(start.year + 1, 1, 1) if start.month == 12 else date(start.year, start.month + 1, 1)
+    return start + timedelta(days=1)
+
+
+def refresh_rollups(conn, keys):
+    """Recompute the week and month rollups containing (platform, username, day) keys"""
+    periods = sorted({(period, platform, username, period_start(day, period),
+                       period_end(period_start(day, period), period))
+                      for platform, username, day in keys for period in ('week', 'month')})
+    if not periods:
+        return
+    c = conn.cursor()
+    execute_values(c, '''
+        INSERT INTO social_media_followers_rollup AS r
+            (period, platform, username, period_start, first_count, last_count, min_count, max_count, samples)
+        SELECT p.period, p.platform, p.username, p.period_start,
+               (ARRAY_AGG(f.follower_count ORDER BY f.day))[1],
+               (ARRAY_AGG(f.follower_count ORDER BY f.day DESC))[1],
+               MIN(f.follower_count), MAX(f.follower_count), COUNT(*)
+        FROM (VALUES %s) AS p (period, platform, username, period_start, period_end)
+        JOIN social_media_followers f
+          ON f.platform = p.platform AND f.username = p.username
+         AND f.day >= p.period_start AND f.day < p.period_end
+        GROUP BY p.period, p.platform, p.username, p.period_start
+        ON CONFLICT (period, platform, username, period_start) DO UPDATE SET
+            first_count = EXCLUDED.first_count, last_count = EXCLUDED.last_count,
+            min_count = EXCLUDED.min_count, max_count = EXCLUDED.max_count,
+            samples = EXCLUDED.samples
+    ''', periods, page_size=ROLLUP_PAGE_SIZE)
+
+
+def save_follower_counts(conn, samples, day=None):
+    """Upsert (platform, username, count) samples for one day; returns rows written
+
+    Samples with a count of None are skipped. Later duplicates in a batch win.
+    """
+    day = day or local_today()
+    rows = {}
+    for platform, username, count in samples:
+        if count is not None:
+            rows[(platform, username)] = (platform, username, int(count), day)
+    if not rows:
+        return 0
+
+    c = conn.cursor()
+    execute_values(c, '''
+        INSERT INTO social_media_followers (platform, username, follower_count, day)
+        VALUES %s
+        ON CONFLICT (platform, username, day) DO UPDATE SET
+            follower_count = EXCLUDED.follower_count, scraped_at = CURRENT_TIMESTAMP
+    ''', list(rows.values()))
+    # Backfilling an older day must not replace a newer latest value
+    execute_values(c, '''
+        INSERT INTO social_media_followers_latest AS l (platform, username, follower_count, day, scraped_at)
+        VALUES %s
+        ON CONFLICT (platform, username) DO UPDATE SET
+            follower_count = EXCLUDED.follower_count, day = EXCLUDED.day, scraped_at = EXCLUDED.scraped_at
+        WHERE EXCLUDED.day >= l.day
+    ''', list(rows.values()), template='(%s, %s, %s, %s, CURRENT_TIMESTAMP)')
+    refresh_rollups(conn, [(platform, username, day) for platform, username, _, day in rows.values()])
+    return len(rows)
+
+
+def latest_follower_counts(conn):
+    """{platform: {username: count}} from the latest-value table"""
+    c = conn.cursor()
+    c.execute('SELECT platform, username, follower_count FROM social_media_followers_latest')
+    latest = {}
+    for platform, username, count in c.fetchall():
+        latest.setdefault(platform, {})[username] = count
+    return latest
+
+
+SERIES_SQL = {
+    'day': '''
+        SELECT platform, username, day, follower_count,
+               follower_count - LAG(follower_count) OVER account
+        FROM social_media_followers
+        WHERE {accounts} day >= %(start)s AND day < %(end)s
+        WINDOW account AS (PARTITION BY platform, username ORDER BY day)
+        ORDER BY platform, username, day
+    ''',
+    'rollup': '''
+        SELECT platform, username, period_start, last_count,
+               last_count - LAG(last_count) OVER account
+        FROM social_media_followers_rollup
+        WHERE period = %(period)s AND {accounts} period_start >= %(start)s AND period_start < %(end)s
+        WINDOW account AS (PARTITION BY platform, username ORDER BY period_start)
+        ORDER BY platform, username, period_start
+    ''',
+}
+
+
+def follower_series(conn, start, end, interval='day', platform=None, username=None):
+    """Follower counts per account between start and end (inclusive dates)
+
+    Returns [{'platform', 'username', 'points': [{'date', 'count', 'change'}],
+    'growth'}], where change is against the previous point in the range and
+    growth is last minus first. Weeks and months are labelled by their first
+    day and use the last count seen in them.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {', '.join(INTERVALS)}")
+    params = {'period': interval, 'start': period_start(start, interval), 'end': end + timedelta(days=1),
+              'platform': platform, 'username': username}
+    accounts = ''
+    if platform:
+        accounts += 'platform = %(platform)s AND '
+    if username:
+        accounts += 'username = %(username)s AND '
+
+    c = conn.cursor()
+    c.execute(SERIES_SQL['day' if interval == 'day' else 'rollup'].format(accounts=accounts), params)
+    series = []
+    for account_platform, account_username, day, count, change in c.fetchall():
+        if not series or (series[-1]['platform'], series[-1]['username']) != (account_platform, account_username):
+            series.append({'platform': account_platform, 'username': account_username, 'points': []})
+        series[-1]['points'].append({'date': day.isoformat(), 'count': count, 'change': change})
+    for account in series:
+        account['growth'] = account['points'][-1]['count'] - account['points'][0]['count']
+    return series
+
+
+def main():
+    """Create or migrate the follower tables and rebuild every rollup"""
+    from db import close_pool, get_connection
+
+    try:
+        with get_connection() as conn:
+            init_followers(conn)
+            c = conn.cursor()
+            c.execute('SELECT platform, username, day FROM social_media_followers')
+            keys = c.fetchall()
+            c.execute('DELETE FROM social_media_followers_rollup')
+            refresh_rollups(conn, keys)
+            c.execute('''INSERT INTO social_media_followers_latest
+                             (platform, username, follower_count, day, scraped_at)
+                         SELECT DISTINCT ON (platform, username)
+                                platform, username, follower_count, day, scraped_at
+                         FROM social_media_followers
+                         ORDER BY platform, username, day DESC
+                         ON CONFLICT (platform, username) DO UPDATE SET
+                             follower_count = EXCLUDED.follower_count, day = EXCLUDED.day,
+                             scraped_at = EXCLUDED.scraped_at''')
+    finally:
+        close_pool()
+    print(f"Rebuilt follower rollups from {len(keys)} daily samples")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Responsive image markup for the templates, from build_images.py's manifest.
+
+init_images(app) loads static/img/images.json and registers two template
+globals:
+
+    {{ responsive_image('BEARD_logo_RGB_full_large.png', 'BEARD logo',
+                        sizes='(max-width: 400px) 100vw, 400px', class='logo') }}
+        -> <picture> with AVIF / WebP / original srcsets and an <img> fallback
+
+    {{ background_image_rules('.hero', 'hero-background.jpg', layers='linear-gradient(...)') }}
+        -> CSS setting background-image per viewport width: a plain url() of
+           the original format, then an image-set() that browsers without
+           type() support drop, keeping the url()
+
+Without a build both fall back to the original file, so templates render the
+same markup in development.
+"""
+import json
+import os
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+MANIFEST_PATH = os.path.join('img', 'images.json')
+# Browsers take the first format they support, so the smallest comes first
+FORMAT_PREFERENCE = ('image/avif', 'image/webp')
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, MANIFEST_PATH)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        print(f"Ignoring unreadable image manifest: {e}")
+        return {}
+
+
+def _by_preference(sources):
+    def rank(mime):
+        return FORMAT_PREFERENCE.index(mime) if mime in FORMAT_PREFERENCE else len(FORMAT_PREFERENCE)
+
+    return sorted(sources.items(), key=lambda item: rank(item[0]))
+
+
+def _static(filename):
+    return url_for('static', filename=filename)
+
+
+def _srcset(files):
+    return ', '.join(f'{_static(filename)} {width}w' for filename, width in files)
+
+
+def _attributes(attrs):
+    return ''.join(f' {escape(name.rstrip("_").replace("_", "-"))}="{escape(value)}"'
+                   for name, value in attrs.items() if value is not None)
+
+
+def make_responsive_image(manifest):
+    def responsive_image(name, alt, sizes='100vw', loading='lazy', **attrs):
+        image = manifest.get(name)
+        if image is None:
+            return Markup(f'<img src="{escape(_static(name))}" alt="{escape(alt)}"'
+                          f'{_attributes(dict(attrs, loading=loading))}>')
+
+        parts = ['<picture>']
+        for mime, files in _by_preference(image['sources']):
+            if mime != image['type']:
+                parts.append(f'<source type="{mime}" srcset="{escape(_srcset(files))}" '
+                             f'sizes="{escape(sizes)}">')
+        fallback = image['sources'][image['type']]
+        parts.append(f'<img src="{escape(_static(fallback[-1][0]))}" '
+                     f'srcset="{escape(_srcset(fallback))}" sizes="{escape(sizes)}" alt="{escape(alt)}"'
+                     f'{_attributes(dict(attrs, loading=loading))}>')
+        parts.append('</picture>')
+        return Markup(''.join(parts))
+
+    return responsive_image
+
+
+def make_background_image_rules(manifest):
+    def background_image_rules(selector, name, layers=''):
+        image = manifest.get(name)
+        if image is None:
+            return Markup('')
+        # background-image replaces every layer, so the ones drawn over the image come along
+        prefix = f'{layers}, ' if layers else ''
+
+        def declarations(index):
+            # No var(): a declaration the browser cannot parse is dropped and the
+            # url() before it applies, where a custom property would void both
+            fallback = image['sources'][image['type']][index][0]
+            urls = []
+            for mime, files in _by_preference(image['sources']):
+                filename = files[min(index, len(files) - 1)][0]
+                urls.append(f'url("{_static(filename)}") type("{mime}")')
+            return (f'background-image: {prefix}url("{_static(fallback)}"); '
+                    f'background-image: {prefix}image-set({", ".join(urls)});')
+
+        # Largest first, then narrower viewports override it
+        widths = [width for _, width in image['sources'][image['type']]]
+        rules = [f'{selector} {{ {declarations(len(widths) - 1)} }}']
+        for index in range(len(widths) - 2, -1, -1):
+            rules.append(f'@media (max-width: {widths[index]}px) '
+                         f'{{ {selector} {{ {declarations(index)} }} }}')
+        return Markup('\n'.join(rules))
+
+    return background_image_rules
+
+
+def init_images(app):
+    """Register responsive_image() and background_image_rules() as template globals"""
+    manifest = load_manifest(app.static_folder)
+    app.jinja_env.globals.update(
+        responsive_image=make_responsive_image(manifest),
+        background_image_rules=make_background_image_rules(manifest),
+    )
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Standalone ingest worker: runs the scraping jobs outside the web processes.
+
+Usage:
+    python ingest.py worker              # run the daily schedule forever
+    python ingest.py run events          # run one job now
+    python ingest.py run followers
+    python ingest.py history [job]       # show recent runs
+
+Every run takes a Postgres advisory lock for its job, so however many worker
+processes or containers are started, a job never runs twice at once, and a
+scheduled slot that already succeeded (or exhausted its retries) is skipped. Runs are recorded
+in ingest_runs. The lock is session-level, so DATABASE_URL must point at a
+direct connection or a session-mode pooler.
+"""
+import os
+import socket
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from dateparse import LOCAL_TZ
+from db import close_pool, get_connection
+
+# Load environment variables
+load_dotenv()
+
+LOCK_NAMESPACE = 0x42454152  # "BEAR"
+MAX_ATTEMPTS = int(os.getenv('INGEST_MAX_ATTEMPTS', '3'))
+RETRY_BACKOFF = float(os.getenv('INGEST_RETRY_BACKOFF', '60'))  # seconds, doubled per attempt
+POLL_INTERVAL = float(os.getenv('INGEST_POLL_INTERVAL', '60'))  # seconds between schedule checks
+
+
+def run_events_job():
+    """Scrape new or changed Facebook events and store them"""
+    from event_store import load_known_listings, save_events_to_db
+    from scraper import scrape_facebook_events
+
+    events = scrape_facebook_events(load_known_listings())
+    if not events:
+        return 0
+    counts = save_events_to_db(events)
+    return counts['staged']
+
+
+def run_followers_job():
+    """Update social media follower counts"""
+    from update_followers import update_all_followers
+
+    return update_all_followers()
+
+
+JOBS = {
+    'events': run_events_job,
+    'followers': run_followers_job,
+}
+
+
+def parse_schedule(value):
+    """Parse INGEST_SCHEDULE, e.g. "events=2,followers=3" (daily local hour per job)"""
+    schedule = {}
+    for part in value.split(','):
+        if not part.strip():
+            continue
+        job, hour = part.split('=')
+        job = job.strip()
+        if job not in JOBS:
+            raise ValueError(f"Unknown job in INGEST_SCHEDULE: {job}")
+        schedule[job] = int(hour)
+    return schedule
+
+
+SCHEDULE = parse_schedule(os.getenv('INGEST_SCHEDULE', 'events=2,followers=3'))
+
+
+def init_ingest_db():
+    """Create the run history table"""
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute('''CREATE TABLE IF NOT EXISTS ingest_runs (
+            id SERIAL PRIMARY KEY,
+            job TEXT NOT NULL,
+            scheduled_for TIMESTAMPTZ,
+            started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            finished_at TIMESTAMPTZ,
+            status TEXT NOT NULL DEFAULT 'running',
+            attempt INTEGER NOT NULL DEFAULT 1,
+            items INTEGER,
+            error TEXT,
+            host TEXT
+        )''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_ingest_runs_job_scheduled ON ingest_runs(job, scheduled_for)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_ingest_runs_started_at ON ingest_runs(started_at)')
+
+
+def lock_key(job):
+    return zlib.crc32(job.encode('utf-8')) & 0x7fffffff
+
+
+def slot_done(c, job, scheduled_for):
+    """True if a scheduled slot succeeded or already used up its retries"""
+    c.execute('''SELECT COUNT(*) FILTER (WHERE status = 'success'),
+                        COUNT(*) FILTER (WHERE status = 'failed')
+                 FROM ingest_runs
+                 WHERE job = %s AND scheduled_for = %s''', (job, scheduled_for))
+    succeeded, failed = c.fetchone()
+    return succeeded > 0 or failed >= MAX_ATTEMPTS
+
+
+def record_start(job, scheduled_for, attempt):
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute('''INSERT INTO ingest_runs (job, scheduled_for, attempt, host)
+                     VALUES (%s, %s, %s, %s) RETURNING id''',
+                  (job, scheduled_for, attempt, socket.gethostname()))
+        return c.fetchone()[0]
+
+
+def record_finish(run_id, status, items=None, error=None):
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute('''UPDATE ingest_runs
+                     SET finished_at = NOW(), status = %s, items = %s, error = %s
+                     WHERE id = %s''', (status, items, error, run_id))
+
+
+def run_job(job, scheduled_for=None):
+    """Run a job under its advisory lock, retrying with backoff
+
+    Returns True if the job ran successfully, False if it failed or another
+    process held the lock (or already completed this scheduled slot).
+    """
+    func = JOBS[job]
+    with get_connection() as lock_conn:
+        # Session lock on its own connection; autocommit so it is not tied to a transaction
+        lock_conn.autocommit = True
+        c = lock_conn.cursor()
+        c.execute('SELECT pg_try_advisory_lock(%s, %s)', (LOCK_NAMESPACE, lock_key(job)))
+        if not c.fetchone()[0]:
+            print(f"[ingest] {job}: another process holds the lock, skipping")
+            lock_conn.autocommit = False
+            return False
+        try:
+            if scheduled_for is not None and slot_done(c, job, scheduled_for):
+                print(f"[ingest] {job}: slot {scheduled_for} already completed")
+                return False
+
+            delay = RETRY_BACKOFF
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                run_id = record_start(job, scheduled_for, attempt)
+                started = time.monotonic()
+                try:
+                    items = func()
+                except Exception as e:
+                    record_finish(run_id, 'failed', error=str(e)[:2000])
+                    print(f"[ingest] {job}: attempt {attempt}/{MAX_ATTEMPTS} failed: {e}")
+                    if attempt == MAX_ATTEMPTS:
+                        return False
+                    time.sleep(delay)
+                    delay *= 2
+                    continue
+                record_finish(run_id, 'success', items=items)
+                print(f"[ingest] {job}: finished in {time.monotonic() - started:.1f}s ({items} items)")
+                return True
+        finally:
+            c.execute('SELECT pg_advisory_unlock(%s, %s)', (LOCK_NAMESPACE, lock_key(job)))
+            lock_conn.autocommit = False
+
+
+def latest_slot(hour, now=None):
+    """Most recent scheduled time (daily at hour, local time) at or before now"""
+    now = now or datetime.now(LOCAL_TZ)
+    slot = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if slot > now:
+        slot -= timedelta(days=1)
+    return slot
+
+
+def due_jobs(now=None):
+    """Jobs whose latest scheduled slot has not run to completion yet"""
+    due = []
+    with get_connection() as conn:
+        c = conn.cursor()
+        for job, hour in SCHEDULE.items():
+            slot = latest_slot(hour, now)
+            if not slot_done(c, job, slot):
+                due.append((job, slot))
+    return due
+
+
+def run_worker():
+    """Run scheduled jobs forever"""
+    print(f"[ingest] worker started, schedule: {SCHEDULE}")
+    while True:
+        try:
+            for job, slot in due_jobs():
+                run_job(job, scheduled_for=slot)
+        except Exception as e:
+            print(f"[ingest] schedule check failed: {e}")
+        time.sleep(POLL_INTERVAL)
+
+
+def print_history(job=None, limit=20):
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute('''SELECT job, scheduled_for, started_at, finished_at, status, attempt, items, error
+                     FROM ingest_runs
+                     WHERE %s IS NULL OR job = %s
+                     ORDER BY started_at DESC
+                     LIMIT %s''', (job, job, limit))
+        for row in c.fetchall():
+            job_name, scheduled_for, started_at, finished_at, status, attempt, items, error = row
+            duration = f"{(finished_at - started_at).total_seconds():.1f}s" if finished_at else '-'
+            print(f"{started_at:%Y-%m-%d %H:%M} {job_name:10} {status:8} attempt {attempt} "
+                  f"{duration:>8} items={items} {error or ''}")
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in ('worker', 'run', 'history'):
+        print(__doc__)
+        return 2
+
+    init_ingest_db()
+    try:
+        if argv[1] == 'worker':
+            run_worker()
+        elif argv[1] == 'run':
+            if len(argv) < 3 or argv[2] not in JOBS:
+                print(f"Usage: python ingest.py run [{'|'.join(JOBS)}]")
+                return 2
+            return 0 if run_job(argv[2]) else 1
+        else:
+            print_history(argv[2] if len(argv) > 2 else None)
+    finally:
+        close_pool()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,248 @@
+"""
+Timing spans, request metrics and an opt-in profiler for the request path.
+
+Disabled by default (INSTRUMENT=1 or enable() turns it on). When enabled,
+span() records each stage into a latency histogram, and connections opened by
+db.py time every query under "db.query". When disabled, span() returns a
+shared no-op context manager.
+
+    with span('render'):
+        html = render_template(...)
+
+render_prometheus() formats everything recorded in this process in the
+Prometheus text exposition format for GET /metrics. Profiler profiles single
+requests on demand: send "X-Profile: <PROFILE_TOKEN>" and the request's
+cProfile stats are written to PROFILE_DIR.
+"""
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import psycopg2.extensions
+
+_enabled = os.getenv('INSTRUMENT', '0') == '1'
+_lock = threading.Lock()
+_histograms = {}  # (metric, labels) -> Histogram
+_counters = {}  # (metric, labels) -> value
+_NOOP = nullcontext()
+
+SPAN_METRIC = 'beard_span_duration_seconds'
+REQUEST_METRIC = 'beard_http_request_duration_seconds'
+REQUEST_COUNTER = 'beard_http_requests_total'
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HELP = {
+    SPAN_METRIC: 'Time spent in instrumented stages of the request path',
+    REQUEST_METRIC: 'Request latency by endpoint',
+    REQUEST_COUNTER: 'Requests by endpoint, method and status',
+}
+
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_DIR = os.getenv('PROFILE_DIR', '/tmp/beard-profiles')
+
+
+class Histogram:
+    """Cumulative latency histogram with Prometheus bucket bounds"""
+
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def observe(metric, seconds, **labels):
+    """Add one observation to a histogram"""
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+
+def increment(metric, amount=1, **labels):
+    """Add to a counter"""
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def record(name, seconds):
+    """Add one timed occurrence of a stage"""
+    observe(SPAN_METRIC, seconds, span=name)
+
+
+@contextmanager
+def _timed(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def span(name):
+    """Context manager timing a stage (no-op unless instrumentation is enabled)"""
+    return _timed(name) if _enabled else _NOOP
+
+
+def record_request(endpoint, method, status, seconds):
+    """Count a finished request and add it to the latency histogram"""
+    if not _enabled:
+        return
+    endpoint = endpoint or 'unmatched'
+    observe(REQUEST_METRIC, seconds, endpoint=endpoint)
+    increment(REQUEST_COUNTER, endpoint=endpoint, method=method, status=str(status))
+
+
+def snapshot():
+    """Per-stage totals: {name: {'count', 'total', 'max'}} in seconds"""
+    with _lock:
+        return {dict(labels)['span']: {'count': h.count, 'total': h.total, 'max': h.max}
+                for (metric, labels), h in _histograms.items() if metric == SPAN_METRIC}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def render_prometheus(extra=()):
+    """Prometheus text format for this process's metrics
+
+    extra is an iterable of (metric, type, help, {labels tuple: value}) for
+    gauges and counters owned by other modules (pool, caches).
+    """
+    with _lock:
+        histograms = sorted((key, (list(h.buckets), h.count, h.total)) for key, h in _histograms.items())
+        counters = sorted(_counters.items())
+
+    lines = []
+    described = set()
+
+    def describe(metric, kind, help_text):
+        if metric not in described:
+            described.add(metric)
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} {kind}')
+
+    for (metric, labels), (buckets, count, total) in histograms:
+        describe(metric, 'histogram', HELP.get(metric, metric))
+        cumulative = 0
+        for bound, bucket in zip(BUCKETS, buckets):
+            cumulative += bucket
+            lines.append(f'{metric}_bucket{_labels(labels, [("le", repr(bound))])} {cumulative}')
+        lines.append(f'{metric}_bucket{_labels(labels, [("le", "+Inf")])} {count}')
+        lines.append(f'{metric}_sum{_labels(labels)} {total:.6f}')
+        lines.append(f'{metric}_count{_labels(labels)} {count}')
+
+    for (metric, labels), value in counters:
+        describe(metric, 'counter', HELP.get(metric, metric))
+        lines.append(f'{metric}{_labels(labels)} {value}')
+
+    for metric, kind, help_text, samples in extra:
+        describe(metric, kind, help_text)
+        for labels, value in samples.items():
+            lines.append(f'{metric}{_labels(labels)} {value}')
+
+    return '\n'.join(lines) + '\n'
+
+
+class Profiler:
+    """cProfile one request at a time when it carries the profiling token"""
+
+    def __init__(self, token=PROFILE_TOKEN, directory=PROFILE_DIR):
+        self.token = token
+        self.directory = directory
+        self._busy = threading.Lock()
+
+    def wanted(self, header_value):
+        return bool(self.token and header_value
+                    and hmac.compare_digest(header_value.encode(), self.token.encode()))
+
+    def start(self):
+        """Start profiling this thread; returns the profile, or None if one is already running"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def finish(self, profile, name):
+        """Stop profiling and write NAME.prof plus a text summary; returns the .prof path"""
+        try:
+            profile.disable()
+        finally:
+            self._busy.release()
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}")
+        profile.dump_stats(base + '.prof')
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(40)
+        with open(base + '.txt', 'w') as f:
+            f.write(summary.getvalue())
+        return base + '.prof'
+
+
+class QueryTimingCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that records every execute() under "db.query" """
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record('db.query', time.perf_counter() - started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record('db.query', time.perf_counter() - started)
+
+
+def cursor_factory():
+    """Cursor class for new connections: timing cursors only while enabled"""
+    return QueryTimingCursor if _enabled else None
@@ -0,0 +1,173 @@
+"""
+Single-pass extraction of events from page text.
+
+Both text fallbacks in scraper.py read events out of a page's text one line
+at a time. The page is split once, and each line is tested against one
+precompiled alternation of all the date formats and one alternation of the
+venue keywords. An explicit state machine walks the lines, so every line is
+looked at once.
+
+- scan_title_first() reads the requests fallback's layout. A "BEARD @"
+  title starts an event, the first date after it is its date, and the first
+  line after that with a venue keyword is its location.
+- scan_date_first() reads the Selenium events list's layout. A line that
+  starts with a date is followed by the title and then the location.
+
+Each returns candidates {'title', 'date', 'location', 'line', 'confidence',
+'date_format'}. confidence adds up what was recognised: the title, a date
+(more for one with a time), and a location (more when it names a known
+kind of venue). Callers decide what is good enough.
+
+html_text() turns HTML into the same text BeautifulSoup's get_text() gives
+(script, style and comments dropped, entities decoded) with a few regex
+passes, without building a tree. `capture.py replay --check-text` compares the
+two over captured pages.
+"""
+import re
+from html import unescape
+
+# scan_title_first: searched anywhere in the line, case-insensitively. Where
+# formats overlap at the same position the earlier alternative wins, so a date
+# with a time is preferred to the same date without.
+TITLE_FIRST_DATE_RE = re.compile(r'''
+      (?P<weekday_time>\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+at\s+\d{1,2}:\d{2})
+    | (?P<weekday>\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec))
+    | (?P<tomorrow_time>Tomorrow\ at\ \d{1,2}:\d{2})
+    | (?P<day_month_year>\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})
+    | (?P<iso>\b\d{4}-\d{2}-\d{2})
+''', re.IGNORECASE | re.VERBOSE)
+
+# scan_date_first: the whole date must start the line, as Facebook lists it
+DATE_FIRST_DATE_RE = re.compile(r'''
+      (?P<weekday_month_day_time>(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}\s+at\s+\d{1,2}:\d{2}\s+(?:AM|PM)\s+(?:GMT|BST))
+    | (?P<weekday_day_month_time>(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun),\s+\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+at\s+\d{1,2}:\d{2}\s+(?:GMT|BST))
+    | (?P<relative_time>(?:Today|Tomorrow)\s+at\s+\d{1,2}:\d{2})
+    | (?P<sunday_time>Sun,\s+\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+at\s+\d{1,2}:\d{2})
+''', re.VERBOSE)
+
+TIMED_FORMATS = {'weekday_time', 'tomorrow_time', 'weekday_month_day_time',
+                 'weekday_day_month_time', 'relative_time', 'sunday_time'}
+
+VENUE_KEYWORDS = ['southsea', 'eastleigh', 'portsmouth', 'brew', 'pub', 'bar', 'venue']
+VENUE_RE = re.compile('|'.join(re.escape(keyword) for keyword in VENUE_KEYWORDS), re.IGNORECASE)
+
+MAX_TITLE_LENGTH = 100
+MAX_LOCATION_LENGTH = 100
+
+# States
+SEEK_TITLE = 'seek_title'
+SEEK_DATE = 'seek_date'
+SEEK_LOCATION = 'seek_location'
+EXPECT_TITLE = 'expect_title'
+EXPECT_LOCATION = 'expect_location'
+
+_SKIPPED_MARKUP_RE = re.compile(r'<!--.*?-->|<(script|style|template)\b[^>]*>.*?</\1\s*>|<![^>]*>|<\?[^>]*>',
+                                re.DOTALL | re.IGNORECASE)
+# A "<" not followed by a tag name, "/" or "!" is text, as in "1 < 2"
+_TAG_RE = re.compile(r'''<[A-Za-z/!](?:"[^"]*"|'[^']*'|[^'">])*>''')
+
+
+def html_text(html):
+    """Text content of an HTML page (bytes or str), like BeautifulSoup(html).get_text()"""
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', 'replace')
+    return unescape(_TAG_RE.sub('', _SKIPPED_MARKUP_RE.sub('', html)))
+
+
+def confidence(title_score, date_format, location_score):
+    date_score = 0.0 if date_format is None else 0.3 if date_format in TIMED_FORMATS else 0.2
+    return round(min(1.0, title_score + date_score + location_score), 2)
+
+
+def candidate(title, line, title_score):
+    return {'title': title, 'date': None, 'location': None, 'line': line,
+            'date_format': None, 'confidence': 0.0, '_title_score': title_score, '_location_score': 0.0}
+
+
+def finish(current):
+    current['confidence'] = confidence(current.pop('_title_score'), current['date_format'],
+                                       current.pop('_location_score'))
+    return current
+
+
+def scan_title_first(lines):
+    """Candidates from "BEARD @" title / date / venue lines, in one pass; needs title and date"""
+    candidates = []
+    current = None
+    state = SEEK_TITLE
+    for number, line in enumerate(lines):
+        # A title starts a new event in any state
+        if 'BEARD @' in line:
+            line = line.strip()
+            if len(line) < MAX_TITLE_LENGTH:
+                if current is not None:
+                    candidates.append(finish(current))
+                current = candidate(line, number, 0.4)
+                state = SEEK_DATE
+                continue
+        if state == SEEK_TITLE:
+            continue  # between events nothing else is looked at
+        line = line.strip()
+        if not line:
+            continue
+
+        if state == SEEK_DATE:
+            match = TITLE_FIRST_DATE_RE.search(line)
+            if match:
+                current['date'] = match.group()
+                current['date_format'] = match.lastgroup
+                state = SEEK_LOCATION
+        elif state == SEEK_LOCATION:
+            if len(line) < MAX_LOCATION_LENGTH and VENUE_RE.search(line):
+                current['location'] = line
+                current['_location_score'] = 0.3
+                state = SEEK_TITLE  # until the next title
+
+    if current is not None:
+        candidates.append(finish(current))
+    return [c for c in candidates if c['date']]
+
+
+def is_beard_title(title):
+    return 'beard' in title.lower() or '@' in title
+
+
+def scan_date_first(lines, limit=None, seen=()):
+    """Candidates from date / title / location line triples, in one pass
+
+    Triples whose title does not look like a BEARD gig are skipped. Stops at
+    limit candidates. (title, date) pairs in seen, or already found, are not
+    repeated.
+    """
+    candidates = []
+    found = set(seen)
+    state = SEEK_DATE
+    current = None
+    number = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if limit is not None and len(candidates) >= limit:
+            break
+
+        if state == SEEK_DATE:
+            match = DATE_FIRST_DATE_RE.match(line)
+            if match:
+                current = {'date': line, 'date_format': match.lastgroup, 'line': number}
+                state = EXPECT_TITLE
+        elif state == EXPECT_TITLE:
+            current['title'] = line
+            state = EXPECT_LOCATION
+        else:  # EXPECT_LOCATION
+            title, date = current['title'], current['date']
+            if is_beard_title(title) and (title, date) not in found:
+                found.add((title, date))
+                title_score = 0.4 if 'beard @' in title.lower() else 0.3
+                location_score = 0.3 if VENUE_RE.search(line) else 0.1
+                candidates.append({'title': title, 'date': date, 'location': line, 'line': current['line'],
+                                   'date_format': current['date_format'],
+                                   'confidence': confidence(title_score, current['date_format'], location_score)})
+            state = SEEK_DATE
+        number += 1
+    return candidates
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Deduplicate beard_events and create the identity index the bulk upsert needs.
+
+event_store.py merges scraped events with INSERT ... ON CONFLICT on
+idx_beard_events_identity, a unique index on (name, COALESCE(location, ''),
+timestamp). Tables written by the old per-row saves or the Supabase importer
+can hold several rows per identity, and CREATE UNIQUE INDEX fails on those.
+This keeps the newest row of each identity (latest updated, then highest id),
+deletes the rest, creates the index, and adds the fingerprint column and fills
+it in for rows that have none. It runs without the pool's statement timeout, and the ingest worker
+refuses to save events until it has run (supabase_schema.sql does the same).
+
+Usage:
+    python migrate_event_identity.py            # deduplicate, index and backfill
+    python migrate_event_identity.py --dry-run  # print the duplicates that would be removed
+"""
+import sys
+from datetime import datetime
+
+from db import close_pool, get_connection
+from event_store import FINGERPRINT_SQL
+
+# Rows with no name or timestamp never conflict (NULLs are distinct in the index)
+DUPLICATES_SQL = """
+    SELECT id, name, location, timestamp
+    FROM (SELECT id, name, location, timestamp,
+                 ROW_NUMBER() OVER (PARTITION BY name, COALESCE(location, ''), timestamp
+                                    ORDER BY updated DESC NULLS LAST, id DESC) AS newest
+          FROM beard_events
+          WHERE name IS NOT NULL AND timestamp IS NOT NULL) ranked
+    WHERE newest > 1
+    ORDER BY name, timestamp, id
+"""
+
+SCHEMA_STATEMENTS = [
+    'ALTER TABLE beard_events ADD COLUMN IF NOT EXISTS fingerprint TEXT',
+    '''CREATE UNIQUE INDEX IF NOT EXISTS idx_beard_events_identity
+       ON beard_events (name, (COALESCE(location, '')), timestamp)''',
+    f'UPDATE beard_events SET fingerprint = {FINGERPRINT_SQL.format(p="")} WHERE fingerprint IS NULL',
+]
+
+
+def main(argv):
+    dry_run = '--dry-run' in argv
+    started = datetime.now()
+    try:
+        with get_connection() as conn:
+            c = conn.cursor()
+            c.execute('SET LOCAL statement_timeout = 0')
+            c.execute(DUPLICATES_SQL)
+            duplicates = c.fetchall()
+            for event_id, name, location, timestamp in duplicates if dry_run else ():
+                print(f"{event_id:6} {name!r:40} {location or '':30} {timestamp.isoformat()}")
+            if dry_run:
+                conn.rollback()
+            else:
+                c.execute('DELETE FROM beard_events WHERE id = ANY(%s)', ([row[0] for row in duplicates],))
+                for statement in SCHEMA_STATEMENTS:
+                    c.execute(statement)
+                print(f"Filled in {c.rowcount} fingerprints")
+    finally:
+        close_pool()
+    print(f"{len(duplicates)} duplicate rows {'would be ' if dry_run else ''}removed")
+    print(f"Done in {(datetime.now() - started).total_seconds():.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
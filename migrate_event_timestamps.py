@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Add a canonical start time to the legacy events table and backfill it.
+
+events.date holds free text ("Fri, 28 Nov at 21:00", "Tomorrow at 19:00",
+"September 10, 2025"). This adds events.starts_at TIMESTAMPTZ (the original
+text is kept), parses every row once, anchoring relative dates and missing
+years to the row's scraped_at, and creates the start-time indexes used by
+load_events_from_db() and load_events_from_beard_events(). It runs without
+the pool's statement timeout.
+
+Usage:
+    python migrate_event_timestamps.py            # migrate and backfill
+    python migrate_event_timestamps.py --dry-run  # print what would be written
+    python migrate_event_timestamps.py --all      # re-parse rows that already have starts_at
+"""
+import sys
+from datetime import datetime, timezone
+
+from psycopg2.extras import execute_values
+
+from dateparse import parse_event_date
+from db import close_pool, get_connection
+
+BATCH_SIZE = 500
+
+SCHEMA_STATEMENTS = [
+    'ALTER TABLE events ADD COLUMN IF NOT EXISTS starts_at TIMESTAMPTZ',
+    # "Upcoming" is a range scan from NOW(); rows without a parsed start never match
+    '''CREATE INDEX IF NOT EXISTS idx_events_starts_at
+       ON events (starts_at) WHERE starts_at IS NOT NULL''',
+    # Also the archive's covering index (archive.py); it replaces a plain
+    # (timestamp, id) index with the same key and predicate
+    '''CREATE INDEX IF NOT EXISTS idx_beard_events_archive
+       ON beard_events (timestamp, id) INCLUDE (url, name, responded, location, venueurl, imageurl)
+       WHERE timestamp IS NOT NULL''',
+    'DROP INDEX IF EXISTS idx_beard_events_timestamp',
+]
+
+
+def to_starts_at(date_text, scraped_at):
+    """Parse a legacy date string relative to when it was scraped"""
+    # events.scraped_at is a naive UTC timestamp (CURRENT_TIMESTAMP on the server)
+    if scraped_at is not None and scraped_at.tzinfo is None:
+        scraped_at = scraped_at.replace(tzinfo=timezone.utc)
+    return parse_event_date(date_text, now=scraped_at)
+
+
+def backfill(conn, reparse_all=False, dry_run=False):
+    c = conn.cursor()
+    # A dry run may happen before starts_at exists, so it always reads every row
+    where = '' if reparse_all or dry_run else 'WHERE starts_at IS NULL'
+    c.execute(f'SELECT id, date, scraped_at FROM events {where} ORDER BY id')
+    rows = c.fetchall()
+
+    updates = []
+    unparsed = []
+    for event_id, date_text, scraped_at in rows:
+        starts_at = to_starts_at(date_text, scraped_at)
+        if starts_at is None:
+            unparsed.append((event_id, date_text))
+            continue
+        updates.append((event_id, starts_at))
+        if dry_run:
+            print(f"{event_id:6} {date_text!r:40} -> {starts_at.isoformat()}")
+
+    if not dry_run:
+        for start in range(0, len(updates), BATCH_SIZE):
+            execute_values(c, '''UPDATE events AS e SET starts_at = v.starts_at
+                                 FROM (VALUES %s) AS v(id, starts_at)
+                                 WHERE e.id = v.id''',
+                           updates[start:start + BATCH_SIZE],
+                           template='(%s, %s::timestamptz)')
+
+    for event_id, date_text in unparsed:
+        print(f"Could not parse date for event {event_id}: {date_text!r}")
+    print(f"{len(rows)} rows checked, {len(updates)} {'would be ' if dry_run else ''}updated, "
+          f"{len(unparsed)} left without starts_at")
+
+
+def main(argv):
+    dry_run = '--dry-run' in argv
+    reparse_all = '--all' in argv
+    started = datetime.now()
+    try:
+        with get_connection() as conn:
+            c = conn.cursor()
+            c.execute('SET LOCAL statement_timeout = 0')
+            if not dry_run:
+                for statement in SCHEMA_STATEMENTS:
+                    c.execute(statement)
+            backfill(conn, reparse_all=reparse_all, dry_run=dry_run)
+            if dry_run:
+                conn.rollback()
+    finally:
+        close_pool()
+    print(f"Done in {(datetime.now() - started).total_seconds():.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
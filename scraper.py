@@ -0,0 +1,318 @@
+"""
+Facebook event scraping, shared by the ingest worker (ingest.py) and the legacy app.
+
+Nothing in here runs inside a web request: scraping is slow (a browser,
+remote page loads) and is scheduled by ingest.py instead. The Selenium path
+borrows headless Chrome instances from browser_pool.py and waits on page
+conditions rather than fixed sleeps.
+"""
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from capture import capturing, save_capture
+from linescan import html_text, is_beard_title, scan_date_first, scan_title_first
+
+FACEBOOK_URL = 'https://www.facebook.com/bearduk/events'
+
+def scrape_facebook_events(known_listings=None):
+    """Scrape events from Facebook using Selenium as primary method, requests as fallback
+
+    known_listings ({event url: listing fingerprint}) lets the Selenium path
+    skip the pages of events whose card has not changed.
+    """
+    try:
+        # Try Selenium first (more reliable for Facebook)
+        return scrape_facebook_events_selenium(known_listings=known_listings)
+    except Exception as e:
+        print(f"Selenium scraping failed: {e}")
+        try:
+            # Fallback to requests if Selenium fails
+            return scrape_facebook_events_requests()
+        except Exception as e2:
+            print(f"Requests scraping also failed: {e2}")
+            return []
+
+def scrape_facebook_events_requests():
+    """Scrape Facebook events using requests with proper headers"""
+    try:
+        import requests
+        
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'DNT': '1',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+            'Sec-Fetch-User': '?1',
+            'Cache-Control': 'max-age=0',
+        }
+        
+        response = requests.get(FACEBOOK_URL, headers=headers, timeout=30)
+        response.raise_for_status()
+        save_capture('requests_list', FACEBOOK_URL, html=response.content)
+
+        return parse_events_page(response.content)
+        
+    except Exception as e:
+        print(f"Requests scraping error: {e}")
+        raise
+
+def parse_events_page(html):
+    """Events (title, date, location) found in the text of the events page HTML"""
+    events = []
+    for found in scan_title_first(html_text(html).split('\n')):
+        event = {'title': found['title'], 'facebook_url': FACEBOOK_URL, 'date': found['date'],
+                 'confidence': found['confidence']}
+        if found['location']:
+            event['location'] = found['location']
+        events.append(event)
+    return events
+
+SCRAPER_WAIT_TIMEOUT = float(os.getenv('SCRAPER_WAIT_TIMEOUT', '20'))  # seconds for the events list to render
+SCRAPER_SCROLL_WAIT = float(os.getenv('SCRAPER_SCROLL_WAIT', '3'))  # seconds for a scroll to load more events
+SCRAPER_SCROLLS = int(os.getenv('SCRAPER_SCROLLS', '5'))
+SCRAPER_DETAIL_WAIT = float(os.getenv('SCRAPER_DETAIL_WAIT', '10'))  # seconds for an event page's title
+SCRAPER_DETAIL_WORKERS = int(os.getenv('SCRAPER_DETAIL_WORKERS', '2'))  # event pages loaded at once
+SCRAPER_MAX_EVENTS = int(os.getenv('SCRAPER_MAX_EVENTS', '10'))  # event pages visited per run
+SCRAPER_DEBUG_LOG = os.getenv('SCRAPER_DEBUG_LOG', '/app/debug.log')
+
+CSS_SELECTOR = 'css selector'  # selenium By.CSS_SELECTOR, so the extraction helpers need no selenium import
+EVENT_LINK_SELECTOR = "[role='link'][href*='/events/']"
+TITLE_SELECTORS = [
+    "h1[data-testid='event-permalink-event-name']",
+    "h1",
+    "[role='main'] h1",
+    "[data-testid='event-title']",
+    ".event-title",
+    "[role='main'] [dir='auto']",
+    "span[dir='auto']",
+    "title"
+]
+DATE_SELECTORS = [
+    "[data-testid='event-permalink-event-time']",
+    "[role='main'] time",
+    "time",
+    ".event-time",
+    "[data-testid*='time']"
+]
+LOCATION_SELECTORS = [
+    "[data-testid='event-permalink-event-location']",
+    "[role='main'] [data-testid*='location']",
+    ".event-location",
+    "[data-testid*='location']"
+]
+
+def debug_log(message):
+    """Append a line to SCRAPER_DEBUG_LOG (the container's /app/debug.log); never raises"""
+    if not SCRAPER_DEBUG_LOG:
+        return
+    try:
+        with open(SCRAPER_DEBUG_LOG, 'a') as f:
+            f.write(message + '\n')
+    except OSError:
+        pass
+
+def first_text(page, selectors):
+    """Text of the first element matching one of selectors with more than 3 characters
+
+    page is a WebDriver or a capture.SoupPage.
+    """
+    for selector in selectors:
+        for element in page.find_elements(CSS_SELECTOR, selector)[:1]:
+            text = element.text.strip()
+            if len(text) > 3 and text != "Events":
+                return text
+    return ""
+
+def wait_for_events_list(driver):
+    """Wait until the events page has rendered links to events"""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        WebDriverWait(driver, SCRAPER_WAIT_TIMEOUT, poll_frequency=0.25).until(
+            lambda d: d.find_elements(By.CSS_SELECTOR, EVENT_LINK_SELECTOR))
+    except TimeoutException:
+        debug_log(f"No event links after {SCRAPER_WAIT_TIMEOUT:.0f}s, parsing the page text only")
+
+def load_more_events(driver):
+    """Scroll and press "See more" / "Load more" until no new events appear"""
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    def snapshot(d):
+        return (len(d.find_elements(By.CSS_SELECTOR, EVENT_LINK_SELECTOR)),
+                d.execute_script("return document.body.scrollHeight"))
+
+    for _ in range(SCRAPER_SCROLLS):
+        before = snapshot(driver)
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        for label in ('See more', 'Load more'):
+            for button in driver.find_elements(By.XPATH, f"//span[contains(text(), '{label}')]/parent::*"):
+                try:
+                    button.click()
+                except WebDriverException:
+                    pass
+        try:
+            WebDriverWait(driver, SCRAPER_SCROLL_WAIT, poll_frequency=0.25).until(lambda d: snapshot(d) != before)
+        except TimeoutException:
+            break  # nothing more loaded
+    debug_log(f"Finished loading more content: {snapshot(driver)[0]} event links")
+
+def listing_fingerprint(texts):
+    """md5 of an event card's text on the events list, or None if the card has no text"""
+    text = '\n'.join(' '.join(t.split()) for t in texts if t and t.strip())
+    return hashlib.md5(text.encode('utf-8')).hexdigest() if text else None
+
+def collect_event_listings(page):
+    """[(event page URL, listing fingerprint)] for the events linked from the list, in page order"""
+    texts = {}
+    for container in page.find_elements(CSS_SELECTOR, EVENT_LINK_SELECTOR)[:20]:
+        try:
+            href = container.get_attribute('href')
+            if href and 'bearduk' not in href and re.search(r'/events/(\d+)', href):
+                texts.setdefault(href, []).append(container.text)
+        except Exception:  # stale element
+            continue
+    return [(url, listing_fingerprint(card_texts)) for url, card_texts in texts.items()]
+
+def scrape_event_page(pool, url):
+    """Title, date and location from one event's page, on a browser from pool"""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        with pool.browser() as driver:
+            driver.get(url)
+            try:
+                WebDriverWait(driver, SCRAPER_DETAIL_WAIT, poll_frequency=0.25).until(
+                    lambda d: first_text(d, TITLE_SELECTORS[:3]))
+            except TimeoutException:
+                pass  # fall through to the looser selectors and the page title
+            if capturing():
+                save_capture('selenium_event', url, html=driver.page_source, title=driver.title)
+            return event_from_page(driver, url)
+    except Exception as e:
+        debug_log(f"Error visiting {url}: {e}")
+        return None
+
+def event_from_page(page, url):
+    """Event dict from a loaded event page (WebDriver or capture.SoupPage), or None"""
+    event_title = first_text(page, TITLE_SELECTORS)
+    event_date = first_text(page, DATE_SELECTORS)
+    event_location = first_text(page, LOCATION_SELECTORS)
+    if not event_title and page.title and "Events" not in page.title:
+        event_title = page.title.split(" | ")[0].strip()
+
+    debug_log(f"Extracted from {url}: title='{event_title}', date='{event_date}', location='{event_location}'")
+    if not event_title or not is_beard_title(event_title):
+        return None
+    event_id_match = re.search(r'/events/(\d+)', url)
+    return {
+        'date': event_date or "Date TBD",
+        'title': event_title,
+        'location': event_location or "Location TBD",
+        'is_upcoming': True,
+        'facebook_url': url,
+        'event_id': event_id_match.group(1) if event_id_match else "",
+        'source': 'individual_page'
+    }
+
+def parse_listing_text(page_text, events, limit=6):
+    """Append events found as date / title / location lines in the events list text"""
+    found = scan_date_first(page_text.split('\n'), limit=limit - len(events),
+                            seen={(e['title'], e['date']) for e in events})
+    for candidate in found:
+        events.append({
+            'date': candidate['date'],
+            'title': candidate['title'],
+            'location': candidate['location'],
+            'is_upcoming': True,
+            'facebook_url': FACEBOOK_URL,
+            'confidence': candidate['confidence']
+        })
+    return events
+
+def scrape_facebook_events_selenium(pool=None, known_listings=None):
+    """Scrape the events list, then each event's own page in parallel, on pooled browsers
+
+    The list page is read on one browser, which goes back to the pool before
+    the event pages are fetched SCRAPER_DETAIL_WORKERS at a time (never more
+    than the pool has browsers). Waits end as soon as the content is there.
+
+    known_listings maps event URLs to the listing fingerprint seen when their
+    page was last scraped (event_store.known_listings); events whose card is
+    unchanged are skipped, and the events returned carry listing_fingerprint
+    for event_store to remember.
+    """
+    try:
+        from browser_pool import get_pool
+        from selenium.common.exceptions import WebDriverException
+        from selenium.webdriver.common.by import By
+    except ImportError:
+        return []
+
+    try:
+        pool = pool or get_pool()
+        started = time.perf_counter()
+        with pool.browser() as driver:
+            driver.get(FACEBOOK_URL)
+            wait_for_events_list(driver)
+            try:
+                load_more_events(driver)
+            except WebDriverException as e:
+                debug_log(f"Error during extended page loading: {e}")
+            listings = collect_event_listings(driver)
+            page_text = driver.find_element(By.TAG_NAME, "body").text
+            if capturing():
+                save_capture('selenium_list', FACEBOOK_URL, html=driver.page_source, text=page_text)
+
+        known_listings = known_listings or {}
+        fingerprints = dict(listings)
+        changed = [url for url, fingerprint in listings
+                   if fingerprint is None or known_listings.get(url) != fingerprint]
+        unchanged = len(listings) - len(changed)
+        changed = changed[:SCRAPER_MAX_EVENTS]
+        debug_log(f"Found {len(listings)} unique event URLs, {unchanged} unchanged since the last scrape: "
+                  f"{changed[:5]}...")
+
+        events = []
+        if changed:
+            workers = max(1, min(SCRAPER_DETAIL_WORKERS, pool.size, len(changed)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for event in executor.map(lambda url: scrape_event_page(pool, url), changed):
+                    if event and not any(e['title'] == event['title'] for e in events):
+                        event['listing_fingerprint'] = fingerprints[event['facebook_url']]
+                        events.append(event)
+                        debug_log(f"Added event from individual page: {event['title']}")
+
+        # Fallback to the line-by-line parsing of the list page if needed
+        if len(events) + unchanged < 3:
+            parse_listing_text(page_text, events)
+
+        # Remove duplicates based on title and date
+        seen = set()
+        unique_events = []
+        for event in events:
+            event_key = (event['date'], event['title'])
+            if event_key not in seen:
+                seen.add(event_key)
+                unique_events.append(event)
+
+        print(f"Selenium scrape found {len(unique_events)} new or changed events "
+              f"({unchanged} unchanged skipped) in {time.perf_counter() - started:.1f}s")
+        return unique_events
+
+    except Exception as e:
+        print(f"Scraping error: {e}")
+        return []
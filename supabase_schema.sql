@@ -12,25 +12,269 @@ CREATE TABLE IF NOT EXISTS events (
     scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     going_count INTEGER DEFAULT 0,
     interested_count INTEGER DEFAULT 0,
-    friends_going TEXT DEFAULT ''
+    friends_going TEXT DEFAULT '',
+    starts_at TIMESTAMPTZ  -- parsed from date by migrate_event_timestamps.py
 );
 
--- Create social_media_followers table  
+-- Follower counts (followers.py): one sample per account per local day
 CREATE TABLE IF NOT EXISTS social_media_followers (
     id SERIAL PRIMARY KEY,
     platform TEXT NOT NULL,
     username TEXT NOT NULL,
     follower_count INTEGER NOT NULL,
-    scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    day DATE NOT NULL
+);
+
+-- Newest sample per account, maintained on every write
+CREATE TABLE IF NOT EXISTS social_media_followers_latest (
+    platform TEXT NOT NULL,
+    username TEXT NOT NULL,
+    follower_count INTEGER NOT NULL,
+    day DATE NOT NULL,
+    scraped_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (platform, username)
+);
+
+-- Weekly (period 'week', starting Monday) and monthly rollups of the samples
+CREATE TABLE IF NOT EXISTS social_media_followers_rollup (
+    period TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    username TEXT NOT NULL,
+    period_start DATE NOT NULL,
+    first_count INTEGER NOT NULL,
+    last_count INTEGER NOT NULL,
+    min_count INTEGER NOT NULL,
+    max_count INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    PRIMARY KEY (period, platform, username, period_start)
 );
 
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_events_upcoming ON events(is_upcoming, date);
 CREATE INDEX IF NOT EXISTS idx_events_scraped_at ON events(scraped_at);
-CREATE INDEX IF NOT EXISTS idx_social_followers_platform ON social_media_followers(platform, username);
+CREATE INDEX IF NOT EXISTS idx_events_starts_at ON events(starts_at) WHERE starts_at IS NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_social_followers_scraped_at ON social_media_followers(scraped_at);
 
--- Add unique constraint for social media followers (per platform/username/time)
-ALTER TABLE social_media_followers 
-ADD CONSTRAINT unique_platform_username_time 
-UNIQUE (platform, username, date_trunc('day', scraped_at));
\ No newline at end of file
+-- Tables created before the day column: backfill it, keeping the latest sample per day
+ALTER TABLE social_media_followers ADD COLUMN IF NOT EXISTS day DATE;
+UPDATE social_media_followers SET day = scraped_at::date WHERE day IS NULL;
+DELETE FROM social_media_followers a
+USING social_media_followers b
+WHERE a.platform = b.platform AND a.username = b.username AND a.day = b.day
+  AND (a.scraped_at, a.id) < (b.scraped_at, b.id);
+ALTER TABLE social_media_followers ALTER COLUMN day SET NOT NULL;
+
+-- One sample per account per day: the upsert's conflict target, and the index
+-- behind date-range series queries
+CREATE UNIQUE INDEX IF NOT EXISTS idx_social_followers_day
+ON social_media_followers (platform, username, day);
+
+-- Venue registry (venues.py): one row per venue, every spelling of its
+-- location seen in beard_events as an alias (keyed by venues.venue_key()),
+-- and the geocoder's answers so each place is looked up once.
+CREATE TABLE IF NOT EXISTS venues (
+    id SERIAL PRIMARY KEY,
+    slug TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    town TEXT,
+    venueurl TEXT,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION,
+    geocoded_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS venue_aliases (
+    alias TEXT PRIMARY KEY,
+    venue_id INTEGER NOT NULL REFERENCES venues (id) ON DELETE CASCADE,
+    source TEXT NOT NULL DEFAULT 'location'
+);
+
+CREATE INDEX IF NOT EXISTS idx_venue_aliases_venue ON venue_aliases (venue_id);
+
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    query TEXT PRIMARY KEY,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION,
+    display_name TEXT,
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Events shown on the site. Written by the ingest worker (event_store.py) and
+-- the Supabase importer.
+CREATE TABLE IF NOT EXISTS beard_events (
+    id SERIAL PRIMARY KEY,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    url TEXT,
+    timestamp TIMESTAMPTZ,
+    name TEXT,
+    responded INTEGER,
+    location TEXT,
+    venueurl TEXT,
+    duration TEXT,
+    imageurl TEXT,
+    updated TIMESTAMPTZ DEFAULT NOW(),
+    fingerprint TEXT,  -- md5 of the scraped columns (event_store.FINGERPRINT_SQL)
+    venue_id INTEGER REFERENCES venues (id) ON DELETE SET NULL  -- resolved from location at ingest
+);
+
+ALTER TABLE beard_events ADD COLUMN IF NOT EXISTS fingerprint TEXT;
+ALTER TABLE beard_events ADD COLUMN IF NOT EXISTS venue_id INTEGER REFERENCES venues (id) ON DELETE SET NULL;
+
+-- Canonical event identity used by the bulk upsert (ON CONFLICT target).
+-- Older tables can hold duplicates, which would make the unique index fail:
+-- keep the newest row of each identity first (as migrate_event_identity.py does).
+DELETE FROM beard_events e
+USING (SELECT id, ROW_NUMBER() OVER (PARTITION BY name, COALESCE(location, ''), timestamp
+                                     ORDER BY updated DESC NULLS LAST, id DESC) AS newest
+       FROM beard_events
+       WHERE name IS NOT NULL AND timestamp IS NOT NULL) ranked
+WHERE e.id = ranked.id AND ranked.newest > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_beard_events_identity
+ON beard_events (name, (COALESCE(location, '')), timestamp);
+
+-- Fingerprints of rows from before the column (same expression as event_store.FINGERPRINT_SQL)
+UPDATE beard_events
+SET fingerprint = md5(ROW(name, timestamp AT TIME ZONE 'UTC', location, responded, imageurl, url, venueurl)::text)
+WHERE fingerprint IS NULL;
+
+-- Past-events archive (archive.py): each page is a keyset scan of one of
+-- these, and the included columns make it an index-only scan. The first is
+-- also the range scan from NOW() for upcoming events, so the plain
+-- (timestamp, id) index it replaces is dropped rather than kept in step.
+CREATE INDEX IF NOT EXISTS idx_beard_events_archive
+ON beard_events (timestamp, id) INCLUDE (url, name, responded, location, venueurl, imageurl)
+WHERE timestamp IS NOT NULL;
+
+DROP INDEX IF EXISTS idx_beard_events_timestamp;
+
+-- The archive filters on venue_id; the location-keyed index is no longer read
+DROP INDEX IF EXISTS idx_beard_events_archive_venue;
+
+CREATE INDEX IF NOT EXISTS idx_beard_events_archive_venue_id
+ON beard_events (venue_id, timestamp, id) INCLUDE (url, name, responded, location, venueurl, imageurl)
+WHERE timestamp IS NOT NULL;
+
+-- Events per local calendar month and venue id (0 for none), for the archive
+-- navigation. Kept up to date by event_store.py; `python archive.py` rebuilds it
+-- (and replaces the older table keyed on location text).
+CREATE TABLE IF NOT EXISTS beard_event_months (
+    month DATE NOT NULL,
+    venue_id INTEGER NOT NULL,
+    events INTEGER NOT NULL,
+    PRIMARY KEY (month, venue_id)
+);
+
+-- Upcoming events with pre-formatted dates, read by the events page and API
+-- (upcoming.py). Refreshed by event_store.py and `python upcoming.py`; other
+-- writes mark it stale (below) and readers use beard_events until the next refresh.
+CREATE TABLE IF NOT EXISTS beard_upcoming_events (
+    id INTEGER PRIMARY KEY,
+    url TEXT,
+    timestamp TIMESTAMPTZ NOT NULL,
+    name TEXT,
+    responded INTEGER,
+    location TEXT,
+    venueurl TEXT,
+    duration TEXT,
+    imageurl TEXT,
+    updated TIMESTAMPTZ,
+    date_text TEXT NOT NULL,
+    venue_id INTEGER
+);
+
+ALTER TABLE beard_upcoming_events ADD COLUMN IF NOT EXISTS venue_id INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_beard_upcoming_events_timestamp
+ON beard_upcoming_events (timestamp, id);
+
+CREATE TABLE IF NOT EXISTS beard_upcoming_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    stale BOOLEAN NOT NULL DEFAULT TRUE,
+    refreshed_at TIMESTAMPTZ
+);
+
+INSERT INTO beard_upcoming_state DEFAULT VALUES ON CONFLICT (id) DO NOTHING;
+
+-- Every insert or update made by event_store.py, with the fields that moved
+-- as {"field": [old, new]}. Pruned after CHANGE_LOG_DAYS.
+CREATE TABLE IF NOT EXISTS beard_event_changes (
+    id BIGSERIAL PRIMARY KEY,
+    event_id INTEGER NOT NULL,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    change TEXT NOT NULL,
+    fields JSONB,
+    fingerprint TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_beard_event_changes_event ON beard_event_changes (event_id, changed_at);
+CREATE INDEX IF NOT EXISTS idx_beard_event_changes_changed_at ON beard_event_changes (changed_at);
+
+-- Fingerprint of each event's card on the Facebook events list, so the
+-- scraper only opens the pages of new or changed events
+CREATE TABLE IF NOT EXISTS beard_event_listings (
+    url TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    checked_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Page cache invalidation: web workers LISTEN on beard_events_changed (cache.py)
+-- and drop their cached pages whenever any writer changes beard_events. The
+-- same change marks beard_upcoming_events stale until it is next refreshed.
+-- Statement triggers also fire for statements that changed no rows (an upsert
+-- whose rows were all unchanged), so the transition table is checked first.
+CREATE OR REPLACE FUNCTION notify_beard_events_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'TRUNCATE' THEN
+        IF NOT EXISTS (SELECT 1 FROM changed_rows) THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    UPDATE beard_upcoming_state SET stale = TRUE WHERE NOT stale;
+    PERFORM pg_notify('beard_events_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A trigger with a transition table can only handle one kind of event
+DROP TRIGGER IF EXISTS beard_events_changed ON beard_events;
+DROP TRIGGER IF EXISTS beard_events_inserted ON beard_events;
+DROP TRIGGER IF EXISTS beard_events_updated ON beard_events;
+DROP TRIGGER IF EXISTS beard_events_deleted ON beard_events;
+DROP TRIGGER IF EXISTS beard_events_truncated ON beard_events;
+
+CREATE TRIGGER beard_events_inserted
+AFTER INSERT ON beard_events REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_beard_events_changed();
+
+CREATE TRIGGER beard_events_updated
+AFTER UPDATE ON beard_events REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_beard_events_changed();
+
+CREATE TRIGGER beard_events_deleted
+AFTER DELETE ON beard_events REFERENCING OLD TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_beard_events_changed();
+
+CREATE TRIGGER beard_events_truncated
+AFTER TRUNCATE ON beard_events
+FOR EACH STATEMENT EXECUTE FUNCTION notify_beard_events_changed();
+
+
+-- Ingest worker run history (ingest.py)
+CREATE TABLE IF NOT EXISTS ingest_runs (
+    id SERIAL PRIMARY KEY,
+    job TEXT NOT NULL,
+    scheduled_for TIMESTAMPTZ,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMPTZ,
+    status TEXT NOT NULL DEFAULT 'running',
+    attempt INTEGER NOT NULL DEFAULT 1,
+    items INTEGER,
+    error TEXT,
+    host TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_runs_job_scheduled ON ingest_runs(job, scheduled_for);
+CREATE INDEX IF NOT EXISTS idx_ingest_runs_started_at ON ingest_runs(started_at);
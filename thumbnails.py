@@ -0,0 +1,188 @@
+"""
+Local thumbnail cache for remote event images (beard_events.imageurl).
+
+thumbnail_path(url, width) gives a stable local URL, /thumbs/<key>-<width>.webp,
+where key is a hash of the remote URL. The first request fetches the original
+once, keeps it on disk, and writes a resized WebP next to it; later requests
+are plain file reads. The cache directory is bounded by THUMB_CACHE_MAX_BYTES
+and evicts least recently used files (by mtime, touched on every hit).
+
+Only URLs the site actually shows can be fetched: callers resolve a key back
+to its URL through a lookup function (the upcoming events list), so the
+route is not an open proxy.
+"""
+import hashlib
+import os
+import threading
+import urllib.request
+from io import BytesIO
+
+try:
+    from PIL import Image
+except ImportError:  # without Pillow thumbnails redirect to the original image
+    Image = None
+
+THUMB_DIR = os.getenv('THUMB_DIR', '/tmp/beard-thumbs')
+THUMB_CACHE_MAX_BYTES = int(os.getenv('THUMB_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+THUMB_FETCH_TIMEOUT = float(os.getenv('THUMB_FETCH_TIMEOUT', '10'))  # seconds
+THUMB_MAX_SOURCE_BYTES = 10 * 1024 * 1024
+THUMB_WIDTHS = (160, 320, 640)
+THUMB_QUALITY = 75
+KEY_LENGTH = 20
+
+
+class ThumbnailError(Exception):
+    """The original image could not be fetched or decoded"""
+
+
+def thumbnail_key(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:KEY_LENGTH]
+
+
+def thumbnail_path(url, width=320):
+    """Local URL of a thumbnail for a remote image URL (the original URL if disabled)"""
+    if not url or Image is None:
+        return url
+    return f'/thumbs/{thumbnail_key(url)}-{width}.webp'
+
+
+class ThumbnailCache:
+    """Disk cache of fetched originals and resized WebP thumbnails with LRU eviction"""
+
+    def __init__(self, directory=THUMB_DIR, max_bytes=THUMB_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> [lock, users], dropped with its last user
+        self._size = None  # bytes on disk, computed on first use
+        self.stats = {'hits': 0, 'misses': 0, 'fetches': 0, 'errors': 0, 'evictions': 0}
+
+    def _file(self, name):
+        return os.path.join(self.directory, name)
+
+    def _scan(self):
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _added(self, nbytes):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
+            else:
+                self._size += nbytes
+            if self._size <= self.max_bytes:
+                return
+            # Evict least recently used files down to 90% of the limit
+            for _, size, path in sorted(self._scan()):
+                if self._size <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                self._size -= size
+                self.stats['evictions'] += 1
+
+    def _write(self, name, data):
+        path = self._file(name)
+        temp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+        self._added(len(data))
+        return path
+
+    def _fetch(self, url):
+        request = urllib.request.Request(url, headers={'User-Agent': 'bearduk-thumbnailer/1.0'})
+        try:
+            with urllib.request.urlopen(request, timeout=THUMB_FETCH_TIMEOUT) as response:
+                if not response.headers.get_content_type().startswith('image/'):
+                    raise ThumbnailError(f"not an image: {response.headers.get_content_type()}")
+                data = response.read(THUMB_MAX_SOURCE_BYTES + 1)
+        except OSError as e:
+            raise ThumbnailError(f"fetch failed: {e}") from e
+        if len(data) > THUMB_MAX_SOURCE_BYTES:
+            raise ThumbnailError("image too large")
+        self.stats['fetches'] += 1
+        return data
+
+    def _resize(self, source_path, width):
+        try:
+            with Image.open(source_path) as image:
+                image.thumbnail((width, width * 4), Image.LANCZOS)
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+                output = BytesIO()
+                image.save(output, 'WEBP', quality=THUMB_QUALITY, method=4)
+                return output.getvalue()
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            raise ThumbnailError(f"cannot decode image: {e}") from e
+
+    def _acquire_key_lock(self, key):
+        """The lock serialising fetches of key; pair with _release_key_lock"""
+        with self._lock:
+            holder = self._key_locks.get(key)
+            if holder is None:
+                holder = self._key_locks[key] = [threading.Lock(), 0]
+            holder[1] += 1
+            return holder[0]
+
+    def _release_key_lock(self, key):
+        with self._lock:
+            holder = self._key_locks[key]
+            holder[1] -= 1
+            if holder[1] == 0:
+                del self._key_locks[key]
+
+    def get(self, key, width, url):
+        """Path of the thumbnail for url at width, fetching and resizing on a miss"""
+        name = f'{key}-{width}.webp'
+        path = self._file(name)
+        try:
+            os.utime(path)  # marks it recently used
+            self.stats['hits'] += 1
+            return path
+        except FileNotFoundError:
+            pass
+
+        key_lock = self._acquire_key_lock(key)
+        try:
+            with key_lock:
+                if os.path.exists(path):
+                    self.stats['hits'] += 1
+                    return path
+                self.stats['misses'] += 1
+                try:
+                    source = self._file(f'{key}.orig')
+                    if os.path.exists(source):
+                        os.utime(source)
+                    else:
+                        os.makedirs(self.directory, exist_ok=True)
+                        self._write(f'{key}.orig', self._fetch(url))
+                    return self._write(name, self._resize(source, width))
+                except ThumbnailError:
+                    self.stats['errors'] += 1
+                    raise
+        finally:
+            self._release_key_lock(key)
+
+
+thumbnail_cache = ThumbnailCache()
+
+
+def thumbnails_enabled():
+    """True if Pillow is installed and thumbnails can be generated"""
+    return Image is not None
+
+
+def find_thumbnail_url(key, candidate_urls):
+    """The URL among candidate_urls whose key matches, or None"""
+    for url in candidate_urls:
+        if url and thumbnail_key(url) == key:
+            return url
+    return None
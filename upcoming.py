@@ -0,0 +1,122 @@
+"""
+Precomputed upcoming events for the events page and API (beard_upcoming_events).
+
+The table holds one row per future beard_events row with the columns the
+page needs and the date already formatted by format_event_date(), so the
+read path in app.py is a small indexed SELECT with no date formatting.
+
+Writers refresh it in the same transaction as their beard_events changes
+(event_store.py does), so readers see either the old or the new list and are
+never blocked, as with REFRESH MATERIALIZED VIEW CONCURRENTLY. The refresh
+only touches rows that changed. Events that have since started are filtered
+out when reading, so the table does not need refreshing as time passes.
+
+Writers that do not refresh it (the Supabase importer, manual SQL) are caught
+by the beard_events statement triggers in supabase_schema.sql, which mark the
+single beard_upcoming_state row stale. Readers query beard_events directly
+while it is stale, and the next refresh (or `python upcoming.py`) clears it.
+"""
+import sys
+
+from psycopg2.extras import execute_values
+
+from dateparse import format_event_date
+
+# Same columns as app.UPCOMING_EVENTS_SQL, plus the formatted date
+SOURCE_SQL = """
+    SELECT id, url, timestamp, name, responded, location, venueurl, duration, imageurl, updated, venue_id
+    FROM beard_events
+    WHERE timestamp > NOW()
+"""
+PAGE_SIZE = 500
+
+
+def init_upcoming(conn):
+    """Create beard_upcoming_events and its index"""
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS beard_upcoming_events (
+        id INTEGER PRIMARY KEY,
+        url TEXT,
+        timestamp TIMESTAMPTZ NOT NULL,
+        name TEXT,
+        responded INTEGER,
+        location TEXT,
+        venueurl TEXT,
+        duration TEXT,
+        imageurl TEXT,
+        updated TIMESTAMPTZ,
+        date_text TEXT NOT NULL,
+        venue_id INTEGER
+    )''')
+    # Tables from before venue_id; checked first, as ALTER TABLE locks out readers
+    c.execute('''SELECT 1 FROM information_schema.columns
+                 WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s''',
+              ('beard_upcoming_events', 'venue_id'))
+    if c.fetchone() is None:
+        c.execute('ALTER TABLE beard_upcoming_events ADD COLUMN venue_id INTEGER')
+    c.execute("SELECT to_regclass('idx_beard_upcoming_events_timestamp')")
+    if c.fetchone()[0] is None:
+        c.execute('''CREATE INDEX idx_beard_upcoming_events_timestamp
+                     ON beard_upcoming_events (timestamp, id)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS beard_upcoming_state (
+        id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+        stale BOOLEAN NOT NULL DEFAULT TRUE,
+        refreshed_at TIMESTAMPTZ
+    )''')
+    c.execute('INSERT INTO beard_upcoming_state DEFAULT VALUES ON CONFLICT (id) DO NOTHING')
+
+
+def refresh_upcoming_events(conn):
+    """Bring beard_upcoming_events in line with beard_events; returns changed/removed counts"""
+    c = conn.cursor()
+    # Taken before reading beard_events: a writer whose trigger marks the table
+    # stale either commits first (and is read here) or waits for this refresh
+    c.execute('SELECT stale FROM beard_upcoming_state FOR UPDATE')
+    c.execute(SOURCE_SQL)
+    rows = [row + (format_event_date(row[2]),) for row in c.fetchall()]
+
+    # Rows for events that were deleted, or have started since the last refresh
+    c.execute('DELETE FROM beard_upcoming_events WHERE NOT (id = ANY(%s))', ([row[0] for row in rows],))
+    removed = c.rowcount
+
+    changed = 0
+    if rows:
+        changed = len(execute_values(c, '''
+            INSERT INTO beard_upcoming_events AS u
+                (id, url, timestamp, name, responded, location, venueurl, duration, imageurl, updated, venue_id,
+                 date_text)
+            VALUES %s
+            ON CONFLICT (id) DO UPDATE SET
+                url = EXCLUDED.url, timestamp = EXCLUDED.timestamp, name = EXCLUDED.name,
+                responded = EXCLUDED.responded, location = EXCLUDED.location,
+                venueurl = EXCLUDED.venueurl, duration = EXCLUDED.duration,
+                imageurl = EXCLUDED.imageurl, updated = EXCLUDED.updated, venue_id = EXCLUDED.venue_id,
+                date_text = EXCLUDED.date_text
+            WHERE (u.url, u.timestamp, u.name, u.responded, u.location, u.venueurl, u.duration,
+                   u.imageurl, u.updated, u.venue_id, u.date_text) IS DISTINCT FROM
+                  (EXCLUDED.url, EXCLUDED.timestamp, EXCLUDED.name, EXCLUDED.responded, EXCLUDED.location,
+                   EXCLUDED.venueurl, EXCLUDED.duration, EXCLUDED.imageurl, EXCLUDED.updated,
+                   EXCLUDED.venue_id, EXCLUDED.date_text)
+            RETURNING 1
+        ''', rows, page_size=PAGE_SIZE, fetch=True))
+    c.execute('UPDATE beard_upcoming_state SET stale = FALSE, refreshed_at = NOW()')
+    return {'upcoming': len(rows), 'changed': changed, 'removed': removed}
+
+
+def main():
+    """Refresh beard_upcoming_events from beard_events"""
+    from db import close_pool, get_connection
+
+    try:
+        with get_connection() as conn:
+            init_upcoming(conn)
+            counts = refresh_upcoming_events(conn)
+    finally:
+        close_pool()
+    print(f"Refreshed beard_upcoming_events: {counts['upcoming']} upcoming, "
+          f"{counts['changed']} changed, {counts['removed']} removed")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,41 +1,96 @@
 import requests
-import sqlite3
 import os
-from datetime import datetime
-import json
-from bs4 import BeautifulSoup
-import re
-
-DATABASE = 'events.db'
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from db import get_connection
+from follower_extract import extract_follower_count
+from followers import init_followers, save_follower_counts
+
+# Accounts to track, "platform:username" separated by commas, e.g.
+# FOLLOWER_ACCOUNTS=facebook:bearduk,instagram:beardbanduk,facebook:theoldgeorgefairoak
+FOLLOWER_ACCOUNTS = os.getenv('FOLLOWER_ACCOUNTS', '')
+FOLLOWER_WORKERS = int(os.getenv('FOLLOWER_WORKERS', '8'))
+FOLLOWER_TIMEOUT = float(os.getenv('FOLLOWER_TIMEOUT', '10'))  # seconds, connect and read
+FOLLOWER_RETRIES = int(os.getenv('FOLLOWER_RETRIES', '3'))
+FOLLOWER_RETRY_BACKOFF = float(os.getenv('FOLLOWER_RETRY_BACKOFF', '1'))  # seconds, doubled per retry
+FOLLOWER_HOST_INTERVAL = float(os.getenv('FOLLOWER_HOST_INTERVAL', '1'))  # min seconds between requests to a host
+
+# Overridable so the fetcher can run against a local stub server
+# (benchmarks/stub_social.py) instead of the real sites
+FACEBOOK_GRAPH_URL = os.getenv('FACEBOOK_GRAPH_URL', 'https://graph.facebook.com/v18.0')
+FACEBOOK_WEB_URL = os.getenv('FACEBOOK_WEB_URL', 'https://www.facebook.com')
+INSTAGRAM_WEB_URL = os.getenv('INSTAGRAM_WEB_URL', 'https://www.instagram.com')
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least interval seconds apart, across threads"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+rate_limiter = HostRateLimiter(FOLLOWER_HOST_INTERVAL)
+_local = threading.local()
+
+def get_session():
+    """This thread's keep-alive session, retrying connection errors, 429 and 5xx"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        retry = Retry(total=FOLLOWER_RETRIES, backoff_factor=FOLLOWER_RETRY_BACKOFF,
+                      status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset(['GET']),
+                      respect_retry_after_header=True)
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=4)
+        session = requests.Session()
+        session.headers['User-Agent'] = USER_AGENT
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+    return session
+
+def fetch(url, **kwargs):
+    """GET url on the pooled session, rate limited per host; raises for HTTP errors"""
+    rate_limiter.wait(urlsplit(url).netloc)
+    response = get_session().get(url, timeout=FOLLOWER_TIMEOUT, **kwargs)
+    response.raise_for_status()
+    return response
 
 def init_followers_db():
-    """Initialize the followers database table"""
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS social_media_followers
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  platform TEXT NOT NULL,
-                  username TEXT NOT NULL,
-                  follower_count INTEGER NOT NULL,
-                  scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    conn.commit()
-    conn.close()
+    """Create (or migrate) the follower tables"""
+    with get_connection() as conn:
+        init_followers(conn)
+
+def parse_facebook_followers(html_content):
+    """Follower count from a Facebook page's HTML (bytes or str), or None"""
+    return extract_follower_count('facebook', html_content)[0]
+
+def parse_instagram_followers(html_content):
+    """Follower count from an Instagram profile's HTML (bytes or str), or None"""
+    return extract_follower_count('instagram', html_content)[0]
 
 def get_facebook_followers(page_id, access_token=None, html_content=None):
     """Get follower count from Facebook Graph API or HTML parsing"""
     # If HTML content is provided, parse it directly
     if html_content:
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            # Look for the followers count in the HTML
-            followers_link = soup.find('a', href=re.compile(r'followers'))
-            if followers_link:
-                strong_tag = followers_link.find('strong')
-                if strong_tag:
-                    count_text = strong_tag.get_text().strip()
-                    return int(count_text.replace(',', ''))
-            print("Could not find follower count in provided HTML")
-            return None
+            count = parse_facebook_followers(html_content)
+            if count is None:
+                print("Could not find follower count in provided HTML")
+            return count
         except Exception as e:
             print(f"Error parsing HTML: {e}")
             return None
@@ -43,78 +98,45 @@ def get_facebook_followers(page_id, access_token=None, html_content=None):
     # Otherwise try Graph API
     if access_token:
         try:
-            url = f"https://graph.facebook.com/v18.0/{page_id}"
-            params = {
-                'fields': 'followers_count',
-                'access_token': access_token
-            }
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            return data.get('followers_count', 0)
+            response = fetch(f"{FACEBOOK_GRAPH_URL}/{page_id}",
+                             params={'fields': 'followers_count', 'access_token': access_token})
+            return response.json().get('followers_count', 0)
         except Exception as e:
             print(f"Error fetching Facebook followers via API: {e}")
             return None
 
-    print("No access token or HTML content provided for Facebook")
-    return None
+    # Fallback: the public page
+    try:
+        count = parse_facebook_followers(fetch(f"{FACEBOOK_WEB_URL}/{page_id}").content)
+        if count is None:
+            print(f"Could not find follower count in Facebook HTML for {page_id}")
+        return count
+    except Exception as e:
+        print(f"Error fetching Facebook followers for {page_id}: {e}")
+        return None
 
 def get_instagram_followers(username, access_token=None, html_content=None):
-    """Get follower count from Instagram Basic Display API or HTML parsing"""
+    """Get follower count from Instagram HTML (provided, or fetched from the profile page)"""
     # If HTML content is provided, parse it directly
     if html_content:
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            # Look for the span with title attribute containing follower count
-            count_span = soup.find('span', title=re.compile(r'^\d+$'))
-            if count_span and count_span.get('title'):
-                return int(count_span['title'].replace(',', ''))
-
-            # Alternative: look for spans containing "followers" and extract the number
-            follower_text = soup.find(text=re.compile(r'followers'))
-            if follower_text:
-                # Find the parent elements and look for the count
-                parent = follower_text.parent
-                if parent:
-                    count_span = parent.find_previous('span', class_=re.compile(r'html-span'))
-                    if count_span:
-                        count_text = count_span.get_text().strip()
-                        return int(count_text.replace(',', ''))
-
-            print("Could not find follower count in provided Instagram HTML")
-            return None
+            count = parse_instagram_followers(html_content)
+            if count is None:
+                print("Could not find follower count in provided Instagram HTML")
+            return count
         except Exception as e:
             print(f"Error parsing Instagram HTML: {e}")
             return None
 
-    # Otherwise try Instagram Basic Display API
-    if access_token:
-        # This would require Instagram Business account and proper setup
-        # For now, return None and use fallback
-        pass
-
-    # Fallback: Try to scrape from Instagram web (less reliable)
+    # The Basic Display API needs a Business account setup, so access_token
+    # is unused for now and the profile page is scraped (less reliable)
     try:
-        url = f"https://www.instagram.com/{username}/"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-
-        # Look for follower count in the HTML (this is fragile and may break)
-        html = response.text
-        if '"edge_followed_by":{"count":' in html:
-            start = html.find('"edge_followed_by":{"count":') + len('"edge_followed_by":{"count":')
-            end = html.find('}', start)
-            count_str = html[start:end].split(',')[0]
-            return int(count_str)
-        else:
-            print("Could not find follower count in Instagram HTML")
-            return None
-
+        count = parse_instagram_followers(fetch(f"{INSTAGRAM_WEB_URL}/{username}/").content)
+        if count is None:
+            print(f"Could not find follower count in Instagram HTML for {username}")
+        return count
     except Exception as e:
-        print(f"Error fetching Instagram followers: {e}")
+        print(f"Error fetching Instagram followers for {username}: {e}")
         return None
 
 def save_follower_count(platform, username, count):
@@ -122,83 +144,81 @@ def save_follower_count(platform, username, count):
     if count is None:
         return False
 
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
     try:
-        # Check if we already have a record for this platform/username today
-        today = datetime.now().strftime('%Y-%m-%d')
-        c.execute('''SELECT id FROM social_media_followers
-                     WHERE platform = ? AND username = ?
-                     AND DATE(scraped_at) = ?''', (platform, username, today))
-
-        existing_record = c.fetchone()
-
-        if existing_record:
-            # Update existing record for today
-            c.execute('''UPDATE social_media_followers
-                         SET follower_count = ?, scraped_at = CURRENT_TIMESTAMP
-                         WHERE id = ?''', (count, existing_record[0]))
-            print(f"Updated {platform} followers for {username}: {count} (existing record for today)")
-        else:
-            # Insert new record
-            c.execute('''INSERT INTO social_media_followers (platform, username, follower_count)
-                         VALUES (?, ?, ?)''', (platform, username, count))
-            print(f"Saved {platform} followers for {username}: {count}")
-
-        conn.commit()
+        with get_connection() as conn:
+            save_follower_counts(conn, [(platform, username, count)])
+        print(f"Saved {platform} followers for {username}: {count}")
         return True
     except Exception as e:
         print(f"Error saving follower count: {e}")
         return False
-    finally:
-        conn.close()
 
 def get_latest_follower_count(platform, username):
     """Get the most recent follower count for a platform/username"""
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute('''SELECT follower_count FROM social_media_followers
-                 WHERE platform = ? AND username = ?
-                 ORDER BY scraped_at DESC LIMIT 1''', (platform, username))
-    result = c.fetchone()
-    conn.close()
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute('''SELECT follower_count FROM social_media_followers_latest
+                     WHERE platform = %s AND username = %s''', (platform, username))
+        result = c.fetchone()
     return result[0] if result else 0
 
+def load_accounts():
+    """(platform, username) pairs from FOLLOWER_ACCOUNTS, or the band's own two accounts"""
+    if not FOLLOWER_ACCOUNTS.strip():
+        return [('facebook', os.getenv('FACEBOOK_PAGE_ID', 'bearduk')),
+                ('instagram', os.getenv('INSTAGRAM_USERNAME', 'beardbanduk'))]
+    accounts = []
+    for entry in FOLLOWER_ACCOUNTS.split(','):
+        if not entry.strip():
+            continue
+        platform, _, username = entry.strip().partition(':')
+        if platform not in FETCHERS or not username:
+            raise ValueError(f"Invalid FOLLOWER_ACCOUNTS entry {entry!r}, expected facebook:<page> or instagram:<user>")
+        accounts.append((platform, username))
+    return list(dict.fromkeys(accounts))
+
+FETCHERS = {
+    'facebook': lambda username, html: get_facebook_followers(username, os.getenv('FACEBOOK_ACCESS_TOKEN'), html),
+    'instagram': lambda username, html: get_instagram_followers(username, os.getenv('INSTAGRAM_ACCESS_TOKEN'), html),
+}
+
+def fetch_follower_counts(accounts, html_by_account=None, workers=FOLLOWER_WORKERS):
+    """Fetch every account concurrently; returns [(platform, username, count or None)]
+
+    html_by_account maps (platform, username) to page HTML to parse instead of fetching.
+    """
+    html_by_account = html_by_account or {}
+
+    def fetch_account(account):
+        platform, username = account
+        return platform, username, FETCHERS[platform](username, html_by_account.get(account))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(accounts)))) as executor:
+        return list(executor.map(fetch_account, accounts))
+
 def update_all_followers(facebook_html=None, instagram_html=None):
-    """Update follower counts for all configured social media accounts"""
-    init_followers_db()
-
-    # Configuration - these would typically come from environment variables or config file
-    # For Facebook, you can provide HTML content directly or use API
-    facebook_config = {
-        'page_id': os.getenv('FACEBOOK_PAGE_ID', 'bearduk'),  # Replace with actual page ID
-        'access_token': os.getenv('FACEBOOK_ACCESS_TOKEN'),  # Get from Facebook Developer Console
-        'html_content': facebook_html  # HTML content if provided
-    }
-
-    # For Instagram, you can try web scraping (unreliable) or use Instagram Basic Display API
-    instagram_config = {
-        'username': os.getenv('INSTAGRAM_USERNAME', 'beardbanduk'),
-        'access_token': os.getenv('INSTAGRAM_ACCESS_TOKEN')  # Optional - for API access
-    }
-
-    # Update Facebook followers
-    fb_count = get_facebook_followers(
-        facebook_config['page_id'],
-        facebook_config['access_token'],
-        facebook_config['html_content']
-    )
-    if fb_count is not None:
-        save_follower_count('facebook', facebook_config['page_id'], fb_count)
-
-    # Update Instagram followers
-    ig_count = get_instagram_followers(
-        instagram_config['username'],
-        instagram_config['access_token'],
-        instagram_html
-    )
-    if ig_count is not None:
-        save_follower_count('instagram', instagram_config['username'], ig_count)
+    """Update follower counts for all configured social media accounts; returns samples saved
+
+    facebook_html / instagram_html, when given, are parsed instead of
+    fetching the band's own page (FACEBOOK_PAGE_ID / INSTAGRAM_USERNAME).
+    """
+    accounts = load_accounts()
+    html_by_account = {('facebook', os.getenv('FACEBOOK_PAGE_ID', 'bearduk')): facebook_html,
+                       ('instagram', os.getenv('INSTAGRAM_USERNAME', 'beardbanduk')): instagram_html}
+    started = time.perf_counter()
+    samples = fetch_follower_counts(accounts, html_by_account)
+    failed = [f"{platform}:{username}" for platform, username, count in samples if count is None]
+    print(f"Fetched {len(accounts) - len(failed)}/{len(accounts)} follower counts "
+          f"in {time.perf_counter() - started:.1f}s" + (f" (failed: {', '.join(failed)})" if failed else ''))
+
+    # All accounts are stored in one transaction (one sample per account per day)
+    with get_connection() as conn:
+        init_followers(conn)
+        saved = save_follower_counts(conn, samples)
+    for platform, username, count in samples:
+        if count is not None:
+            print(f"Saved {platform} followers for {username}: {count}")
+    return saved
 
 if __name__ == "__main__":
     update_all_followers()
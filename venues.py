@@ -0,0 +1,441 @@
+"""
+Venue registry: canonical venues for the free-text beard_events.location.
+
+Facebook gives an event's location as free text ("The Vaults, Southsea",
+"Steam Town Brew Co., Eastleigh", "Event by BEARD"), and the same venue is
+spelt several ways over the years. Each distinct venue gets one row in
+venues (display name, town, venueurl, coordinates), and every spelling seen
+for it is a row in venue_aliases keyed by venue_key(): case, accents,
+punctuation, "&" / "and" and a leading "The" are ignored. beard_events.venue_id
+points at the venue, so the archive and API group and filter on an integer.
+
+At ingest VenueIndex loads every alias into dicts once per batch, and each
+location resolves in O(1): by venueurl, then by alias, then by name and town
+(the parts before the first and after the last comma), or by name alone when
+only one venue has it. A location seen for the first time becomes a new
+venue; placeholders ("Event by ...", "TBA") get no venue. Spellings matched by URL or name are added as aliases, so the next
+lookup is direct.
+
+Coordinates come from a geocoder (Nominatim by default) only through
+`python venues.py geocode`, never during ingest. Every answer, including "not
+found", is kept in geocode_cache, so a venue is looked up once.
+
+    python venues.py backfill             assign venues to events that have none
+    python venues.py list                 venues with their event counts
+    python venues.py merge FROM INTO      fold venue FROM into INTO
+    python venues.py alias VENUE TEXT     resolve TEXT to VENUE from now on
+    python venues.py geocode [--limit N]  look up missing coordinates
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+import urllib.parse
+import urllib.request
+
+GEOCODER_URL = os.getenv('GEOCODER_URL', 'https://nominatim.openstreetmap.org/search')
+GEOCODE_COUNTRY = os.getenv('GEOCODE_COUNTRY', 'gb')  # countrycodes filter, empty for none
+GEOCODE_INTERVAL = float(os.getenv('GEOCODE_INTERVAL', '1.0'))  # seconds between requests (Nominatim policy)
+GEOCODE_TIMEOUT = float(os.getenv('GEOCODE_TIMEOUT', '10'))
+GEOCODE_RETRY_DAYS = int(os.getenv('GEOCODE_RETRY_DAYS', '90'))  # ask again about queries that found nothing
+GEOCODE_USER_AGENT = os.getenv('GEOCODE_USER_AGENT', 'bearduk-venues/1.0')
+
+# venue_key() of locations that are not venues
+PLACEHOLDER_KEYS = {'tba', 'tbc', 'tbd', 'location tbd', 'location tba', 'online', 'online event', 'various'}
+PLACEHOLDER_PREFIXES = ('event by ',)
+
+_APOSTROPHE_RE = re.compile(r"['‘’`]")
+_SEPARATOR_RE = re.compile(r'[\W_]+')
+
+
+def venue_key(text):
+    """Lookup key for a location: lower case, no accents or punctuation, "and" for "&", no leading "the" """
+    if not text:
+        return None
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = _APOSTROPHE_RE.sub('', text.replace('&', ' and '))
+    text = _SEPARATOR_RE.sub(' ', text).strip()
+    if text.startswith('the '):
+        text = text[4:]
+    return text or None
+
+
+def is_placeholder(key):
+    return key is None or key in PLACEHOLDER_KEYS or key.startswith(PLACEHOLDER_PREFIXES)
+
+
+def split_location(location):
+    """(name, town) of "Name, ..., Town"; town is None without a comma"""
+    parts = [part.strip() for part in location.split(',') if part.strip()]
+    if not parts:
+        return location.strip(), None
+    return parts[0], (parts[-1] if len(parts) > 1 else None)
+
+
+def venue_slug(key):
+    return key.replace(' ', '-')
+
+
+def init_venues(conn):
+    """Create venues, venue_aliases, geocode_cache and beard_events.venue_id"""
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS venues (
+        id SERIAL PRIMARY KEY,
+        slug TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        town TEXT,
+        venueurl TEXT,
+        latitude DOUBLE PRECISION,
+        longitude DOUBLE PRECISION,
+        geocoded_at TIMESTAMPTZ,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS venue_aliases (
+        alias TEXT PRIMARY KEY,
+        venue_id INTEGER NOT NULL REFERENCES venues (id) ON DELETE CASCADE,
+        source TEXT NOT NULL DEFAULT 'location'
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_venue_aliases_venue ON venue_aliases (venue_id)')
+    c.execute('''CREATE TABLE IF NOT EXISTS geocode_cache (
+        query TEXT PRIMARY KEY,
+        latitude DOUBLE PRECISION,
+        longitude DOUBLE PRECISION,
+        display_name TEXT,
+        fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )''')
+    # ALTER TABLE locks beard_events against the web's reads even when the column
+    # exists, and CREATE INDEX against writes, so both are only run when missing
+    c.execute('''SELECT 1 FROM information_schema.columns
+                 WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s''',
+              ('beard_events', 'venue_id'))
+    if c.fetchone() is None:
+        c.execute('''ALTER TABLE beard_events
+                     ADD COLUMN venue_id INTEGER REFERENCES venues (id) ON DELETE SET NULL''')
+    c.execute("SELECT to_regclass('idx_beard_events_archive_venue_id')")
+    if c.fetchone()[0] is None:
+        # Archive pages for one venue are a keyset scan of this index
+        c.execute('''CREATE INDEX idx_beard_events_archive_venue_id
+                     ON beard_events (venue_id, timestamp, id) INCLUDE (url, name, responded, location, venueurl, imageurl)
+                     WHERE timestamp IS NOT NULL''')
+
+
+class VenueIndex:
+    """Every alias, venue name and venue URL, in dicts"""
+
+    def __init__(self):
+        self.aliases = {}  # venue_key(location) -> venue id
+        self.places = {}  # (name key, town key) -> venue id, None when venues share them
+        self.names = {}  # name key -> venue id, None when venues share the name
+        self.urls = {}  # venueurl -> venue id
+
+    @classmethod
+    def load(cls, conn):
+        index = cls()
+        c = conn.cursor()
+        c.execute('SELECT id, name, town, venueurl FROM venues')
+        for venue_id, name, town, venueurl in c.fetchall():
+            index.add_venue(venue_id, name, town, venueurl)
+        c.execute('SELECT alias, venue_id FROM venue_aliases')
+        index.aliases.update(c.fetchall())
+        return index
+
+    def add_venue(self, venue_id, name, town=None, venueurl=None):
+        name_key = venue_key(split_location(name)[0])
+        if name_key:
+            _add_unique(self.names, name_key, venue_id)
+            if town:
+                _add_unique(self.places, (name_key, venue_key(town)), venue_id)
+        if venueurl:
+            self.urls.setdefault(venueurl, venue_id)
+
+    def lookup(self, location, venueurl=None):
+        """(venue id, how it matched) or (None, None); location must not be a placeholder
+
+        A location with a town ("The Vaults, 43 Albert Rd, Southsea") matches a
+        venue with the same name and town; one without ("The Vaults") matches
+        the only venue of that name.
+        """
+        if venueurl and venueurl in self.urls:
+            return self.urls[venueurl], 'url'
+        key = venue_key(location)
+        if key in self.aliases:
+            return self.aliases[key], 'alias'
+        name, town = split_location(location)
+        if town is None:
+            venue_id = self.names.get(venue_key(name))
+        else:
+            venue_id = self.places.get((venue_key(name), venue_key(town)))
+        return (venue_id, 'name') if venue_id is not None else (None, None)
+
+
+def _add_unique(mapping, key, venue_id):
+    mapping[key] = venue_id if mapping.get(key, venue_id) == venue_id else None
+
+
+def add_alias(conn, key, venue_id, source='location'):
+    conn.cursor().execute('''INSERT INTO venue_aliases (alias, venue_id, source) VALUES (%s, %s, %s)
+                             ON CONFLICT (alias) DO NOTHING''', (key, venue_id, source))
+
+
+def create_venue(conn, location, venueurl=None):
+    """Insert a venue named after location (or find the one with its slug); returns its id"""
+    key = venue_key(location)
+    c = conn.cursor()
+    c.execute('''INSERT INTO venues (slug, name, town, venueurl) VALUES (%s, %s, %s, %s)
+                 ON CONFLICT (slug) DO UPDATE SET venueurl = COALESCE(venues.venueurl, EXCLUDED.venueurl)
+                 RETURNING id''',
+              (venue_slug(key), location.strip(), split_location(location)[1], venueurl))
+    venue_id = c.fetchone()[0]
+    add_alias(conn, key, venue_id)
+    return venue_id
+
+
+def resolve_venues(conn, pairs, index):
+    """{(location, venueurl): venue id or None}, creating venues and aliases for new locations
+
+    index is updated as it goes, so it stays valid for later batches.
+    """
+    resolved = {}
+    for location, venueurl in pairs:
+        key = venue_key(location)
+        if is_placeholder(key):
+            resolved[(location, venueurl)] = None
+            continue
+        venue_id, matched = index.lookup(location, venueurl)
+        if venue_id is None:
+            venue_id = create_venue(conn, location, venueurl)
+            index.add_venue(venue_id, location.strip(), split_location(location)[1], venueurl)
+        elif matched != 'alias' and key not in index.aliases:
+            add_alias(conn, key, venue_id, matched)
+        index.aliases.setdefault(key, venue_id)
+        if venueurl and venueurl not in index.urls:
+            conn.cursor().execute('UPDATE venues SET venueurl = %s WHERE id = %s AND venueurl IS NULL',
+                                  (venueurl, venue_id))
+            index.urls[venueurl] = venue_id
+        resolved[(location, venueurl)] = venue_id
+    return resolved
+
+
+def assign_venues(conn, index):
+    """Set venue_id on beard_events rows that have a location but no venue; returns rows updated"""
+    c = conn.cursor()
+    c.execute('''SELECT DISTINCT location, venueurl FROM beard_events
+                 WHERE venue_id IS NULL AND location IS NOT NULL''')
+    resolved = [(location, venueurl, venue_id)
+                for (location, venueurl), venue_id in resolve_venues(conn, c.fetchall(), index).items()
+                if venue_id is not None]
+    if not resolved:
+        return 0
+    locations, urls, venue_ids = zip(*resolved)
+    c.execute('''UPDATE beard_events e SET venue_id = v.venue_id
+                 FROM unnest(%s::text[], %s::text[], %s::int[]) AS v (location, venueurl, venue_id)
+                 WHERE e.venue_id IS NULL AND e.location = v.location
+                   AND e.venueurl IS NOT DISTINCT FROM v.venueurl''',
+              (list(locations), list(urls), list(venue_ids)))
+    return c.rowcount
+
+
+def venue_name(conn, venue_id):
+    c = conn.cursor()
+    c.execute('SELECT name FROM venues WHERE id = %s', (venue_id,))
+    row = c.fetchone()
+    return row[0] if row else None
+
+
+def venue_by_alias(conn, text):
+    """Venue id for a location spelling, or None"""
+    c = conn.cursor()
+    c.execute('SELECT venue_id FROM venue_aliases WHERE alias = %s', (venue_key(text),))
+    row = c.fetchone()
+    return row[0] if row else None
+
+
+# Venues with their event counts, busiest first, for /api/venues and `list`
+VENUES_SQL = """
+    SELECT v.id, v.name, v.town, v.venueurl, v.latitude, v.longitude,
+           COUNT(e.id)::int AS events, COUNT(e.id) FILTER (WHERE e.timestamp > NOW())::int AS upcoming
+    FROM venues v
+    LEFT JOIN beard_events e ON e.venue_id = v.id
+    GROUP BY v.id
+    ORDER BY events DESC, v.name
+"""
+VENUE_FIELDS = ('id', 'name', 'town', 'venue_url', 'latitude', 'longitude', 'events', 'upcoming')
+
+
+def merge_venues(conn, from_id, into_id):
+    """Move FROM's aliases and events to INTO and delete FROM; returns events moved"""
+    if from_id == into_id:
+        # Deleting FROM would cascade away its aliases and unlink its events
+        raise ValueError(f'cannot merge venue {from_id} into itself')
+    c = conn.cursor()
+    c.execute('UPDATE venue_aliases SET venue_id = %s WHERE venue_id = %s', (into_id, from_id))
+    c.execute('UPDATE beard_events SET venue_id = %s WHERE venue_id = %s', (into_id, from_id))
+    moved = c.rowcount
+    c.execute('''UPDATE venues v SET
+                     town = COALESCE(v.town, f.town),
+                     venueurl = COALESCE(v.venueurl, f.venueurl),
+                     latitude = COALESCE(v.latitude, f.latitude),
+                     longitude = COALESCE(v.longitude, f.longitude)
+                 FROM venues f
+                 WHERE v.id = %s AND f.id = %s''', (into_id, from_id))
+    c.execute('DELETE FROM venues WHERE id = %s', (from_id,))
+    return moved
+
+
+class Geocoder:
+    """Nominatim-style search API behind geocode_cache, at most one request per GEOCODE_INTERVAL"""
+
+    def __init__(self, url=GEOCODER_URL, interval=GEOCODE_INTERVAL):
+        self.url = url
+        self.interval = interval
+        self._last_request = 0.0
+        self.stats = {'cached': 0, 'fetched': 0, 'found': 0, 'errors': 0}
+
+    def _fetch(self, query):
+        params = {'q': query, 'format': 'jsonv2', 'limit': 1}
+        if GEOCODE_COUNTRY:
+            params['countrycodes'] = GEOCODE_COUNTRY
+        wait = self._last_request + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        request = urllib.request.Request(f'{self.url}?{urllib.parse.urlencode(params)}',
+                                         headers={'User-Agent': GEOCODE_USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=GEOCODE_TIMEOUT) as response:
+                results = json.load(response)
+        finally:
+            self._last_request = time.monotonic()
+        self.stats['fetched'] += 1
+        if not results:
+            return None, None, None
+        try:
+            return float(results[0]['lat']), float(results[0]['lon']), results[0].get('display_name')
+        except (KeyError, TypeError) as e:
+            raise ValueError(f'unexpected geocoder answer: {results[0]!r}') from e
+
+    def geocode(self, conn, query):
+        """(latitude, longitude) for a place name, or None; answers are cached in geocode_cache
+
+        Raises OSError / ValueError when the geocoder cannot be reached or answers nonsense.
+        """
+        key = venue_key(query)
+        c = conn.cursor()
+        c.execute('''SELECT latitude, longitude FROM geocode_cache
+                     WHERE query = %s
+                       AND (latitude IS NOT NULL OR fetched_at > NOW() - make_interval(days => %s))''',
+                  (key, GEOCODE_RETRY_DAYS))
+        row = c.fetchone()
+        if row is not None:
+            self.stats['cached'] += 1
+            return row if row[0] is not None else None
+
+        latitude, longitude, display_name = self._fetch(query)
+        c.execute('''INSERT INTO geocode_cache (query, latitude, longitude, display_name) VALUES (%s, %s, %s, %s)
+                     ON CONFLICT (query) DO UPDATE SET latitude = EXCLUDED.latitude, longitude = EXCLUDED.longitude,
+                         display_name = EXCLUDED.display_name, fetched_at = NOW()''',
+                  (key, latitude, longitude, display_name))
+        if latitude is None:
+            return None
+        self.stats['found'] += 1
+        return latitude, longitude
+
+
+def geocode_venues(conn, geocoder, limit=None):
+    """Fill in coordinates of venues that have none; returns how many were found"""
+    c = conn.cursor()
+    c.execute('''SELECT id, name FROM venues
+                 WHERE latitude IS NULL
+                   AND (geocoded_at IS NULL OR geocoded_at < NOW() - make_interval(days => %s))
+                 ORDER BY id LIMIT %s''', (GEOCODE_RETRY_DAYS, limit))
+    found = 0
+    for venue_id, name in c.fetchall():
+        try:
+            coordinates = geocoder.geocode(conn, name)
+        except (OSError, ValueError) as e:
+            geocoder.stats['errors'] += 1
+            print(f"Geocoding {name!r} failed: {e}")
+            continue  # not recorded, so it is retried next run
+        if coordinates is None:
+            c.execute('UPDATE venues SET geocoded_at = NOW() WHERE id = %s', (venue_id,))
+        else:
+            c.execute('UPDATE venues SET latitude = %s, longitude = %s, geocoded_at = NOW() WHERE id = %s',
+                      (*coordinates, venue_id))
+            found += 1
+        conn.commit()  # keep what was found if a later request fails
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Venue registry for beard_events')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('backfill')
+    subparsers.add_parser('list')
+    merge = subparsers.add_parser('merge')
+    merge.add_argument('from_id', type=int)
+    merge.add_argument('into_id', type=int)
+    alias = subparsers.add_parser('alias')
+    alias.add_argument('venue_id', type=int)
+    alias.add_argument('text')
+    geocode = subparsers.add_parser('geocode')
+    geocode.add_argument('--limit', type=int)
+    args = parser.parse_args()
+
+    from archive import refresh_month_counts
+    from db import close_pool, get_connection
+    from upcoming import init_upcoming, refresh_upcoming_events
+
+    try:
+        with get_connection() as conn:
+            init_venues(conn)
+            c = conn.cursor()
+            if args.command == 'backfill':
+                updated = assign_venues(conn, VenueIndex.load(conn))
+                if updated:
+                    refresh_month_counts(conn)
+                    init_upcoming(conn)
+                    refresh_upcoming_events(conn)
+                print(f"Assigned venues to {updated} events")
+            elif args.command == 'list':
+                c.execute(f'''SELECT v.*, (SELECT COUNT(*) FROM venue_aliases a WHERE a.venue_id = v.id)
+                              FROM ({VENUES_SQL}) v''')
+                for venue_id, name, town, _, latitude, _, events, upcoming, aliases in c.fetchall():
+                    located = 'located' if latitude is not None else ''
+                    print(f"{venue_id:5} {name[:45]:45} {town or '':15} {events:5} events "
+                          f"{upcoming:3} upcoming {aliases:3} aliases {located}")
+            elif args.command == 'merge':
+                if args.from_id == args.into_id:
+                    print("Cannot merge a venue into itself")
+                    return 1
+                if venue_name(conn, args.from_id) is None or venue_name(conn, args.into_id) is None:
+                    print("No such venue")
+                    return 1
+                moved = merge_venues(conn, args.from_id, args.into_id)
+                refresh_month_counts(conn)
+                init_upcoming(conn)
+                refresh_upcoming_events(conn)
+                print(f"Merged venue {args.from_id} into {args.into_id}: {moved} events moved")
+            elif args.command == 'alias':
+                key = venue_key(args.text)
+                if is_placeholder(key) or venue_name(conn, args.venue_id) is None:
+                    print("Not a venue name, or no such venue")
+                    return 1
+                c.execute('''INSERT INTO venue_aliases (alias, venue_id, source) VALUES (%s, %s, 'manual')
+                             ON CONFLICT (alias) DO UPDATE SET venue_id = EXCLUDED.venue_id, source = 'manual' ''',
+                          (key, args.venue_id))
+                print(f"{args.text!r} ({key}) now resolves to venue {args.venue_id}")
+            else:
+                conn.commit()
+                geocoder = Geocoder()
+                found = geocode_venues(conn, geocoder, args.limit)
+                print(f"Geocoded {found} venues ({geocoder.stats})")
+    finally:
+        close_pool()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())